@@ -0,0 +1,75 @@
+"""
+    Time ImportJSON.update_type_and_attribute on resources with increasing
+    numbers of attributes, to check the cost per attribute stays flat, i.e.
+    the remapping and duplicate elimination are linear in the number of attributes.
+
+    Usage, from the root of the repository:
+
+        python -m benchmarks.attributes [--counts 100,1000,10000] [--repeat 5]
+
+    Fails if the time per attribute of the largest count is more than
+    --tolerance times that of the smallest.
+"""
+import sys
+import time
+import argparse
+
+from hydra_client.objects import ExtendedDict
+
+from hydra_json import ImportJSON
+
+def make_resource(attributes, duplicates=0.1):
+    """
+        A node with the given number of resource attributes, of which a
+        fraction are duplicates of another attribute, without data.
+    """
+    distinct = max(int(attributes * (1 - duplicates)), 1)
+    resource_attributes = []
+    for a in range(attributes):
+        resource_attributes.append(ExtendedDict({'id': -(a + 1),
+                                                 'attr_id': -((a % distinct) + 1),
+                                                 'name': 'attr_%s' % (a % distinct)}))
+    return ExtendedDict({'id': -1, 'name': 'Node', 'types': [], 'attributes': resource_attributes})
+
+def make_importer(attributes):
+    importer = ImportJSON(None)
+    importer.attr_negid_posid_lookup = {-(a + 1): a + 1 for a in range(attributes)}
+    importer.attr_id_unit_id_lookup = {a + 1: 1 for a in range(0, attributes, 2)}
+    importer.ra_id_unit_id_lookup = {}
+    importer.rs_lookup = {}
+    importer.duplicate_ra_lookup = {}
+    return importer
+
+def measure(attributes, repeat):
+    """
+        The best time, over `repeat` runs, to update a resource with this many attributes
+    """
+    importer = make_importer(attributes)
+    times = []
+    for i in range(repeat):
+        resource = make_resource(attributes)
+        start = time.perf_counter()
+        importer.update_type_and_attribute(resource)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', default='100,1000,10000', help='Comma separated numbers of attributes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    per_attribute = []
+    for count in [int(c) for c in args.counts.split(',')]:
+        best = measure(count, args.repeat)
+        per_attribute.append(best / count)
+        print('%8d attributes  %10.3fms  %8.3fus per attribute' % (count, best * 1e3, best / count * 1e6))
+
+    if per_attribute[-1] > per_attribute[0] * args.tolerance:
+        print('The time per attribute grows with the number of attributes')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
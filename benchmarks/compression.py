@@ -0,0 +1,110 @@
+"""
+    Compare the compression codecs of a zipped export on synthetic networks:
+    the throughput of writing and of reading back (decompressing and parsing)
+    each file, and the compression ratio.
+
+    Usage, from the root of the repository:
+
+        python -m benchmarks.compression [--sizes small,medium] [--repeat 3]
+                                         [--codecs deflate:1,deflate:6,gzip,bz2,lzma,zstd]
+
+    Each codec may be given a level after a colon. Throughputs are in MB
+    of uncompressed JSON per second. Codecs which are not installed (zstd
+    without the zstandard package) are skipped.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from hydra_client import HydraClientError
+
+from hydra_json import ImportJSON, ExportJSON
+from hydra_json import reader
+from hydra_json.compression import check_codec
+
+from . import synthetic
+from .fake_server import FakeHydraClient
+from .run import SIZES, quiet
+
+DEFAULT_CODECS = 'deflate:1,deflate:6,deflate:9,gzip,bz2,lzma,zstd:3,zstd:19'
+
+def get_export_data(template, network_file):
+    """
+        The document of an export of the network, as it is written to a file
+    """
+    client = FakeHydraClient(template=template)
+    with quiet():
+        ImportJSON(client).import_network(network_file, client.template_id, 1)
+        return ExportJSON(client).get_export_data(1)
+
+def best_time(func, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def measure(export_data, codec, level, work_dir, repeat):
+    """
+        The best times to write the export with the codec and to read it
+        back, and the size of the file.
+    """
+    exporter = ExportJSON(None)
+
+    def write():
+        with quiet():
+            return exporter.write_network('Network', export_data, work_dir, zipped=codec is not None,
+                                          compression=codec, compression_level=level)
+
+    write_time, location = best_time(write, repeat)
+    read_time, _ = best_time(lambda: reader.load_network(location), repeat)
+    size = os.path.getsize(location)
+    os.remove(location)
+    return write_time, read_time, size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='small', help='Comma separated, from: %s' % ', '.join(SIZES))
+    parser.add_argument('--codecs', default=DEFAULT_CODECS, help='Comma separated codec[:level]')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    codecs = []
+    for spec in args.codecs.split(','):
+        codec, _, level = spec.partition(':')
+        level = int(level) if level else None
+        try:
+            check_codec(codec, level)
+        except HydraClientError as e:
+            print('Skipping %s: %s' % (spec, e))
+            continue
+        codecs.append((spec, codec, level))
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        for size in args.sizes.split(','):
+            params = SIZES[size]
+            template = synthetic.make_template(attributes=params['attributes'])
+            network_file = synthetic.write_network(os.path.join(work_dir, '%s-source.json' % size), **params)
+            export_data = get_export_data(template, network_file)
+
+            write_time, read_time, json_size = measure(export_data, None, None, work_dir, args.repeat)
+            print('%-8s %-12s %10.1fMB  ratio %6.2f  write %7.1fMB/s  read %7.1fMB/s'
+                  % (size, 'json', json_size / 1e6, 1, json_size / 1e6 / write_time, json_size / 1e6 / read_time))
+
+            for spec, codec, level in codecs:
+                write_time, read_time, file_size = measure(export_data, codec, level, work_dir, args.repeat)
+                print('%-8s %-12s %10.1fMB  ratio %6.2f  write %7.1fMB/s  read %7.1fMB/s'
+                      % (size, spec, file_size / 1e6, json_size / file_size,
+                         json_size / 1e6 / write_time, json_size / 1e6 / read_time))
+    finally:
+        shutil.rmtree(work_dir)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,412 @@
+"""
+    An in-process stand-in for hydra_client's RemoteJSONConnection, providing
+    the calls that ImportJSON and ExportJSON make.
+
+    Every request and response is encoded to JSON and decoded again, as it
+    would be over the wire, so serialisation costs are included in timings,
+    and the number of calls and bytes in each direction are recorded.
+    An optional per-call latency simulates a remote server.
+"""
+import json
+import time
+import threading
+import collections
+
+from hydra_client import HydraClientError
+from hydra_client.objects import ExtendedDict
+
+def wrap(value):
+    if isinstance(value, dict):
+        return ExtendedDict(value)
+    if isinstance(value, list):
+        return [wrap(v) for v in value]
+    return value
+
+class FakeHydraClient:
+    """
+        A hydra server held in memory. Networks added with add_network can
+        be read back with get_network, so an import can be followed by an export.
+    """
+
+    def __init__(self, template=None, latency=0, url='http://fake-hydra'):
+        self.url = url
+        self.user_id = 1
+        self.latency = latency
+
+        self.lock = threading.Lock()
+        self.call_counts = collections.Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        self.next_id = collections.defaultdict(int)
+        self.attributes = {}
+        self.dimensions = {1: {'id': 1, 'name': 'Volume', 'units': []},
+                           2: {'id': 2, 'name': 'Flow', 'units': []}}
+        self.templates = {}
+        self.networks = {}
+        self.scenarios = {}
+        self.rules = collections.defaultdict(list)
+        self.rule_type_definitions = {}
+
+        self.template_id = None
+        if template is not None:
+            self.template_id = self.load_template(template)
+
+    def new_id(self, kind):
+        self.next_id[kind] += 1
+        return self.next_id[kind]
+
+    def request(self, name, *args):
+        """
+            Record a call and round-trip its arguments through JSON
+        """
+        body = json.dumps(args)
+        with self.lock:
+            self.call_counts[name] += 1
+            self.bytes_sent += len(body)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return json.loads(body)
+
+    def respond(self, value):
+        body = json.dumps(value)
+        with self.lock:
+            self.bytes_received += len(body)
+        return wrap(json.loads(body))
+
+    def reset_counts(self):
+        self.call_counts.clear()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def login(self, username=None, password=None):
+        self.request('login', username)
+        return self.user_id
+
+    def load_template(self, template):
+        """
+            Store a template in which the type attributes refer to their
+            attribute by name (see synthetic.make_template), creating the attributes.
+        """
+        template = json.loads(json.dumps(template))
+        template_id = self.new_id('template')
+        template['id'] = template_id
+        for templatetype in template['templatetypes']:
+            templatetype['id'] = self.new_id('templatetype')
+            templatetype['template_id'] = template_id
+            for typeattr in templatetype['typeattrs']:
+                attr = typeattr.pop('attr')
+                existing = [a for a in self.attributes.values()
+                            if a['name'] == attr['name'] and a['dimension_id'] == attr['dimension_id']]
+                if len(existing) == 0:
+                    attr['id'] = self.new_id('attribute')
+                    self.attributes[attr['id']] = attr
+                else:
+                    attr = existing[0]
+                typeattr['attr_id'] = attr['id']
+                typeattr['type_id'] = templatetype['id']
+        self.templates[template_id] = template
+        return template_id
+
+    #Reference data
+
+    def get_template(self, template_id):
+        self.request('get_template', template_id)
+        return self.respond(self.templates[template_id])
+
+    def get_template_as_json(self, template_id=None):
+        self.request('get_template_as_json', template_id)
+        return self.respond(json.dumps(self.templates[template_id]))
+
+    def import_template_json(self, template_file):
+        self.request('import_template_json', template_file)
+        with open(template_file, 'r') as tmpl:
+            template_id = self.load_template(json.load(tmpl)['template'])
+        return self.respond(self.templates[template_id])
+
+    def get_attributes(self):
+        self.request('get_attributes')
+        return self.respond(list(self.attributes.values()))
+
+    def add_attribute(self, attr):
+        attr = self.request('add_attribute', attr)[0]
+        with self.lock:
+            attr['id'] = self.new_id('attribute')
+            attr = {'id': attr['id'], 'name': attr['name'], 'dimension_id': attr.get('dimension_id')}
+            self.attributes[attr['id']] = attr
+        return self.respond(attr)
+
+    def add_attributes(self, attrs):
+        attrs = self.request('add_attributes', attrs)[0]
+        new_attrs = []
+        with self.lock:
+            for attr in attrs:
+                attr = {'id': self.new_id('attribute'),
+                        'name': attr['name'],
+                        'dimension_id': attr.get('dimension_id')}
+                self.attributes[attr['id']] = attr
+                new_attrs.append(attr)
+        return self.respond(new_attrs)
+
+    def get_dimensions(self):
+        self.request('get_dimensions')
+        return self.respond(list(self.dimensions.values()))
+
+    def get_dimension(self, dimension_id):
+        self.request('get_dimension', dimension_id)
+        return self.respond(self.dimensions[dimension_id])
+
+    def get_rule_type_definitions(self):
+        self.request('get_rule_type_definitions')
+        return self.respond(list(self.rule_type_definitions.values()))
+
+    def add_rule_type_definition(self, typedefinition):
+        typedefinition = self.request('add_rule_type_definition', typedefinition)[0]
+        with self.lock:
+            if typedefinition['code'] in self.rule_type_definitions:
+                raise HydraClientError("Rule type %s already exists" % typedefinition['code'])
+            self.rule_type_definitions[typedefinition['code']] = typedefinition
+        return self.respond(typedefinition)
+
+    #Networks
+
+    def add_network(self, network):
+        network = self.request('add_network', network)[0]
+
+        with self.lock:
+            network['id'] = self.new_id('network')
+            ra_ids = {}
+            resource_ids = {}
+
+            def add_resource(resource, ref_key):
+                if ref_key != 'NETWORK':
+                    new_id = self.new_id(ref_key)
+                    resource_ids[(ref_key, resource['id'])] = new_id
+                    resource['id'] = new_id
+                    resource['network_id'] = network['id']
+                for resource_attr in resource.get('attributes', []):
+                    new_ra_id = self.new_id('resourceattr')
+                    ra_ids[resource_attr['id']] = new_ra_id
+                    attr = self.attributes[resource_attr['attr_id']]
+                    resource_attr.update({'id': new_ra_id,
+                                          'ref_key': ref_key,
+                                          'name': attr['name'],
+                                          'dimension_id': attr['dimension_id']})
+
+            add_resource(network, 'NETWORK')
+            for node in network.get('nodes', []):
+                add_resource(node, 'NODE')
+            for link in network.get('links', []):
+                add_resource(link, 'LINK')
+                link['node_1_id'] = resource_ids[('NODE', link['node_1_id'])]
+                link['node_2_id'] = resource_ids[('NODE', link['node_2_id'])]
+            for group in network.get('resourcegroups', []):
+                add_resource(group, 'GROUP')
+
+            scenario_ids = []
+            for scenario in network.get('scenarios', []):
+                scenario['id'] = self.new_id('scenario')
+                scenario['network_id'] = network['id']
+                for rs in scenario.get('resourcescenarios', []):
+                    rs['resource_attr_id'] = ra_ids[rs['resource_attr_id']]
+                    if rs['dataset'].get('id') is None:
+                        rs['dataset']['id'] = self.new_id('dataset')
+                scenario.setdefault('resourcegroupitems', [])
+                self.scenarios[scenario['id']] = scenario
+                scenario_ids.append(scenario['id'])
+
+            #Scenarios are stored separately, so they can be fetched individually
+            network['scenarios'] = scenario_ids
+            self.networks[network['id']] = network
+
+        return self.get_network(network_id=network['id'], include_data=False)
+
+    def get_network(self, network_id=None, scenario_id=None, include_data=True,
+                    include_results=True, **kwargs):
+        self.request('get_network', network_id, scenario_id, include_data)
+        network = dict(self.networks[network_id])
+        scenarios = []
+        for s_id in network['scenarios']:
+            if scenario_id is not None and s_id not in scenario_id:
+                continue
+            scenario = dict(self.scenarios[s_id])
+            if include_data is False:
+                scenario['resourcescenarios'] = []
+            scenarios.append(scenario)
+        network['scenarios'] = scenarios
+        return self.respond(network)
+
+    def get_networks(self, project_id=None, include_data=False):
+        self.request('get_networks', project_id)
+        return self.respond([{'id': n['id'], 'name': n['name']} for n in self.networks.values()
+                             if n.get('project_id') == project_id])
+
+    def get_scenario(self, scenario_id=None, include_data=True, include_results=True, **kwargs):
+        self.request('get_scenario', scenario_id)
+        return self.respond(self.scenarios[scenario_id])
+
+    def update_resourcedata(self, scenario_id=None, resource_scenarios=None):
+        resource_scenarios = self.request('update_resourcedata', scenario_id, resource_scenarios)[1]
+        with self.lock:
+            scenario = self.scenarios[scenario_id]
+            existing = {rs['resource_attr_id']: i for i, rs in enumerate(scenario['resourcescenarios'])}
+            for rs in resource_scenarios:
+                if rs['dataset'].get('id') is None:
+                    rs['dataset']['id'] = self.new_id('dataset')
+                rs['scenario_id'] = scenario_id
+                if rs['resource_attr_id'] in existing:
+                    scenario['resourcescenarios'][existing[rs['resource_attr_id']]] = rs
+                else:
+                    scenario['resourcescenarios'].append(rs)
+        return self.respond(resource_scenarios)
+
+    def add_resourcegroupitems(self, scenario_id=None, items=None):
+        items = self.request('add_resourcegroupitems', scenario_id, items)[1]
+        with self.lock:
+            for item in items:
+                item['id'] = self.new_id('resourcegroupitem')
+                item['scenario_id'] = scenario_id
+            self.scenarios[scenario_id]['resourcegroupitems'].extend(items)
+        return self.respond(items)
+
+    #Resources, for applying a delta
+
+    def add_resource(self, ref_key, collection, network_id, resource):
+        with self.lock:
+            network = self.networks[network_id]
+            resource['id'] = self.new_id(ref_key)
+            resource['network_id'] = network_id
+            for resource_attr in resource.get('attributes', []):
+                attr = self.attributes[resource_attr['attr_id']]
+                resource_attr.update({'id': self.new_id('resourceattr'),
+                                      'ref_key': ref_key,
+                                      'name': attr['name'],
+                                      'dimension_id': attr['dimension_id']})
+            network.setdefault(collection, []).append(resource)
+        return self.respond(resource)
+
+    def find_resource(self, collection, resource_id):
+        """
+            The network holding a resource, and the resource. A collection of None means the network.
+        """
+        for network in self.networks.values():
+            if collection is None:
+                if network['id'] == resource_id:
+                    return network, network
+                continue
+            for resource in network.get(collection, []):
+                if resource['id'] == resource_id:
+                    return network, resource
+        raise HydraClientError("Resource %s not found" % resource_id)
+
+    def update_resource(self, collection, resource):
+        with self.lock:
+            network, existing = self.find_resource(collection, resource['id'])
+            resource['attributes'] = existing.get('attributes', [])
+            resources = network[collection]
+            resources[resources.index(existing)] = resource
+        return self.respond(resource)
+
+    def delete_resource(self, collection, resource_id):
+        with self.lock:
+            network, resource = self.find_resource(collection, resource_id)
+            network[collection].remove(resource)
+            ra_ids = set(ra['id'] for ra in resource.get('attributes', []))
+            for s_id in network['scenarios']:
+                scenario = self.scenarios[s_id]
+                scenario['resourcescenarios'] = [rs for rs in scenario['resourcescenarios']
+                                                 if rs['resource_attr_id'] not in ra_ids]
+
+    def add_node(self, network_id=None, node=None):
+        return self.add_resource('NODE', 'nodes', network_id, self.request('add_node', network_id, node)[1])
+
+    def add_link(self, network_id=None, link=None):
+        return self.add_resource('LINK', 'links', network_id, self.request('add_link', network_id, link)[1])
+
+    def add_group(self, network_id=None, group=None):
+        return self.add_resource('GROUP', 'resourcegroups', network_id,
+                                 self.request('add_group', network_id, group)[1])
+
+    def update_node(self, node=None):
+        return self.update_resource('nodes', self.request('update_node', node)[0])
+
+    def update_link(self, link=None):
+        return self.update_resource('links', self.request('update_link', link)[0])
+
+    def update_group(self, group=None):
+        return self.update_resource('resourcegroups', self.request('update_group', group)[0])
+
+    def delete_node(self, node_id=None, purge_data=False):
+        self.delete_resource('nodes', self.request('delete_node', node_id)[0])
+
+    def delete_link(self, link_id=None, purge_data=False):
+        self.delete_resource('links', self.request('delete_link', link_id)[0])
+
+    def delete_group(self, group_id=None, purge_data=False):
+        self.delete_resource('resourcegroups', self.request('delete_group', group_id)[0])
+
+    def add_resource_attribute(self, resource_type=None, resource_id=None, attr_id=None, is_var='N'):
+        self.request('add_resource_attribute', resource_type, resource_id, attr_id, is_var)
+        collection = {'NODE': 'nodes', 'LINK': 'links', 'GROUP': 'resourcegroups'}.get(resource_type)
+        with self.lock:
+            _, resource = self.find_resource(collection, resource_id)
+            attr = self.attributes[attr_id]
+            resource_attr = {'id': self.new_id('resourceattr'),
+                             'attr_id': attr_id,
+                             'ref_key': resource_type,
+                             'attr_is_var': is_var,
+                             'name': attr['name'],
+                             'dimension_id': attr['dimension_id']}
+            resource.setdefault('attributes', []).append(resource_attr)
+        return self.respond(resource_attr)
+
+    def delete_resource_attribute(self, resource_attr_id=None):
+        self.request('delete_resource_attribute', resource_attr_id)
+        with self.lock:
+            for network in self.networks.values():
+                resources = [network] + [r for c in ('nodes', 'links', 'resourcegroups')
+                                         for r in network.get(c, [])]
+                for resource in resources:
+                    resource['attributes'] = [ra for ra in resource.get('attributes', [])
+                                              if ra['id'] != resource_attr_id]
+                for s_id in network['scenarios']:
+                    scenario = self.scenarios[s_id]
+                    scenario['resourcescenarios'] = [rs for rs in scenario['resourcescenarios']
+                                                     if rs['resource_attr_id'] != resource_attr_id]
+
+    def add_scenario(self, network_id=None, scenario=None):
+        scenario = self.request('add_scenario', network_id, scenario)[1]
+        with self.lock:
+            scenario['id'] = self.new_id('scenario')
+            scenario['network_id'] = network_id
+            scenario['resourcescenarios'] = []
+            scenario['resourcegroupitems'] = []
+            self.scenarios[scenario['id']] = scenario
+            self.networks[network_id]['scenarios'].append(scenario['id'])
+        return self.respond(scenario)
+
+    def delete_scenario(self, scenario_id=None):
+        self.request('delete_scenario', scenario_id)
+        with self.lock:
+            scenario = self.scenarios.pop(scenario_id)
+            self.networks[scenario['network_id']]['scenarios'].remove(scenario_id)
+
+    def delete_resource_scenario(self, scenario_id=None, resource_attr_id=None):
+        self.request('delete_resource_scenario', scenario_id, resource_attr_id)
+        with self.lock:
+            scenario = self.scenarios[scenario_id]
+            scenario['resourcescenarios'] = [rs for rs in scenario['resourcescenarios']
+                                             if rs['resource_attr_id'] != resource_attr_id]
+
+    #Rules
+
+    def add_rule(self, rule):
+        rule = self.request('add_rule', rule)[0]
+        with self.lock:
+            rule['id'] = self.new_id('rule')
+            self.rules[rule['network_id']].append(rule)
+        return self.respond(rule)
+
+    def get_resource_rules(self, ref_key=None, ref_id=None):
+        self.request('get_resource_rules', ref_key, ref_id)
+        return self.respond(self.rules.get(ref_id, []))
@@ -0,0 +1,198 @@
+"""
+    Time the import and export of synthetic networks of increasing size
+    against the in-process fake server, and measure their peak memory.
+
+    Usage, from the root of the repository:
+
+        python -m benchmarks.run [--sizes small,medium] [--repeat 3]
+                                 [--output results.json] [--baseline previous.json]
+
+    With --baseline, the run fails if any case is more than --tolerance
+    (a fraction, default 0.25) slower than in the baseline results.
+
+    Peak memory includes the fake server, which holds the encoded request
+    and response of each call, as the real client does.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+from hydra_json import ImportJSON, ExportJSON, copy_network
+
+from . import synthetic
+from .fake_server import FakeHydraClient
+
+SIZES = {
+    'small': dict(nodes=100, attributes=5, scenarios=2, timesteps=24),
+    'medium': dict(nodes=1000, attributes=10, scenarios=3, timesteps=168),
+    'large': dict(nodes=5000, attributes=10, scenarios=4, timesteps=365),
+}
+
+def import_case(**import_kwargs):
+    """
+        A case which imports the network file into a fresh server
+    """
+    def run(template, network_file, work_dir):
+        client = FakeHydraClient(template=template)
+        ImportJSON(client).import_network(network_file, client.template_id, 1, **import_kwargs)
+        return client
+    return run
+
+def export_case(**export_kwargs):
+    """
+        A case which exports a network already imported into the server
+    """
+    def setup(template, network_file):
+        client = FakeHydraClient(template=template)
+        with quiet():
+            ImportJSON(client).import_network(network_file, client.template_id, 1)
+        return client
+
+    def run(client, network_file, work_dir):
+        client.reset_counts()
+        ExportJSON(client).export_network(1, target_dir=work_dir, **export_kwargs)
+        return client
+
+    run.setup = setup
+    return run
+
+def copy_case():
+    """
+        A case which copies a network already imported into one server to
+        another, to compare with an export followed by an import
+    """
+    def setup(template, network_file):
+        source = FakeHydraClient(template=template)
+        with quiet():
+            ImportJSON(source).import_network(network_file, source.template_id, 1)
+        return source, template
+
+    def run(state, network_file, work_dir):
+        source, template = state
+        target = FakeHydraClient(template=template)
+        copy_network(source, target, 1, target.template_id, 1)
+        return target
+
+    run.setup = setup
+    return run
+
+CASES = {
+    'import': import_case(),
+    'import-stream': import_case(stream=True),
+    'import-chunked': import_case(chunked=True),
+    'import-stream-chunked': import_case(stream=True, chunked=True),
+    'export': export_case(),
+    'export-zipped': export_case(zipped=True),
+    'export-dedupe': export_case(dedupe_datasets=True),
+    'export-sharded': export_case(sharded=True),
+    'export-columnar': export_case(zipped=True, columnar=True),
+    'copy': copy_case(),
+}
+
+@contextlib.contextmanager
+def quiet():
+    """
+        Hide the progress messages written to stdout by the importer and exporter
+    """
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+def measure(case, template, network_file, repeat):
+    """
+        Run a case `repeat` times for timing, then once more under tracemalloc
+        for its peak memory.
+        returns:
+            A dict of the best and median times, peak memory, and the client
+            calls and bytes of the last run
+    """
+    times = []
+    for i in range(repeat + 1):
+        work_dir = tempfile.mkdtemp()
+        try:
+            state = case.setup(template, network_file) if hasattr(case, 'setup') else template
+            with quiet():
+                if i == repeat:
+                    tracemalloc.start()
+                    client = case(state, network_file, work_dir)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                else:
+                    start = time.perf_counter()
+                    client = case(state, network_file, work_dir)
+                    times.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(work_dir)
+
+    times.sort()
+    return {'best': times[0],
+            'median': times[len(times) // 2],
+            'peak_memory': peak,
+            'calls': sum(client.call_counts.values()),
+            'bytes_sent': client.bytes_sent,
+            'bytes_received': client.bytes_received}
+
+def compare(results, baseline, tolerance):
+    """
+        Return a list of the cases which are slower than in the baseline
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if result['best'] > previous['best'] * (1 + tolerance):
+            regressions.append('%s: %.3fs (was %.3fs)' % (key, result['best'], previous['best']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='small', help='Comma separated, from: %s' % ', '.join(SIZES))
+    parser.add_argument('--cases', default=','.join(CASES), help='Comma separated, from: %s' % ', '.join(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='Compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = {}
+    data_dir = tempfile.mkdtemp()
+    try:
+        for size in args.sizes.split(','):
+            params = SIZES[size]
+            template = synthetic.make_template(attributes=params['attributes'])
+            network_file = synthetic.write_network(os.path.join(data_dir, '%s.json' % size), **params)
+            file_size = os.path.getsize(network_file)
+
+            for case_name in args.cases.split(','):
+                result = measure(CASES[case_name], template, network_file, args.repeat)
+                result['file_size'] = file_size
+                results['%s/%s' % (size, case_name)] = result
+                print('%-24s best %8.3fs  median %8.3fs  peak %8.1fMB  calls %5d  sent %8.1fMB  received %8.1fMB'
+                      % ('%s/%s' % (size, case_name), result['best'], result['median'],
+                         result['peak_memory'] / 1e6, result['calls'],
+                         result['bytes_sent'] / 1e6, result['bytes_received'] / 1e6))
+    finally:
+        shutil.rmtree(data_dir)
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if len(regressions) > 0:
+            print('Slower than the baseline:\n  ' + '\n  '.join(regressions))
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
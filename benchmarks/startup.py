@@ -0,0 +1,77 @@
+"""
+    Measure the start-up time of the CLI, and check that starting it does
+    not load the client, the importer or exporter, or their optional
+    dependencies, which are only needed by the command being run.
+
+    Usage, from the root of the repository:
+
+        python -m benchmarks.startup [--repeat 5] [--max-ms 200]
+
+    Each run is a fresh interpreter running `hydra-json --help` under
+    `python -X importtime`. Fails if any of the modules in HEAVY_MODULES is
+    imported, or, with --max-ms, if the best import time of hydra_json.cli
+    is more than that many milliseconds.
+"""
+import sys
+import argparse
+import subprocess
+
+#Modules which must not be loaded by `hydra-json --help`
+HEAVY_MODULES = ('hydra_client.connection',
+                 'hydra_json.importer',
+                 'hydra_json.exporter',
+                 'requests',
+                 'numpy',
+                 'ijson')
+
+COMMAND = 'import sys; sys.argv = ["hydra-json", "--help"]; from hydra_json.cli import start_cli; start_cli()'
+
+def run_once():
+    """
+        Start the CLI once under -X importtime.
+        returns:
+            A dict of the cumulative import time, in microseconds, of each module imported
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', COMMAND],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                             universal_newlines=True)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr)
+
+    modules = {}
+    for line in process.stderr.splitlines():
+        #import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='Fail if importing the CLI takes longer than this')
+    args = parser.parse_args(argv)
+
+    times = []
+    for i in range(args.repeat):
+        modules = run_once()
+        times.append(modules.get('hydra_json.cli', 0) / 1000)
+    times.sort()
+    print('hydra_json.cli  best %.1fms  median %.1fms  (%d modules)'
+          % (times[0], times[len(times) // 2], len(modules)))
+
+    failed = False
+    heavy = [m for m in modules if m in HEAVY_MODULES]
+    if len(heavy) > 0:
+        print('Loaded at start-up: %s' % ', '.join(heavy))
+        failed = True
+    if args.max_ms is not None and times[0] > args.max_ms:
+        print('Start-up is slower than %sms' % args.max_ms)
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
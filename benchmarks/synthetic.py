@@ -0,0 +1,185 @@
+"""
+    Generate synthetic networks in the format written by ExportJSON.
+
+    The shape of every record (node, link, resource attribute, scenario,
+    dataset) is copied from tests/test.json, so the generated files exercise
+    the same code paths as a real export, just at a larger scale.
+"""
+import os
+import copy
+import json
+import hashlib
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'tests', 'test.json')
+
+TEMPLATE_NAME = 'Synthetic Template'
+NETWORK_TYPE = 'Synthetic Network'
+NODE_TYPES = ('Demand', 'Supply')
+LINK_TYPE = 'edge'
+
+def load_sample():
+    with open(SAMPLE_FILE, 'r') as sample_file:
+        return json.load(sample_file)
+
+def make_template(attributes=5):
+    """
+        A template with one network type, two node types and one link type,
+        each having all the synthetic attributes. Type attributes refer to
+        their attribute by name, as the fake server assigns the IDs.
+    """
+    attr_names = ['attr_%s' % a for a in range(attributes)]
+
+    def make_type(name, resource_type, typeattrs):
+        return {'name': name,
+                'resource_type': resource_type,
+                'layout': None,
+                'typeattrs': [{'attr': {'name': a, 'dimension_id': None}, 'unit_id': None}
+                              for a in typeattrs]}
+
+    return {'name': TEMPLATE_NAME,
+            'layout': None,
+            'description': None,
+            'templatetypes': [make_type(NETWORK_TYPE, 'NETWORK', []),
+                              make_type(NODE_TYPES[0], 'NODE', attr_names),
+                              make_type(NODE_TYPES[1], 'NODE', attr_names),
+                              make_type(LINK_TYPE, 'LINK', attr_names)]}
+
+def make_value(timesteps, seed):
+    """
+        A dataframe value, encoded as a JSON string as hydra stores it, with
+        one column of `timesteps` rows.
+    """
+    column = {str(t): round(seed * 0.5 + t * 0.25, 4) for t in range(timesteps)}
+    return json.dumps({'value': column})
+
+def make_network(nodes=100, links=None, attributes=5, scenarios=2, timesteps=24,
+                 distinct_datasets=None, rules=0):
+    """
+        Generate a network in the export format.
+        args:
+            nodes (int): The number of nodes
+            links (int): The number of links. Defaults to nodes - 1 (a chain)
+            attributes (int): The number of attributes on each node and link
+            scenarios (int): The number of scenarios. Each holds a dataset for
+                             every resource attribute.
+            timesteps (int): The length of each dataset's dataframe
+            distinct_datasets (int): If set, only this many different dataset
+                                     values are used, to exercise deduplication
+            rules (int): The number of network rules
+        returns:
+            A dict which can be written out with json.dump
+    """
+    if links is None:
+        links = max(nodes - 1, 0)
+
+    sample = load_sample()
+    sample_network = sample['network']
+    sample_node = sample_network['nodes'][0]
+    sample_link = sample_network['links'][0]
+    sample_ra = sample_node['attributes'][0]
+    sample_scenario = sample_network['scenarios'][0]
+    sample_dataset = sample_scenario['resourcescenarios'][0]['dataset']
+
+    def make_type(name):
+        resource_type = copy.deepcopy(sample_node['types'][0])
+        resource_type['name'] = name
+        resource_type['template_name'] = TEMPLATE_NAME
+        return resource_type
+
+    attr_ids = [-(a + 1) for a in range(attributes)]
+    file_attributes = {str(attr_id): {'name': 'attr_%s' % a, 'dimension': None}
+                       for a, attr_id in enumerate(attr_ids)}
+
+    next_id = [0]
+    def new_id():
+        next_id[0] += 1
+        return -next_id[0]
+
+    resource_attr_ids = []
+    def make_attributes(ref_key):
+        resource_attributes = []
+        for a, attr_id in enumerate(attr_ids):
+            resource_attr = copy.deepcopy(sample_ra)
+            resource_attr.update({'id': new_id(),
+                                  'ref_key': ref_key,
+                                  'node_id': None,
+                                  'attr_id': attr_id,
+                                  'name': 'attr_%s' % a})
+            resource_attributes.append(resource_attr)
+            resource_attr_ids.append(resource_attr['id'])
+        return resource_attributes
+
+    network_nodes = []
+    for n in range(nodes):
+        node = copy.deepcopy(sample_node)
+        node.update({'id': new_id(),
+                     'name': 'Node_%s' % n,
+                     'x': float(n % 100),
+                     'y': float(n // 100),
+                     'types': [make_type(NODE_TYPES[n % 2])],
+                     'attributes': make_attributes('NODE')})
+        network_nodes.append(node)
+
+    network_links = []
+    for l in range(links):
+        link = copy.deepcopy(sample_link)
+        link.update({'id': new_id(),
+                     'name': 'Link_%s' % l,
+                     'node_1_id': network_nodes[l % nodes]['id'],
+                     'node_2_id': network_nodes[(l + 1) % nodes]['id'],
+                     'types': [make_type(LINK_TYPE)],
+                     'attributes': make_attributes('LINK')})
+        network_links.append(link)
+
+    network_scenarios = []
+    value_index = 0
+    for s in range(scenarios):
+        scenario = copy.deepcopy(sample_scenario)
+        scenario.update({'id': s + 1,
+                         'name': 'Scenario %s' % s,
+                         'resourcescenarios': [],
+                         'resourcegroupitems': []})
+        for ra_id in resource_attr_ids:
+            seed = value_index if distinct_datasets is None else value_index % distinct_datasets
+            value_index += 1
+            dataset = copy.deepcopy(sample_dataset)
+            dataset['value'] = make_value(timesteps, seed)
+            dataset['id'] = seed + 1
+            dataset['name'] = 'dataset %s' % seed
+            dataset['hash'] = int(hashlib.sha1(dataset['value'].encode('utf-8')).hexdigest()[:15], 16)
+            scenario['resourcescenarios'].append({'resource_attr_id': ra_id, 'dataset': dataset})
+        network_scenarios.append(scenario)
+
+    network = copy.deepcopy(sample_network)
+    network.update({'id': 1,
+                    'name': 'Synthetic %s nodes' % nodes,
+                    'nodes': network_nodes,
+                    'links': network_links,
+                    'resourcegroups': [],
+                    'scenarios': network_scenarios,
+                    'attributes': [],
+                    'types': [make_type(NETWORK_TYPE)]})
+
+    network_rules = []
+    for r in range(rules):
+        network_rules.append({'id': r + 1,
+                              'name': 'rule_%s' % r,
+                              'description': None,
+                              'format': 'text',
+                              'ref_key': 'NETWORK',
+                              'value': 'x = %s' % r,
+                              'types': [{'code': 'type_%s' % (r % 5), 'name': 'Type %s' % (r % 5)}]})
+
+    return {'attributes': file_attributes,
+            'network': network,
+            'templates': [],
+            'rules': network_rules}
+
+def write_network(path, **kwargs):
+    """
+        Generate a network and write it to path. Returns the path.
+    """
+    with open(path, 'w') as network_file:
+        json.dump(make_network(**kwargs), network_file)
+    return path
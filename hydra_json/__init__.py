@@ -1,5 +1,24 @@
 """
-Module-level import to allow simpler import of the JSON classes
+Module-level import to allow simpler import of the JSON classes.
+
+They are imported when first used, so loading the package (and the CLI)
+does not load the client and the modules which depend on it.
 """
-from .importer import ImportJSON
-from .exporter import ExportJSON
+import importlib
+
+#The module of each name which can be imported from the package
+LAZY_NAMES = {'ImportJSON': '.importer',
+              'ExportJSON': '.exporter',
+              'copy_network': '.transfer'}
+
+__all__ = list(LAZY_NAMES)
+
+def __getattr__(name):
+    if name not in LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
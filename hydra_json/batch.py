@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Export or import several networks at once, sharing one logged-in client
+    and the template, attribute and dimension lookups between them.
+"""
+import os
+import glob
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from hydra_client import HydraClientError
+
+from . import reader
+from . import compression
+from .cache import MemoryCache
+from .exporter import ExportJSON
+from .importer import ImportJSON
+from .defaults import DEFAULT_WORKERS
+
+LOG = logging.getLogger(__name__)
+
+#The files in a directory which are imported
+NETWORK_FILE_EXTENSIONS = ('.json', '.zip', '.gz', '.bz2', '.xz', '.zst')
+#Files written alongside exports which are not networks
+IGNORED_FILE_SUFFIXES = ('_summary.json', '_delta.json', '_delta.zip', '_index.json')
+
+def get_project_network_ids(client, project_id):
+    """
+        Get the IDs of all the networks in a project
+    """
+    networks = client.get_networks(project_id=project_id, include_data=False)
+    return [n.id for n in networks]
+
+def export_networks(client, network_ids, cache=None, max_workers=DEFAULT_WORKERS, **export_kwargs):
+    """
+        Export a list of networks concurrently, on at most max_workers threads.
+        A failure to export one network is recorded and does not stop the others.
+        args:
+            client: A logged-in client, shared by all the exports
+            network_ids (list): The networks to export
+            cache (ReferenceCache): An optional cache of reference data
+            export_kwargs: Passed to ExportJSON.export_network (target_dir, zipped etc)
+        returns:
+            A list of dicts, one per network, in the order of network_ids, with
+            the keys 'network_id', 'location', 'time' (seconds) and 'error'
+            (None if the export succeeded)
+    """
+    dimension_lookup = {}
+    template_lookup = {}
+
+    #Fill the dimension lookup before starting, so the workers don't all request it.
+    ExportJSON(client, cache=cache, dimension_lookup=dimension_lookup).load_dimensions()
+
+    def export_one(network_id):
+        result = {'network_id': network_id, 'location': None, 'time': None, 'error': None}
+        start = time.time()
+        try:
+            exporter = ExportJSON(client,
+                                  cache=cache,
+                                  dimension_lookup=dimension_lookup,
+                                  template_lookup=template_lookup)
+            result['location'] = exporter.export_network(network_id, **export_kwargs)
+        except Exception as e:
+            LOG.exception("Unable to export network %s", network_id)
+            result['error'] = str(e)
+        result['time'] = time.time() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(export_one, network_ids))
+
+def find_network_files(source):
+    """
+        List the network files in a directory, those matching a glob pattern,
+        or those in a zip archive of several networks.
+        returns:
+            A list of (path, member) tuples, where member is the network's
+            file within a zip archive of several networks, or None
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+                 if os.path.splitext(name)[1].lower() in NETWORK_FILE_EXTENSIONS
+                 and not compression.strip_extension(name).endswith(IGNORED_FILE_SUFFIXES)]
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = sorted(glob.glob(source))
+
+    network_files = []
+    for path in paths:
+        members = reader.get_bundle_members(path)
+        if members is None:
+            network_files.append((path, None))
+        else:
+            network_files.extend((path, member) for member in members)
+
+    if len(network_files) == 0:
+        raise HydraClientError("No network files found in %s" % source)
+
+    return network_files
+
+def get_network_file_name(network_file):
+    """
+        The name of a (path, member) tuple from find_network_files, for reporting
+    """
+    path, member = network_file
+    if member is None:
+        return path
+    return '%s:%s' % (path, member)
+
+def parse_network_file(network_file):
+    """
+        Load a (path, member) tuple from find_network_files
+    """
+    path, member = network_file
+    return reader.load_network(path, member=member)
+
+def import_networks(client, network_files, template_id, project_id, cache=None,
+                    max_workers=DEFAULT_WORKERS, chunked=False,
+                    skip_rules=False, data_chunk_size=None):
+    """
+        Import a list of network files concurrently. The files are parsed,
+        their IDs remapped and the networks sent to the server on at most
+        max_workers threads, so one file can be parsed while others are
+        being sent, and at most max_workers parsed files are held in memory
+        at once. The template, attributes, dimensions and rule type
+        definitions are fetched once and shared by all the imports. A
+        failure to import one file is recorded and does not stop the others.
+        args:
+            client: A logged-in client, shared by all the imports
+            network_files (list): The (path, member) tuples from find_network_files
+            template_id (int): The template which matches the networks
+            project_id (int): The project to put them in. If None, one is created for each.
+            cache (ReferenceCache): An optional cache of reference data
+            chunked, skip_rules: As ImportJSON.import_network
+            data_chunk_size (int): The approximate size of each batch of scenario data, with chunked
+        returns:
+            A list of dicts, one per file, in the order of network_files, with
+            the keys 'network_file', 'network_id', 'time' (seconds), 'error'
+            (None if the import succeeded) and 'rule_errors' (the rules
+            which could not be added, as ImportJSON.add_rules)
+    """
+    if template_id is None:
+        raise HydraClientError("Please specifiy a template")
+
+    #Held in memory for the whole batch, so each lookup is only made once
+    shared_cache = MemoryCache(backing=cache)
+    #Stops two imports creating the same attribute or rule type definition
+    reference_lock = threading.Lock()
+
+    def import_one(network_file):
+        result = {'network_file': get_network_file_name(network_file), 'network_id': None,
+                  'time': None, 'error': None, 'rule_errors': []}
+        start = time.time()
+        try:
+            json_data = parse_network_file(network_file)
+
+            importer = ImportJSON(client, cache=shared_cache)
+            importer.reference_lock = reference_lock
+            if data_chunk_size is not None:
+                importer.data_chunk_size = data_chunk_size
+
+            importer.template_id = template_id
+            importer.get_template()
+            importer.init_lookups()
+            json_rules = importer.read_network_data(json_data, network_file[0])
+
+            #The document is not needed once it has been remapped
+            del json_data
+
+            scenario_data = importer.pop_scenario_data() if chunked is True else None
+            new_network = importer.save_network(None if skip_rules is True else json_rules,
+                                                project_id, scenario_data=scenario_data)
+
+            result['network_id'] = new_network.id
+            result['rule_errors'] = importer.rule_errors
+        except Exception as e:
+            LOG.exception("Unable to import %s", result['network_file'])
+            result['error'] = str(e)
+        result['time'] = time.time() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(import_one, network_files))
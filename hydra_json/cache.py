@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    An on-disk cache of the reference data (templates, attributes, dimensions,
+    rule type definitions) which every import and export fetches from the server.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import logging
+
+from hydra_client.objects import ExtendedDict
+
+from .defaults import DEFAULT_TTL
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hydra-json')
+#100MB
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+class ReferenceCache:
+    """
+        A cache of server objects, stored as one JSON file per object in a
+        directory specific to the server URL. Entries expire after `ttl`
+        seconds, and the least recently used entries are removed once the
+        cache is larger than `max_size` bytes.
+    """
+
+    def __init__(self, url, cache_dir=None, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+
+        self.url = url
+        self.ttl = ttl
+        self.max_size = max_size
+
+        server_key = hashlib.sha1(str(url).encode('utf-8')).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, server_key)
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        #The number of cache hits and misses, for reporting
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self, kind, key):
+        """
+            The location of the file for a given object
+        """
+        name = re.sub("[^A-Za-z0-9-_]", "-", '%s-%s' % (kind, key))
+        return os.path.join(self.cache_dir, '%s.json' % name)
+
+    def get(self, kind, key, fetch):
+        """
+            Return the cached object of the given kind and key, calling `fetch`
+            to get it from the server (and storing the result) if it is not in
+            the cache or has expired. Anything changed on the server through
+            this package is invalidated or replaced by the code which changes it.
+            Anything changed another way is only fetched again once it expires.
+            args:
+                kind (str): The type of object, e.g. 'template'
+                key: The object's ID, or 'all' for a full listing
+                fetch (callable): A function which retrieves the object from the server
+        """
+        path = self.get_path(kind, key)
+        entry = self.read_entry(path)
+
+        if entry is not None:
+            if time.time() - entry['stored'] > self.ttl:
+                log.debug("Cache entry %s %s has expired", kind, key)
+            else:
+                self.hits += 1
+                #Mark the entry as recently used
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass
+                return self.wrap(entry['value'])
+
+        self.misses += 1
+        value = fetch()
+        self.put(kind, key, value)
+        return value
+
+    def put(self, kind, key, value):
+        """
+            Store an object in the cache, evicting old entries if the cache is full.
+        """
+        path = self.get_path(kind, key)
+        tmp_path = '%s.%s.%s.tmp' % (path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'w') as entry_file:
+            json.dump({'stored': time.time(), 'value': value}, entry_file)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def invalidate(self, kind, key):
+        """
+            Remove an object from the cache, if it's there.
+        """
+        try:
+            os.remove(self.get_path(kind, key))
+        except FileNotFoundError:
+            pass
+
+    def read_entry(self, path):
+        """
+            Read a cache entry, returning None if it is missing or unreadable.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            log.warning("Ignoring unreadable cache entry %s", path)
+            return None
+
+    def evict(self):
+        """
+            Delete the least recently used entries until the cache is within max_size.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                #Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def wrap(self, value):
+        """
+            Give cached values the same attribute access as the client's responses.
+        """
+        if isinstance(value, dict):
+            return ExtendedDict(value)
+        if isinstance(value, list):
+            return [self.wrap(v) for v in value]
+        return value
+
+class MemoryCache:
+    """
+        A cache of server objects held in memory, for sharing reference data
+        between the imports or exports running in one process. Each object is
+        fetched once, even when several threads ask for it at the same time.
+        It can sit in front of a ReferenceCache, which is then used for anything
+        not yet in memory.
+    """
+
+    def __init__(self, backing=None):
+        self.backing = backing
+        self.values = {}
+        self.lock = threading.Lock()
+        #A lock for each object being fetched
+        self.fetch_locks = {}
+
+    def get(self, kind, key, fetch):
+        """
+            Return the object of the given kind and key, calling `fetch` (or
+            the backing cache) to get it if it is not held yet.
+        """
+        with self.lock:
+            if (kind, key) in self.values:
+                return self.values[(kind, key)]
+            fetch_lock = self.fetch_locks.setdefault((kind, key), threading.Lock())
+
+        with fetch_lock:
+            with self.lock:
+                if (kind, key) in self.values:
+                    return self.values[(kind, key)]
+            if self.backing is not None:
+                value = self.backing.get(kind, key, fetch)
+            else:
+                value = fetch()
+            with self.lock:
+                self.values[(kind, key)] = value
+            return value
+
+    def put(self, kind, key, value):
+        """
+            Store an object, and in the backing cache if there is one.
+        """
+        with self.lock:
+            self.values[(kind, key)] = value
+        if self.backing is not None:
+            self.backing.put(kind, key, value)
+
+    def invalidate(self, kind, key):
+        """
+            Forget an object, so the next `get` fetches it again.
+        """
+        with self.lock:
+            self.values.pop((kind, key), None)
+        if self.backing is not None:
+            self.backing.invalidate(kind, key)
+
+def get_cached(cache, kind, key, fetch):
+    """
+        Get an object through the cache if there is one, or straight from the server if not.
+    """
+    if cache is None:
+        return fetch()
+    return cache.get(kind, key, fetch)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    A checkpoint file recording the progress of an import, so one which is
+    interrupted can be resumed from its last committed step.
+"""
+import os
+import json
+import logging
+
+from hydra_client import HydraClientError
+
+log = logging.getLogger(__name__)
+
+class ImportCheckpoint:
+    """
+        The progress of an import, saved to a file each time something is
+        committed to the server. It records:
+            source: The network file, and the template and project it is imported into
+            attr_negid_posid_lookup: The mapping of the file's attributes to the server's
+            project_id: The project, if one was created for the network
+            network_id: The network, once created
+            reverse_id_lookups, resource_attr_lookup, scenario_ids:
+                The mapping of the file's resources, resource attributes and
+                scenarios to the new ones, in a chunked import
+            scenario_data: The scenario whose data is being sent, and how many
+                           of its resource scenarios have been sent. The data of
+                           the scenarios before it has been sent.
+            rules: The indexes of the rules added
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+
+    def load(self):
+        """
+            Read the checkpoint file, if there is one.
+            returns:
+                True if a checkpoint was read
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r') as checkpoint_file:
+            self.state = int_keys(json.load(checkpoint_file))
+        return True
+
+    def start(self, network, template_id, project_id):
+        """
+            Start recording a new import, discarding any previous progress
+        """
+        self.state = {'source': describe_source(network, template_id, project_id)}
+        self.save()
+
+    def check_source(self, network, template_id, project_id):
+        """
+            Raise an error if the checkpoint is of the import of a different
+            file, or into a different template or project.
+        """
+        if self.state.get('source') != describe_source(network, template_id, project_id):
+            raise HydraClientError(f"The checkpoint {self.path} is not of an import of "
+                                   f"{network} with template {template_id} into project {project_id}. "
+                                   "It may have been changed since. Remove the checkpoint to start again.")
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def update(self, **progress):
+        """
+            Record some progress and save the checkpoint
+        """
+        self.state.update(progress)
+        self.save()
+
+    def save(self):
+        #Write a new file and move it into place, so a crash can't leave a partial checkpoint
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as checkpoint_file:
+            json.dump(self.state, checkpoint_file)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """
+            Delete the checkpoint, once the import is complete
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.state = {}
+
+def describe_source(network, template_id, project_id):
+    """
+        Identify the network file, by its path, size and modification time,
+        and the template and project it is imported into.
+    """
+    stat = os.stat(network)
+    return {'network': os.path.abspath(network),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'template_id': template_id,
+            'project_id': project_id}
+
+def int_keys(value):
+    """
+        Turn the keys of the ID lookups back into ints, as JSON
+        only allows string keys.
+    """
+    if isinstance(value, dict):
+        return {(int(k) if k.lstrip('-').isdigit() else k): int_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [int_keys(v) for v in value]
+    return value
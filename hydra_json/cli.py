@@ -1,7 +1,11 @@
+import sys
+import contextlib
 import click
-from hydra_json import ImportJSON, ExportJSON
-
-from hydra_client.connection import RemoteJSONConnection
+#The importer, exporter and client are imported by the commands which use
+#them, so that starting the CLI (or showing its help) doesn't load them.
+#Check with python -m benchmarks.startup
+from hydra_json.defaults import DEFAULT_TTL, DEFAULT_WORKERS, DEFAULT_SCENARIO_WORKERS,\
+                               DATA_CHUNK_SIZE, RULE_WORKERS, CODECS, DEFAULT_CODEC
 
 global APP_NAME
 APP_NAME='hydra-json'
@@ -15,6 +19,7 @@ def hydra_app(category='import'):
 def get_client(hostname, session_id=None, **kwargs):
     """
     """
+    from hydra_client.connection import RemoteJSONConnection
     return RemoteJSONConnection(app_name=APP_NAME,
                                     url=hostname,
                                     session_id=session_id)
@@ -26,6 +31,43 @@ def get_logged_in_client(context, user_id=None):
         client.login(username=context['username'], password=context['password'])
     return client
 
+def get_cache(context):
+    """
+        The reference data cache for the server, if caching is enabled
+    """
+    if context.get('cache_dir') is None:
+        return None
+    from hydra_json.cache import ReferenceCache
+    return ReferenceCache(context['hostname'], cache_dir=context['cache_dir'], ttl=context['cache_ttl'])
+
+def get_filters(attributes, resource_types, scenarios, name_pattern):
+    """
+        An ExportFilter from the export options, or None if none are given
+    """
+    if len(attributes) == 0 and len(resource_types) == 0 and len(scenarios) == 0 and name_pattern is None:
+        return None
+    from hydra_json.filters import ExportFilter
+    return ExportFilter(attributes=list(attributes) or None,
+                        resource_types=list(resource_types) or None,
+                        scenarios=list(scenarios) or None,
+                        name_pattern=name_pattern)
+
+@contextlib.contextmanager
+def instrumented(report, trace_memory=False, measure_payload=False):
+    """
+        Yield an Instrumentation if a report file is requested (or None), and
+        write the report when the block exits, even if it failed.
+    """
+    if report is None:
+        yield None
+        return
+    from hydra_json.instrument import Instrumentation
+    instrumentation = Instrumentation(trace_memory=trace_memory, measure_payload=measure_payload)
+    try:
+        yield instrumentation
+    finally:
+        instrumentation.write_report(report)
+
 
 @click.group()
 @click.pass_obj
@@ -33,13 +75,17 @@ def get_logged_in_client(context, user_id=None):
 @click.option('-p', '--password', type=str, default=None)
 @click.option('-h', '--hostname', type=str, default=None)
 @click.option('-s', '--session', type=str, default=None)
-def cli(obj, username, password, hostname, session):
+@click.option('--cache-dir', type=str, default=None, help='''Cache templates, attributes and dimensions in this directory''')
+@click.option('--cache-ttl', type=int, default=DEFAULT_TTL, help='''Lifetime of cached reference data, in seconds''')
+def cli(obj, username, password, hostname, session, cache_dir, cache_ttl):
     """ CLI for the Hydra JSON application. """
 
     obj['hostname'] = hostname
     obj['username'] = username
     obj['password'] = password
     obj['session']  = session
+    obj['cache_dir'] = cache_dir
+    obj['cache_ttl'] = cache_ttl
 
 def start_cli():
     cli(obj={}, auto_envvar_prefix='HYDRA_JSON')
@@ -57,17 +103,114 @@ def start_cli():
 @click.option('--newlines', is_flag=True, type=str, help='''Add New Lines?''')
 @click.option('--zipped',  is_flag=True, type=str, default=False, help='''Zip the file (reduces file size)''')
 @click.option('--exclude-results', is_flag=True, default=False, type=str, help='''Exclude Results (increases speed and reduces file size)''')
-def export(obj, network_id, scenario_id, data_dir, user_id, newlines, zipped, exclude_results):
+@click.option('--stdout', is_flag=True, default=False, help='''Write the network to stdout instead of a file. Progress messages go to stderr.''')
+@click.option('--dedupe-datasets', is_flag=True, default=False, help='''Write each unique dataset once and refer to it by hash (reduces file size)''')
+@click.option('--sharded', is_flag=True, default=False, help='''Fetch the scenarios concurrently and write each to its own file in a zip''')
+@click.option('-w', '--workers', type=int, default=DEFAULT_SCENARIO_WORKERS, help='''Number of scenarios to fetch at the same time, with --sharded''')
+@click.option('--columnar', is_flag=True, default=False, help='''Store large numeric datasets as binary columns in the zip, with --zipped or --sharded (requires numpy)''')
+@click.option('--compression', type=click.Choice(CODECS), default=DEFAULT_CODEC, help='''Codec of a zipped or sharded file. deflate writes a zip; the others a compressed .json file (zstd requires zstandard). Sharded and columnar files are zips, so can use deflate, bz2 or lzma.''')
+@click.option('--compression-level', type=int, default=None, help='''Level of the codec (default: the codec's own)''')
+@click.option('--attribute', multiple=True, type=str, help='''Export only this attribute, by name. Can be given more than once.''')
+@click.option('--resource-type', multiple=True, type=str, help='''Export only the nodes, links and groups of this type, by name. Can be given more than once.''')
+@click.option('--scenario', multiple=True, type=str, help='''Export only this scenario, by ID or name. Can be given more than once.''')
+@click.option('--name-pattern', type=str, default=None, help='''Export only the nodes, links and groups whose names match this pattern, e.g. Reservoir*''')
+@click.option('--index', is_flag=True, default=False, help='''Also write an index of the file, so one scenario or resource can be read without loading it all''')
+@click.option('--delta-from', type=str, default=None, help='''Write only the changes since this previous export, or its summary, as a delta file''')
+@click.option('--summary', is_flag=True, default=False, help='''Also write a summary of the export, to pass to --delta-from next time''')
+@click.option('--report', type=str, default=None, help='''Write the time, memory and server calls of each phase to this JSON file ('-' for stderr)''')
+@click.option('--trace-memory', is_flag=True, default=False, help='''Measure the peak Python memory of each phase in the report (slow)''')
+@click.option('--measure-payload', is_flag=True, default=False, help='''Measure the JSON size of each server call's arguments and result in the report (slow)''')
+def export(obj, network_id, scenario_id, data_dir, user_id, newlines, zipped, exclude_results, stdout, dedupe_datasets, sharded, workers, columnar, compression, compression_level, attribute, resource_type, scenario, name_pattern, index, delta_from, summary, report, trace_memory, measure_payload):
+
+    from hydra_json.exporter import ExportJSON
+
+    if stdout is True:
+        #These only apply to files, so would otherwise be ignored
+        file_options = ['zipped', 'sharded', 'columnar', 'index', 'summary',
+                        'compression', 'compression_level', 'workers']
+        context = click.get_current_context()
+        used = ['--' + name.replace('_', '-') for name in file_options
+                if context.get_parameter_source(name) != click.core.ParameterSource.DEFAULT]
+        if len(used) > 0:
+            raise click.UsageError("--stdout can't be used with %s" % ', '.join(used))
+
+    client = get_logged_in_client(obj, user_id=user_id)
+
+    with instrumented(report, trace_memory, measure_payload) as instrumentation:
+        json_exporter = ExportJSON(client, cache=get_cache(obj), instrumentation=instrumentation)
+
+        include_results = not exclude_results
+        filters = get_filters(attribute, resource_type, scenario, name_pattern)
+
+        if stdout is True:
+            output = sys.stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                json_exporter.export_network(network_id, scenario_id=scenario_id, newlines=newlines,
+                                             include_results=include_results, output=output,
+                                             dedupe_datasets=dedupe_datasets, previous=delta_from,
+                                             filters=filters)
+            return
+
+        json_exporter.export_network(network_id, scenario_id=scenario_id, target_dir=data_dir,
+                                    newlines=newlines, zipped=zipped, include_results=include_results,
+                                    dedupe_datasets=dedupe_datasets, sharded=sharded, max_workers=workers,
+                                    columnar=columnar, previous=delta_from, summary=summary,
+                                    compression=compression, compression_level=compression_level,
+                                    index=index, filters=filters)
+
+@hydra_app(category='export')
+@cli.command(name='export-batch',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-n', '--network-id', multiple=True, type=int, help='''ID of a network to export. Can be given more than once.''')
+@click.option('-p', '--project-id', required=False, default=None, type=int, help='''Export all the networks in this project.''')
+@click.option('-d', '--data-dir',  required=True, type=str, help='''Target Directory''', default='/tmp')
+@click.option('--user-id', type=int, default=None)
+@click.option('--newlines', is_flag=True, type=str, help='''Add New Lines?''')
+@click.option('--zipped',  is_flag=True, type=str, default=False, help='''Zip the files (reduces file size)''')
+@click.option('--exclude-results', is_flag=True, default=False, type=str, help='''Exclude Results (increases speed and reduces file size)''')
+@click.option('--dedupe-datasets', is_flag=True, default=False, help='''Write each unique dataset once and refer to it by hash (reduces file size)''')
+@click.option('--columnar', is_flag=True, default=False, help='''Store large numeric datasets as binary columns in the zip, with --zipped (requires numpy)''')
+@click.option('--compression', type=click.Choice(CODECS), default=DEFAULT_CODEC, help='''Codec of a zipped or sharded file. deflate writes a zip; the others a compressed .json file (zstd requires zstandard). Sharded and columnar files are zips, so can use deflate, bz2 or lzma.''')
+@click.option('--compression-level', type=int, default=None, help='''Level of the codec (default: the codec's own)''')
+@click.option('--attribute', multiple=True, type=str, help='''Export only this attribute, by name. Can be given more than once.''')
+@click.option('--resource-type', multiple=True, type=str, help='''Export only the nodes, links and groups of this type, by name. Can be given more than once.''')
+@click.option('--scenario', multiple=True, type=str, help='''Export only this scenario of each network, by ID or name. Can be given more than once.''')
+@click.option('--name-pattern', type=str, default=None, help='''Export only the nodes, links and groups whose names match this pattern, e.g. Reservoir*''')
+@click.option('-w', '--workers', type=int, default=DEFAULT_WORKERS, help='''Number of networks to export at the same time''')
+def export_batch(obj, network_id, project_id, data_dir, user_id, newlines, zipped, exclude_results, dedupe_datasets, columnar, compression, compression_level, attribute, resource_type, scenario, name_pattern, workers):
+    """
+        Export several networks, or all the networks in a project, with one login.
+    """
 
+    from hydra_json import batch
 
     client = get_logged_in_client(obj, user_id=user_id)
 
-    json_exporter = ExportJSON(client)
+    network_ids = list(network_id)
+    if project_id is not None:
+        network_ids.extend(batch.get_project_network_ids(client, project_id))
+
+    if len(network_ids) == 0:
+        raise click.UsageError("Specify at least one network ID or a project ID")
+
+    results = batch.export_networks(client, network_ids, cache=get_cache(obj), max_workers=workers,
+                                    target_dir=data_dir, newlines=newlines, zipped=zipped,
+                                    include_results=not exclude_results, dedupe_datasets=dedupe_datasets,
+                                    columnar=columnar, compression=compression,
+                                    compression_level=compression_level,
+                                    filters=get_filters(attribute, resource_type, scenario, name_pattern))
 
-    include_results = not exclude_results
+    for result in results:
+        if result['error'] is None:
+            click.echo(f"Network {result['network_id']}: {result['location']} ({result['time']:.1f}s)")
+        else:
+            click.echo(f"Network {result['network_id']}: FAILED ({result['time']:.1f}s) {result['error']}", err=True)
 
-    json_exporter.export_network(network_id, scenario_id=scenario_id, target_dir=data_dir,
-                                newlines=newlines, zipped=zipped, include_results=include_results)
+    if any(r['error'] is not None for r in results):
+        sys.exit(1)
 
 @hydra_app(category='import')
 @cli.command(name='import',
@@ -81,13 +224,217 @@ def export(obj, network_id, scenario_id, data_dir, user_id, newlines, zipped, ex
 @click.option('--network-name', required=False, type=str, help='''Optional network name, rather than using the one in the file''')
 @click.option('--user-id', type=int, default=None)
 @click.option('-d', '--data-dir',  required=True, type=str, default='/tmp', help='''Target Directory''')
-def import_network(obj, network_file, template_id, project_id, network_name=None, user_id=None, data_dir=None):
+@click.option('--stream', is_flag=True, default=False, help='''Read the file incrementally. With --chunked, the scenario data is never held in memory all at once''')
+@click.option('--chunked', is_flag=True, default=False, help='''Create the network first, then send the scenario data in batches (avoids request size limits)''')
+@click.option('--chunk-size', type=int, default=DATA_CHUNK_SIZE // (1024 * 1024), help='''Approximate size of each batch of scenario data, in MB, with --chunked''')
+@click.option('--checkpoint', type=str, default=None, help='''Record the progress of the import in this file, so it can be resumed if interrupted (default with --chunked: the network file name with .checkpoint added)''')
+@click.option('--resume', is_flag=True, default=False, help='''Continue an interrupted import from its checkpoint (default: the one a --chunked import writes, the network file name with .checkpoint added)''')
+@click.option('--skip-rules', is_flag=True, default=False, help='''Don't add the network's rules. They can be added later with import-rules.''')
+@click.option('--scenario', multiple=True, type=str, help='''Import only this scenario, by ID or name. Can be given more than once. From a file exported with --index, only it is read.''')
+@click.option('--rule-workers', type=int, default=RULE_WORKERS, help='''Number of rules to add at the same time''')
+@click.option('--dry-run', is_flag=True, default=False, help='''Only check the file against the template and the server, as the validate command does. Nothing is written.''')
+@click.option('--no-validate', is_flag=True, default=False, help='''Don't check the whole file before anything is written (saves a pass over the file with --stream)''')
+@click.option('--report', type=str, default=None, help='''Write the time, memory and server calls of each phase to this JSON file ('-' for stderr)''')
+@click.option('--trace-memory', is_flag=True, default=False, help='''Measure the peak Python memory of each phase in the report (slow)''')
+@click.option('--measure-payload', is_flag=True, default=False, help='''Measure the JSON size of each server call's arguments and result in the report (slow)''')
+def import_network(obj, network_file, template_id, project_id, network_name=None, user_id=None, data_dir=None, stream=False, chunked=False, chunk_size=None, checkpoint=None, resume=False, skip_rules=False, scenario=(), rule_workers=RULE_WORKERS, dry_run=False, no_validate=False, report=None, trace_memory=False, measure_payload=False):
+
+    from hydra_json.importer import ImportJSON
+    from hydra_json.checkpoint import ImportCheckpoint
+
+    client = get_logged_in_client(obj, user_id=user_id)
+
+    with instrumented(report, trace_memory, measure_payload) as instrumentation:
+        if checkpoint is None and (chunked is True or resume is True):
+            #A chunked import can be interrupted between batches, so always record its
+            #progress where --resume will look for it
+            checkpoint = network_file + '.checkpoint'
+
+        json_importer = ImportJSON(client, cache=get_cache(obj), instrumentation=instrumentation,
+                                   checkpoint=None if checkpoint is None else ImportCheckpoint(checkpoint))
+        json_importer.data_chunk_size = chunk_size * 1024 * 1024
+        json_importer.rule_workers = rule_workers
+        json_importer.validate = not no_validate
+
+        json_importer.import_network(network_file, template_id, project_id, network_name=network_name,
+                                     stream=stream, chunked=chunked, resume=resume, skip_rules=skip_rules,
+                                     scenarios=list(scenario) if len(scenario) > 0 else None,
+                                     dry_run=dry_run)
+
+    if dry_run is True and len(json_importer.problems) > 0:
+        sys.exit(1)
+    report_rule_errors(json_importer.rule_errors)
+
+@hydra_app(category='import')
+@cli.command(name='validate',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-f', '--network-file', required=True, help='''Path to the network file''')
+@click.option('-t', '--template-id', required=True, type=int, help='''ID of the template that matches the network''')
+@click.option('--user-id', type=int, default=None)
+@click.option('--stream', is_flag=True, default=False, help='''Read the file incrementally (reduces memory use on large networks)''')
+@click.option('--scenario', multiple=True, type=str, help='''Check only this scenario, by ID or name. Can be given more than once.''')
+def validate(obj, network_file, template_id, user_id=None, stream=False, scenario=()):
+    """
+        Check that a network file can be imported with a template, and list
+        every problem found. Nothing is written to the server.
+    """
+
+    from hydra_json.importer import ImportJSON
 
     client = get_logged_in_client(obj, user_id=user_id)
 
-    json_importer = ImportJSON(client)
+    json_importer = ImportJSON(client, cache=get_cache(obj))
+    problems = json_importer.validate_network(network_file, template_id, stream=stream,
+                                              scenarios=list(scenario) if len(scenario) > 0 else None)
 
-    json_importer.import_network(network_file, template_id, project_id, network_name=network_name)
+    for warning in json_importer.warnings:
+        click.echo(f"Warning: {warning}", err=True)
+    for problem in problems:
+        click.echo(problem, err=True)
+    if len(problems) > 0:
+        click.echo(f"{network_file}: can't be imported", err=True)
+        sys.exit(1)
+    click.echo(f"{network_file}: no problems found")
+
+def report_rule_errors(rule_errors):
+    """
+        List the rules which could not be added, and exit with an error if there are any
+    """
+    for error in rule_errors:
+        click.echo(f"Rule {error['index']} ({error['name']}): FAILED {error['error']}", err=True)
+    if len(rule_errors) > 0:
+        sys.exit(1)
+
+@hydra_app(category='import')
+@cli.command(name='import-batch',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-f', '--network-files', required=True, help='''A directory, glob pattern (quoted) or zip archive of network files''')
+@click.option('-t', '--template-id', required=True, type=int, help='''ID of the template that matches the networks''')
+@click.option('-p', '--project-id', required=True, type=int, help='''ID of the project to place the networks''')
+@click.option('--user-id', type=int, default=None)
+@click.option('--chunked', is_flag=True, default=False, help='''Create each network first, then send the scenario data in batches (avoids request size limits)''')
+@click.option('--chunk-size', type=int, default=DATA_CHUNK_SIZE // (1024 * 1024), help='''Approximate size of each batch of scenario data, in MB, with --chunked''')
+@click.option('--skip-rules', is_flag=True, default=False, help='''Don't add the networks' rules''')
+@click.option('-w', '--workers', type=int, default=DEFAULT_WORKERS, help='''Number of networks to send to the server at the same time''')
+def import_batch(obj, network_files, template_id, project_id, user_id=None, chunked=False, chunk_size=None, skip_rules=False, workers=DEFAULT_WORKERS):
+    """
+        Import several network files, with one login.
+    """
+
+    from hydra_json import batch
+
+    client = get_logged_in_client(obj, user_id=user_id)
+
+    results = batch.import_networks(client, batch.find_network_files(network_files), template_id, project_id,
+                                    cache=get_cache(obj), max_workers=workers,
+                                    chunked=chunked, skip_rules=skip_rules,
+                                    data_chunk_size=chunk_size * 1024 * 1024)
+
+    for result in results:
+        if result['error'] is None:
+            click.echo(f"{result['network_file']}: network {result['network_id']} ({result['time']:.1f}s)")
+        else:
+            click.echo(f"{result['network_file']}: FAILED ({result['time']:.1f}s) {result['error']}", err=True)
+        for error in result['rule_errors']:
+            click.echo(f"{result['network_file']}: rule {error['index']} ({error['name']}): FAILED {error['error']}", err=True)
+
+    if any(r['error'] is not None or len(r['rule_errors']) > 0 for r in results):
+        sys.exit(1)
+
+@hydra_app(category='import')
+@cli.command(name='import-rules',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-f', '--network-file', required=True, help='''Path to the network file containing the rules''')
+@click.option('-n', '--network-id', required=True, type=int, help='''ID of the network to add the rules to''')
+@click.option('--user-id', type=int, default=None)
+@click.option('--rule-workers', type=int, default=RULE_WORKERS, help='''Number of rules to add at the same time''')
+def import_rules(obj, network_file, network_id, user_id=None, rule_workers=RULE_WORKERS):
+    """
+        Add the rules in a network file to a network imported with --skip-rules
+    """
+
+    from hydra_json.importer import ImportJSON
+
+    client = get_logged_in_client(obj, user_id=user_id)
+
+    json_importer = ImportJSON(client, cache=get_cache(obj))
+    json_importer.rule_workers = rule_workers
+
+    report_rule_errors(json_importer.import_rules(network_file, network_id))
+
+@hydra_app(category='import')
+@cli.command(name='apply-delta',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-f', '--delta-file', required=True, help='''Path to the delta file, written by export --delta-from''')
+@click.option('-n', '--network-id', required=True, type=int, help='''ID of the network to apply the delta to''')
+@click.option('--user-id', type=int, default=None)
+@click.option('--chunk-size', type=int, default=DATA_CHUNK_SIZE // (1024 * 1024), help='''Approximate size of each batch of scenario data, in MB''')
+@click.option('--report', type=str, default=None, help='''Write the time, memory and server calls of each phase to this JSON file ('-' for stderr)''')
+def apply_delta(obj, delta_file, network_id, user_id=None, chunk_size=None, report=None):
+    """
+        Apply the changes in a delta file to an existing network
+    """
+
+    from hydra_json.importer import ImportJSON
+
+    client = get_logged_in_client(obj, user_id=user_id)
+
+    with instrumented(report) as instrumentation:
+        json_importer = ImportJSON(client, cache=get_cache(obj), instrumentation=instrumentation)
+        json_importer.data_chunk_size = chunk_size * 1024 * 1024
+
+        json_importer.apply_delta(delta_file, network_id)
+
+@hydra_app(category='import')
+@cli.command(name='copy',
+             context_settings=dict(
+             ignore_unknown_options=True,
+             allow_extra_args=True))
+@click.pass_obj
+@click.option('-n', '--network-id', required=True, type=int, help='''ID of the network to copy''')
+@click.option('-s', '--scenario-id', required=False, default=None, type=int, help='''Copy only this scenario''')
+@click.option('-t', '--template-id', required=True, type=int, help='''ID of the template on the target server that matches the network''')
+@click.option('-p', '--project-id', required=True, type=int, help='''ID of the project on the target server to place the network''')
+@click.option('--network-name', required=False, type=str, help='''Optional network name, rather than using the one on the source server''')
+@click.option('--target-hostname', required=True, type=str, help='''URL of the server to copy the network to''')
+@click.option('--target-username', type=str, default=None)
+@click.option('--target-password', type=str, default=None)
+@click.option('--target-session', type=str, default=None)
+@click.option('--user-id', type=int, default=None)
+@click.option('--exclude-results', is_flag=True, default=False, help='''Don't copy the results''')
+@click.option('--chunk-size', type=int, default=DATA_CHUNK_SIZE // (1024 * 1024), help='''Approximate size of each batch of scenario data, in MB''')
+@click.option('--report', type=str, default=None, help='''Write the time, memory and server calls of each phase to this JSON file ('-' for stderr)''')
+def copy(obj, network_id, scenario_id, template_id, project_id, network_name, target_hostname, target_username, target_password, target_session, user_id, exclude_results, chunk_size, report):
+    """
+        Copy a network from this server to another, without an intermediate file
+    """
+
+    from hydra_json.transfer import copy_network
+
+    source_client = get_logged_in_client(obj, user_id=user_id)
+
+    target = dict(obj, hostname=target_hostname, username=target_username,
+                  password=target_password, session=target_session)
+    target_client = get_logged_in_client(target)
+
+    with instrumented(report) as instrumentation:
+        copy_network(source_client, target_client, network_id, template_id, project_id,
+                     network_name=network_name, scenario_id=scenario_id,
+                     include_results=not exclude_results,
+                     source_cache=get_cache(obj), target_cache=get_cache(target),
+                     instrumentation=instrumentation, data_chunk_size=chunk_size * 1024 * 1024)
 
 @hydra_app(category='import_template')
 @cli.command(name='import-template',
@@ -102,9 +449,11 @@ def import_template(obj, template_file, user_id):
         Import a template JSON file
     """
 
+    from hydra_json.importer import ImportJSON
+
     client = get_logged_in_client(obj, user_id=user_id)
 
-    json_importer = ImportJSON(client)
+    json_importer = ImportJSON(client, cache=get_cache(obj))
 
     json_importer.import_template(template_file)
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Columnar storage of large numeric dataset values (timeseries, dataframes
+    and arrays) in a zipped export.
+
+    Such a value is a JSON string inside the JSON document, so it is encoded
+    twice and parsed twice. In a columnar export its numbers are instead
+    written to binary .npy blocks in the zip, under _columns/, and the
+    dataset's 'value' is replaced by a 'value_columns' reference to them.
+    The index labels of dataframes and timeseries, which are usually shared
+    by many datasets, are written once, in the file's 'columnar' table.
+
+    A value is only stored this way if the original string can be rebuilt
+    from the columns exactly; anything else stays in the document as it is.
+"""
+import io
+import os
+import json
+import shutil
+import logging
+import tempfile
+import collections
+
+from hydra_client import HydraClientError
+
+from . import reader
+
+#Imported by check_numpy, so that it is only loaded once columnar datasets are used
+numpy = None
+
+log = logging.getLogger(__name__)
+
+#The dataset types whose values may be stored in columns
+COLUMNAR_TYPES = ('timeseries', 'dataframe', 'array')
+
+#Values shorter than this are left in the document
+MIN_VALUE_SIZE = 1024
+
+#The approximate size of each .npy block
+BLOCK_SIZE = 32 * 1024 * 1024
+
+#The directory in the zip holding the blocks. The underscore keeps it from
+#being taken for the network file.
+COLUMNS_DIR = '_columns'
+
+#The JSON separators a value may have been written with
+SEPARATORS = ((',', ':'), (', ', ': '))
+
+def check_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise HydraClientError("Columnar datasets require the 'numpy' package.")
+
+class ColumnWriter:
+    """
+        Moves the values of datasets into .npy blocks, which are held in a
+        temporary directory until they are added to the zip with write_to.
+    """
+
+    def __init__(self, min_value_size=MIN_VALUE_SIZE, block_size=BLOCK_SIZE):
+        check_numpy()
+        self.min_value_size = min_value_size
+        self.block_size = block_size
+        self.tmp_dir = tempfile.mkdtemp(prefix='hydra-json-columns-')
+
+        #Written to the file as its 'columnar' table
+        self.table = {'format': 'npy', 'blocks': [], 'indexes': {}}
+        #A lookup from an index, as a tuple, to its key in the table
+        self.index_keys = {}
+
+        self.parts = []
+        self.part_size = 0
+
+    def compact(self, dataset):
+        """
+            Move the value of a dataset into the current block, if it is
+            large enough and can be rebuilt exactly.
+            returns:
+                True if the value was moved
+        """
+        value = dataset.get('value')
+        if dataset.get('type') not in COLUMNAR_TYPES or not isinstance(value, str):
+            return False
+        if len(value) < self.min_value_size:
+            return False
+
+        encoded = encode_value(value)
+        if encoded is None:
+            return False
+        array, ref, index = encoded
+
+        if index is not None:
+            index_key = self.index_keys.get(tuple(index))
+            if index_key is None:
+                index_key = str(len(self.index_keys))
+                self.index_keys[tuple(index)] = index_key
+                self.table['indexes'][index_key] = index
+            ref['index'] = index_key
+
+        ref['block'] = len(self.table['blocks'])
+        ref['offset'] = self.part_size
+        self.parts.append(array.ravel())
+        self.part_size += array.size
+        if self.part_size * array.itemsize >= self.block_size:
+            self.flush()
+
+        dataset.pop('value')
+        dataset.value_columns = ref
+        return True
+
+    def flush(self):
+        """
+            Write the current block to the temporary directory
+        """
+        if len(self.parts) == 0:
+            return
+        name = '%s/%s.npy' % (COLUMNS_DIR, len(self.table['blocks']))
+        numpy.save(os.path.join(self.tmp_dir, os.path.basename(name)), numpy.concatenate(self.parts))
+        self.table['blocks'].append(name)
+        self.parts = []
+        self.part_size = 0
+
+    def write_to(self, zip_file):
+        """
+            Add the blocks to a zip file
+        """
+        self.flush()
+        for name in self.table['blocks']:
+            zip_file.write(os.path.join(self.tmp_dir, os.path.basename(name)), name)
+
+    def close(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+class ColumnReader:
+    """
+        Rebuilds the values of datasets stored in columns, from the blocks in
+        a network file. The most recently used blocks are kept in memory, as
+        datasets are generally read in the order they were written.
+    """
+
+    def __init__(self, network, table, cached_blocks=2):
+        check_numpy()
+        if table.get('format') != 'npy':
+            raise HydraClientError(f"Unknown columnar format {table.get('format')}")
+        self.network = network
+        self.table = table
+        self.cached_blocks = cached_blocks
+        self.blocks = collections.OrderedDict()
+
+    def get_block(self, block):
+        if block in self.blocks:
+            self.blocks.move_to_end(block)
+            return self.blocks[block]
+        with reader.open_network(self.network, member=self.table['blocks'][block]) as block_file:
+            array = numpy.load(io.BytesIO(block_file.read()))
+        self.blocks[block] = array
+        if len(self.blocks) > self.cached_blocks:
+            self.blocks.popitem(last=False)
+        return array
+
+    def restore(self, dataset):
+        """
+            Put back the value of a dataset stored in columns, if it is
+        """
+        ref = dataset.get('value_columns')
+        if ref is None:
+            return
+        block = self.get_block(ref['block'])
+        size = 1
+        for dim in ref['shape']:
+            size *= dim
+        array = block[ref['offset']:ref['offset'] + size].reshape(ref['shape'])
+        index = self.table['indexes'][ref['index']] if 'index' in ref else None
+        dataset.value = build_value(array, ref, index)
+        dataset.pop('value_columns')
+
+def encode_value(value):
+    """
+        Turn a JSON value string into an array of its numbers.
+        returns:
+            (array, reference, index), or None if the value is not a
+            rectangular array of numbers, or can't be rebuilt exactly.
+            index is the list of row labels of a dataframe or timeseries.
+    """
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return None
+
+    index = None
+    ref = {}
+    if isinstance(parsed, list):
+        ref['layout'] = 'array'
+        rows = parsed
+    elif isinstance(parsed, dict) and len(parsed) > 0 \
+            and all(isinstance(c, dict) for c in parsed.values()):
+        ref['layout'] = 'frame'
+        ref['columns'] = list(parsed)
+        index = list(next(iter(parsed.values())))
+        rows = []
+        for column in parsed.values():
+            if list(column) != index:
+                return None
+            rows.append(list(column.values()))
+    else:
+        return None
+
+    try:
+        array = numpy.array(rows)
+    except ValueError:
+        return None
+    if array.dtype.kind not in 'if' or array.ndim not in (1, 2) or array.size == 0:
+        return None
+
+    ref['ints'] = array.dtype.kind == 'i'
+    array = array.astype('<f8')
+    ref['shape'] = list(array.shape)
+
+    for separators in SEPARATORS:
+        ref['separators'] = list(separators)
+        if build_value(array, ref, index) == value:
+            return array, ref, index
+    return None
+
+def build_value(array, ref, index):
+    """
+        The JSON value string of an array stored in columns
+    """
+    values = array.tolist()
+    if ref['ints'] is True:
+        if array.ndim == 1:
+            values = [int(v) for v in values]
+        else:
+            values = [[int(v) for v in row] for row in values]
+
+    if ref['layout'] == 'frame':
+        parsed = {column: dict(zip(index, row)) for column, row in zip(ref['columns'], values)}
+    else:
+        parsed = values
+
+    return json.dumps(parsed, separators=tuple(ref['separators']))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    The codecs a network file can be compressed with.
+
+    'deflate' writes a zip archive, as a zipped export always has. The
+    others write the JSON document as a single compressed stream, e.g.
+    Network.json.gz, which can also be read by the usual command line tools.
+    An export which needs an archive (sharded or columnar) can use 'bz2' or
+    'lzma' as the compression method of the archive's members instead.
+
+    All of them compress as the file is written, and a file's codec is
+    recognised from its first bytes when it is read, whatever its name.
+"""
+import bz2
+import gzip
+import lzma
+import zipfile
+import contextlib
+
+from hydra_client import HydraClientError
+
+from .defaults import CODECS, DEFAULT_CODEC
+
+#Imported by check_zstd, so that it is only loaded if it is used
+zstandard = None
+
+#The extension of the file written with each codec
+EXTENSIONS = {'deflate': 'zip',
+              'gzip': 'json.gz',
+              'bz2': 'json.bz2',
+              'lzma': 'json.xz',
+              'zstd': 'json.zst'}
+
+#The range of levels of each codec, and the level used if none is given
+LEVELS = {'deflate': (0, 9, 6),
+          'gzip': (0, 9, 6),
+          'bz2': (1, 9, 9),
+          'lzma': (0, 9, 6),
+          'zstd': (1, 22, 3)}
+
+#The compression method of the members of an archive for each codec which has one
+ZIP_METHODS = {'deflate': zipfile.ZIP_DEFLATED,
+               'bz2': zipfile.ZIP_BZIP2,
+               'lzma': zipfile.ZIP_LZMA}
+
+#The first bytes of a file written with each codec. 'zip' covers all the archives.
+MAGIC_BYTES = (('zip', b'PK\x03\x04'),
+               ('gzip', b'\x1f\x8b'),
+               ('bz2', b'BZh'),
+               ('lzma', b'\xfd7zXZ\x00'),
+               ('zstd', b'\x28\xb5\x2f\xfd'))
+
+def check_zstd():
+    global zstandard
+    if zstandard is None:
+        try:
+            import zstandard
+        except ImportError:
+            raise HydraClientError("zstd compression requires the 'zstandard' package.")
+
+def check_codec(codec, level=None, archive=False):
+    """
+        Raise an error if the codec is unknown or unavailable, or the level
+        is out of its range.
+        args:
+            archive (bool): The codec is to be used in a zip archive
+        returns:
+            The level to use
+    """
+    if codec not in CODECS:
+        raise HydraClientError("Unknown compression %s. Use one of %s" % (codec, ', '.join(CODECS)))
+    if archive is True and codec not in ZIP_METHODS:
+        raise HydraClientError("%s can't be used in a zip archive. Use one of %s"
+                               % (codec, ', '.join(ZIP_METHODS)))
+    if codec == 'zstd':
+        check_zstd()
+
+    min_level, max_level, default_level = LEVELS[codec]
+    if level is None:
+        return default_level
+    if level < min_level or level > max_level:
+        raise HydraClientError("The %s compression level must be from %s to %s"
+                               % (codec, min_level, max_level))
+    return level
+
+def detect_codec(path):
+    """
+        Recognise the codec of a file from its first bytes.
+        returns:
+            'zip' for a zip archive, the codec of a compressed stream, or None
+            if the file is not compressed
+    """
+    with open(path, 'rb') as f:
+        start = f.read(8)
+    for codec, magic in MAGIC_BYTES:
+        if start.startswith(magic):
+            return codec
+    return None
+
+def open_archive(location, codec=DEFAULT_CODEC, level=None):
+    """
+        Open a zip archive for writing, whose members are compressed with the codec
+    """
+    level = check_codec(codec, level, archive=True)
+    #lzma has no levels in a zip archive
+    return zipfile.ZipFile(location, 'w', compression=ZIP_METHODS[codec],
+                           compresslevel=None if codec == 'lzma' else level)
+
+@contextlib.contextmanager
+def open_writer(location, codec, level=None):
+    """
+        Open a binary stream which compresses what is written to it into
+        a file, with a codec other than deflate.
+    """
+    level = check_codec(codec, level)
+    if codec == 'gzip':
+        stream = gzip.open(location, 'wb', compresslevel=level)
+    elif codec == 'bz2':
+        stream = bz2.open(location, 'wb', compresslevel=level)
+    elif codec == 'lzma':
+        stream = lzma.open(location, 'wb', preset=level)
+    elif codec == 'zstd':
+        stream = zstandard.ZstdCompressor(level=level).stream_writer(open(location, 'wb'))
+    else:
+        raise HydraClientError("%s compression writes a zip archive" % codec)
+
+    with stream:
+        yield stream
+
+@contextlib.contextmanager
+def open_reader(path, codec):
+    """
+        Open a binary stream of the decompressed contents of a file written
+        with a codec other than deflate, as returned by detect_codec.
+    """
+    if codec == 'gzip':
+        stream = gzip.open(path, 'rb')
+    elif codec == 'bz2':
+        stream = bz2.open(path, 'rb')
+    elif codec == 'lzma':
+        stream = lzma.open(path, 'rb')
+    elif codec == 'zstd':
+        check_zstd()
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    else:
+        raise HydraClientError("Unable to read %s: unknown compression %s" % (path, codec))
+
+    with stream:
+        yield stream
+
+def strip_extension(name):
+    """
+        The name of a file without the extension of its codec's compressed stream
+    """
+    for codec, extension in EXTENSIONS.items():
+        if codec != 'deflate' and name.endswith('.' + extension):
+            return name[:-len(extension) + len('json')]
+    return name
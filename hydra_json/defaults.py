@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Default settings, which the CLI shows in its options. This module must
+    not import anything, so the CLI can load without the modules which use them.
+"""
+
+#The number of networks exported at once by batch.export_networks
+DEFAULT_WORKERS = 4
+
+#The number of scenarios fetched at once in a sharded export
+DEFAULT_SCENARIO_WORKERS = 4
+
+#The approximate size, in bytes, of each batch of resource scenarios sent in a chunked import
+DATA_CHUNK_SIZE = 8 * 1024 * 1024
+
+#The number of rules sent to the server at the same time
+RULE_WORKERS = 4
+
+#The lifetime of cached reference data, in seconds. One day.
+DEFAULT_TTL = 24 * 60 * 60
+
+#The codecs a zipped export can be compressed with (see compression.py)
+CODECS = ('deflate', 'gzip', 'bz2', 'lzma', 'zstd')
+DEFAULT_CODEC = 'deflate'
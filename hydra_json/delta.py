@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Incremental (delta) exports.
+
+    A summary of an export records, for each node, link and group, its name
+    and a hash of its properties; the resource and attribute of each
+    resource attribute; and the hash of the dataset of each resource
+    scenario. It is small compared to the export, and can be written
+    alongside it or built from the export file later.
+
+    A delta is the difference between a network and a summary of a previous
+    export of it: the nodes, links and groups which were added, removed or
+    changed, the resource attributes added or removed, and the resource
+    scenarios whose dataset was added, removed or changed, per scenario.
+    Resources and datasets are matched on their IDs in the source network
+    and compared by hash, so the delta holds only what changed.
+
+    When a delta is applied to another network, resources and scenarios are
+    matched by name, as in a chunked import. Resource attributes are referred
+    to as [ref_key, resource name, attr_id] for the same reason, with
+    attr_id the negative ID in the delta's attribute table.
+"""
+import json
+import hashlib
+import logging
+
+from hydra_client import HydraClientError
+
+from . import reader
+from .records import encode_record
+
+log = logging.getLogger(__name__)
+
+SUMMARY_FORMAT = 'summary'
+DELTA_FORMAT = 'delta'
+
+#The ref key and network collection of each type of resource
+RESOURCE_COLLECTIONS = (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups'))
+
+#Properties which do not make a resource or dataset different
+IGNORED_PROPERTIES = ('attributes', 'cr_date', 'updated_at', 'updated_by', 'created_by', 'hash')
+
+def make_hash(value):
+    """
+        A hash of a JSON value, independent of the order of its keys
+    """
+    encoded = json.dumps(value, sort_keys=True, default=encode_record)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+def resource_hash(resource):
+    """
+        A hash of the properties of a node, link or group, excluding its attributes
+    """
+    return make_hash({k: v for k, v in resource.items() if k not in IGNORED_PROPERTIES})
+
+def dataset_hash(rs, datasets=None):
+    """
+        The hash of the dataset of a resource scenario: the server's hash of
+        it if the export has one, otherwise a hash of its contents.
+    """
+    if rs.get('dataset_key') is not None:
+        #The key of the dataset table is the dataset's hash
+        return str(rs['dataset_key'])
+    dataset = rs['dataset']
+    if dataset.get('hash') is not None:
+        return str(dataset['hash'])
+    return make_hash({k: v for k, v in dataset.items() if k not in IGNORED_PROPERTIES and k != 'id'})
+
+def summarise(export_data):
+    """
+        Summarise an export, as returned by reader.load_network or built
+        by ExportJSON, including the data of its scenarios.
+    """
+    network = export_data['network']
+    summary = {'format': SUMMARY_FORMAT,
+               'network_id': network['id'],
+               'network_name': network['name'],
+               'attributes': {str(k): v for k, v in export_data.get('attributes', {}).items()},
+               'resources': {},
+               'resource_attributes': {},
+               'scenarios': {}}
+
+    resource_attributes = summary['resource_attributes']
+    for ra in network.get('attributes') or []:
+        resource_attributes[str(ra['id'])] = ['NETWORK', None, ra['attr_id']]
+
+    for ref_key, collection in RESOURCE_COLLECTIONS:
+        resources = summary['resources'][ref_key] = {}
+        for resource in network.get(collection) or []:
+            resources[str(resource['id'])] = [resource['name'], resource_hash(resource)]
+            for ra in resource.get('attributes') or []:
+                resource_attributes[str(ra['id'])] = [ref_key, resource['id'], ra['attr_id']]
+
+    for scenario in network.get('scenarios') or []:
+        data = {}
+        for rs in scenario.get('resourcescenarios') or []:
+            data[str(rs['resource_attr_id'])] = dataset_hash(rs)
+        summary['scenarios'][str(scenario['id'])] = {'name': scenario['name'], 'data': data}
+
+    return summary
+
+def load_summary(path):
+    """
+        Read a summary file, or summarise a previous export file
+    """
+    json_data = reader.load_network(path)
+    if json_data.get('format') == SUMMARY_FORMAT:
+        return json_data
+    if json_data.get('format') == DELTA_FORMAT:
+        raise HydraClientError(f"{path} is a delta. A delta must be taken from a full export or its summary.")
+    return summarise(json_data)
+
+def diff(previous, export_data, current=None):
+    """
+        The delta between the summary of a previous export and a new export.
+        args:
+            previous (dict): The summary of the previous export
+            export_data (dict): The new export, with its scenario data and no dataset table
+            current (dict): The summary of the new export, if it has already been made
+        returns:
+            The delta, as a dict to be written in place of the export
+    """
+    if current is None:
+        current = summarise(export_data)
+    if str(previous['network_id']) != str(current['network_id']):
+        log.warning("The previous export is of network %s, not %s",
+                    previous['network_id'], current['network_id'])
+
+    network = export_data['network']
+
+    delta = {'format': DELTA_FORMAT,
+             'network_id': current['network_id'],
+             'network_name': current['network_name'],
+             'attributes': {},
+             'resources': {},
+             'node_names': {},
+             'resource_attributes': {'added': [], 'removed': []},
+             'ra_refs': {},
+             'scenarios': {'added': [], 'updated': [], 'removed': []}}
+
+    #The name of each resource, by ref key and ID, in the new export or if it was removed, the old one
+    names = {}
+    for ref_key, _ in RESOURCE_COLLECTIONS:
+        names[ref_key] = {k: v[0] for k, v in previous['resources'].get(ref_key, {}).items()}
+        names[ref_key].update({k: v[0] for k, v in current['resources'][ref_key].items()})
+
+    #The IDs of the resources which were added or removed, whose attributes and data go with them
+    added = set()
+    removed = set()
+
+    for ref_key, collection in RESOURCE_COLLECTIONS:
+        old_resources = previous['resources'].get(ref_key, {})
+        new_resources = current['resources'][ref_key]
+        changes = delta['resources'][ref_key] = {'added': [], 'updated': [], 'removed': []}
+
+        for resource in network.get(collection) or []:
+            resource_id = str(resource['id'])
+            old_resource = old_resources.get(resource_id)
+            if old_resource is None:
+                changes['added'].append(resource)
+                added.add((ref_key, resource_id))
+            elif old_resource[1] != new_resources[resource_id][1]:
+                #Matched on its old name, in case it was renamed
+                changes['updated'].append({'name': old_resource[0],
+                                           'resource': {k: v for k, v in resource.items() if k != 'attributes'}})
+
+        for resource_id, (name, _) in old_resources.items():
+            if resource_id not in new_resources:
+                changes['removed'].append({'id': int(resource_id), 'name': name})
+                removed.add((ref_key, resource_id))
+
+    for change in ('added', 'updated'):
+        for link in delta['resources']['LINK'][change]:
+            if change == 'updated':
+                link = link['resource']
+            for node_id in (link['node_1_id'], link['node_2_id']):
+                delta['node_names'][str(node_id)] = names['NODE'][str(node_id)]
+
+    def ra_ref(ra_entry):
+        ref_key, resource_id, attr_id = ra_entry
+        name = None if ref_key == 'NETWORK' else names[ref_key][str(resource_id)]
+        return [ref_key, name, attr_id]
+
+    old_ras = previous['resource_attributes']
+    new_ras = current['resource_attributes']
+
+    #The attributes of the resource attributes of new resources are in the resources themselves
+    attr_ids = set()
+    for ref_key, _ in RESOURCE_COLLECTIONS:
+        for resource in delta['resources'][ref_key]['added']:
+            attr_ids.update(ra['attr_id'] for ra in resource.get('attributes') or [])
+
+    ras_j = {}
+    for ra in network.get('attributes') or []:
+        ras_j[str(ra['id'])] = ra
+    for ref_key, collection in RESOURCE_COLLECTIONS:
+        for resource in network.get(collection) or []:
+            for ra in resource.get('attributes') or []:
+                ras_j[str(ra['id'])] = ra
+
+    for ra_id, ra_entry in new_ras.items():
+        if ra_id in old_ras or (ra_entry[0], str(ra_entry[1])) in added:
+            continue
+        delta['resource_attributes']['added'].append({'ref': ra_ref(ra_entry),
+                                                      'attr_is_var': ras_j[ra_id].get('attr_is_var')})
+        attr_ids.add(ra_entry[2])
+
+    for ra_id, ra_entry in old_ras.items():
+        if ra_id in new_ras or (ra_entry[0], str(ra_entry[1])) in removed:
+            continue
+        delta['resource_attributes']['removed'].append({'ref': ra_ref(ra_entry)})
+        attr_ids.add(ra_entry[2])
+
+    for scenario in network.get('scenarios') or []:
+        scenario_id = str(scenario['id'])
+        old_scenario = previous['scenarios'].get(scenario_id)
+        new_data = current['scenarios'][scenario_id]['data']
+
+        if old_scenario is None:
+            changed = list(scenario.get('resourcescenarios') or [])
+            removed_data = []
+        else:
+            old_data = old_scenario['data']
+            changed = [rs for rs in scenario.get('resourcescenarios') or []
+                       if old_data.get(str(rs['resource_attr_id'])) != new_data[str(rs['resource_attr_id'])]]
+            #Data whose resource attribute was removed goes with it
+            removed_data = [ra_id for ra_id in old_data if ra_id not in new_data and ra_id in new_ras]
+
+        for rs in changed:
+            ra_entry = new_ras[str(rs['resource_attr_id'])]
+            delta['ra_refs'][str(rs['resource_attr_id'])] = ra_ref(ra_entry)
+            attr_ids.add(ra_entry[2])
+
+        if old_scenario is None:
+            scenario_j = {k: v for k, v in scenario.items() if k not in ('resourcescenarios', 'resourcegroupitems')}
+            scenario_j['resourcescenarios'] = changed
+            delta['scenarios']['added'].append(scenario_j)
+        elif len(changed) > 0 or len(removed_data) > 0:
+            delta['scenarios']['updated'].append({'id': scenario['id'],
+                                                  'name': old_scenario['name'],
+                                                  'resourcescenarios': changed,
+                                                  'removed': [ra_ref(new_ras[ra_id]) for ra_id in removed_data]})
+
+    for scenario_id, old_scenario in previous['scenarios'].items():
+        if scenario_id not in current['scenarios']:
+            delta['scenarios']['removed'].append({'id': int(scenario_id), 'name': old_scenario['name']})
+
+    for attr_id in attr_ids:
+        attr_key = str(attr_id)
+        delta['attributes'][attr_key] = current['attributes'].get(attr_key, previous['attributes'].get(attr_key))
+
+    return delta
+
+def count_changes(delta):
+    """
+        The number of changes of each kind in a delta, for reporting
+    """
+    counts = {}
+    for ref_key, changes in delta['resources'].items():
+        for change, resources in changes.items():
+            counts['%s %s' % (ref_key.lower(), change)] = len(resources)
+    for change, ras in delta['resource_attributes'].items():
+        counts['resource attributes %s' % change] = len(ras)
+    for change, scenarios in delta['scenarios'].items():
+        counts['scenarios %s' % change] = len(scenarios)
+    counts['resource scenarios'] = sum(len(s['resourcescenarios']) for s in
+                                       delta['scenarios']['added'] + delta['scenarios']['updated'])
+    counts['resource scenarios removed'] = sum(len(s['removed']) for s in delta['scenarios']['updated'])
+    return counts
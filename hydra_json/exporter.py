@@ -48,26 +48,45 @@ Option                 Short  Parameter    Description
 
 """
 import os
+import io
 import json
 import tempfile
 import time
 import re
 import logging
-import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from hydra_client import HydraClientError
 from hydra_client.objects import ExtendedDict
 
+from .writer import JSONStreamWriter, IndexedJSONStreamWriter, STREAMED, SHARD_STREAMED
+from .index import INDEX_MEMBER, INDEX_SUFFIX
+from .reader import SHARDED_NETWORK_FILE, SHARDED_MANIFEST_FILE
+from .cache import get_cached
+from .records import ResourceAttribute, ResourceScenario, ResourceGroupItem, Dataset
+from .columnar import ColumnWriter
+from .compression import DEFAULT_CODEC, EXTENSIONS, check_codec, open_archive, open_writer
+from . import delta
+from .instrument import phase
+from .defaults import DEFAULT_SCENARIO_WORKERS
+
 from hydra_client.output import write_progress,\
                                write_output
 
 
 LOG = logging.getLogger(__name__)
 
+#The format version of files in which datasets are written once, in a
+#top-level table, and referred to from the resource scenarios by key.
+DATASET_TABLE_FORMAT = 2
+
 class ExportJSON:
     """
        Exporter of Hydra networks to JSON or XML files.
     """
 
-    def __init__(self, client):
+    def __init__(self, client, cache=None, dimension_lookup=None, template_lookup=None,
+                 instrumentation=None):
 
         #Record the names of the files created by the plugin so we can
         #display them to the user.
@@ -75,12 +94,49 @@ class ExportJSON:
 
         self.client = client
 
+        #An optional ReferenceCache of templates and dimensions
+        self.cache = cache
+
+        #An optional Instrumentation, recording the time and client calls of each phase
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            self.client = instrumentation.wrap(client)
+
         self.num_steps = 3
 
         #A lookup from attr_id to attribute object
         self.attr_dict = {}
 
-        self.dimension_lookup = {}
+        #A lookup from dataset hash to dataset, when datasets are deduplicated
+        self.datasets = {}
+        #Held while a dataset is added to a dataset table, which the scenarios
+        #of a sharded export share while they are fetched concurrently
+        self.datasets_lock = threading.Lock()
+
+        #A ColumnWriter, in a columnar export
+        self.columns = None
+
+        #An ExportFilter, if only part of the network is exported
+        self.filters = None
+
+        #A lookup from dimension ID to dimension. This can be passed in
+        #when exporting several networks, to avoid fetching it each time.
+        self.dimension_lookup = {} if dimension_lookup is None else dimension_lookup
+
+        #A lookup from template ID to the template as JSON, which can be shared in the same way
+        self.template_lookup = {} if template_lookup is None else template_lookup
+
+    def load_dimensions(self):
+        """
+            Fill the dimension lookup with a single request, rather than
+            fetching dimensions one at a time as they are found on the attributes.
+        """
+        if len(self.dimension_lookup) > 0:
+            return
+
+        dimensions = get_cached(self.cache, 'dimensions', 'all', self.client.get_dimensions)
+        for dimension in dimensions:
+            self.dimension_lookup[dimension.id] = dimension
 
     def get_dimension_name(self, dimension_id):
         """
@@ -90,7 +146,8 @@ class ExportJSON:
             return None
         dimension = self.dimension_lookup.get(dimension_id)
         if dimension is None:
-            dimension = self.client.get_dimension(dimension_id)
+            dimension = get_cached(self.cache, 'dimension', dimension_id,
+                                   lambda: self.client.get_dimension(dimension_id))
             self.dimension_lookup[dimension.id] = dimension
 
         return dimension.name
@@ -101,7 +158,7 @@ class ExportJSON:
             For a given resource, extract the attributes from it.
         """
         #why is this not already a JSON Objject??
-        resource.attributes = [ExtendedDict(a) for a in resource.attributes]
+        resource.attributes = [ResourceAttribute(a) for a in resource.attributes]
         for res_attr in resource.attributes:
             res_attr.id = res_attr.id * -1
             res_attr.attr_id = res_attr.attr_id * -1
@@ -111,7 +168,11 @@ class ExportJSON:
 
 
     def export_network(self, network_id, scenario_id=None, target_dir=None,
-                       newlines=False, zipped=False, include_results=True):
+                       newlines=False, zipped=False, include_results=True,
+                       output=None, dedupe_datasets=False, sharded=False,
+                       max_workers=DEFAULT_SCENARIO_WORKERS, columnar=False,
+                       previous=None, summary=False, compression=DEFAULT_CODEC,
+                       compression_level=None, index=False, filters=None):
         """
             Export the network to a file. Requires a network ID. The
             other two are optional.
@@ -121,71 +182,194 @@ class ExportJSON:
 
             If this is None, export the file to the Desktop.
 
+            output: A text stream (e.g. sys.stdout) to write to instead of a file.
+
+            dedupe_datasets: Write each unique dataset once, in a top-level
+            'datasets' table keyed by its hash, and have each resource scenario
+            refer to it by 'dataset_key' (format version 2).
+
+            sharded: Write a zip containing the network without its scenario
+            data, one file per scenario, and a manifest listing them. The scenario
+            data is fetched and written on up to max_workers threads at a time.
+
+            columnar: Write the numbers of large timeseries, dataframe and array
+            values to binary .npy blocks in the zip rather than as JSON strings
+            in the document (requires numpy, and zipped or sharded).
+
+            previous: A previous export of the network, or its summary. Write
+            only what has changed since then, as a delta (see delta.py), to
+            <network name>_delta.json (or .zip). The whole network is still
+            fetched from the server, but the file is the size of the changes.
+
+            summary: Also write a summary of this export to <network name>_summary.json,
+            to be passed as `previous` to the next export.
+
+            compression: The codec of a zipped or sharded export: 'deflate' (a
+            zip archive), 'gzip', 'bz2', 'lzma' or 'zstd' (see compression.py).
+            Sharded and columnar exports are always zip archives, whose members
+            can be compressed with deflate, bz2 or lzma.
+
+            compression_level: The level of the codec, or None for its default.
+
+            index: Also write an index of where each section, scenario, and
+            resource's data in a scenario is in the file, so parts of it can be
+            read without loading it all (see index.py). It is a member of a
+            zip file, or <network name>_index.json beside any other.
+
+            filters: An ExportFilter, to export only some of the network's
+            attributes, resources or scenarios. The network is then fetched
+            without its data, and only the chosen scenarios' data is fetched.
+
+            Returns the location of the written file.
         """
 
+        if columnar is True and zipped is False and sharded is False:
+            raise HydraClientError("A columnar export must be zipped or sharded")
+
+        if index is True and (sharded is True or output is not None or previous is not None):
+            raise HydraClientError("Only a whole network written to a file can have an index")
+
+        if filters is not None and filters.is_empty():
+            filters = None
+        if filters is not None and (previous is not None or summary is True):
+            raise HydraClientError("A filtered export can't be a delta or have a summary")
+
+        if zipped is True or sharded is True:
+            compression_level = check_codec(compression, compression_level,
+                                            archive=sharded is True or columnar is True)
+
+        if previous is not None or summary is True:
+            if sharded is True:
+                raise HydraClientError("A sharded export can't be a delta or have a summary")
+        if previous is not None:
+            if dedupe_datasets is True or columnar is True:
+                raise HydraClientError("A delta can't have a dataset table or columnar datasets")
+            previous = delta.load_summary(previous)
+
         write_output("Retrieving Network")
         write_progress(2, self.num_steps)
 
-        client = self.client
-
-        if scenario_id is not None:
-            scenario_id = [scenario_id]
+        if columnar is True:
+            self.columns = ColumnWriter()
+        #The filter records the resources of the network, so each export has its own
+        self.filters = None if filters is None else filters.copy()
+        try:
+            return self.write_export(network_id, scenario_id=scenario_id, target_dir=target_dir,
+                                     newlines=newlines, zipped=zipped,
+                                     include_results=include_results, output=output,
+                                     dedupe_datasets=dedupe_datasets, sharded=sharded,
+                                     max_workers=max_workers, previous=previous,
+                                     summary=summary, compression=compression,
+                                     compression_level=compression_level, index=index)
+        finally:
+            if self.columns is not None:
+                self.columns.close()
+                self.columns = None
+            self.filters = None
+
+    def write_export(self, network_id, scenario_id=None, target_dir=None,
+                     newlines=False, zipped=False, include_results=True,
+                     output=None, dedupe_datasets=False, sharded=False,
+                     max_workers=DEFAULT_SCENARIO_WORKERS, previous=None, summary=False,
+                     compression=DEFAULT_CODEC, compression_level=None, index=False):
+        """
+            Fetch, update and write the network, as described in export_network.
+            previous is the summary of the previous export, if any.
+        """
 
-        network_j = client.get_network(network_id=network_id,
-                                       scenario_id=scenario_id,
-                                       include_maps=False,
-                                       include_data=True,
-                                       include_results=include_results)
+        output_data = self.get_export_data(network_id, scenario_id=scenario_id,
+                                           include_results=include_results,
+                                           dedupe_datasets=dedupe_datasets, sharded=sharded)
+        network_j = output_data['network']
+
+        network_name = network_j.name
+
+        if previous is not None or summary is True:
+            with phase(self.instrumentation, 'summarise'):
+                current = delta.summarise(output_data)
+            if summary is True:
+                self.write_summary(network_j.name, current, target_dir)
+
+        if previous is not None:
+            with phase(self.instrumentation, 'diff'):
+                output_data = delta.diff(previous, output_data, current=current)
+            network_name = network_j.name + '_delta'
+            LOG.info("Delta: %s", delta.count_changes(output_data))
+
+        with phase(self.instrumentation, 'write'):
+            if sharded is True:
+                location = self.write_sharded_network(network_j.name, output_data, target_dir,
+                                                      newlines=newlines,
+                                                      include_results=include_results,
+                                                      dedupe_datasets=dedupe_datasets,
+                                                      max_workers=max_workers,
+                                                      compression=compression,
+                                                      compression_level=compression_level)
+            else:
+                location = self.write_network(network_name, output_data, target_dir,
+                                              zipped=zipped, newlines=newlines, output=output,
+                                              compression=compression,
+                                              compression_level=compression_level,
+                                              index=index)
 
-        network_templates = []
+        LOG.info("File export complete.")
 
-        if network_j.types is not None and len(network_j.types) > 0:
-            template_id = network_j.types[0].template_id
+        return location
 
-            tmpl = client.get_template_as_json(template_id=template_id)
-            network_templates.append(tmpl)
+    def get_export_data(self, network_id, scenario_id=None, include_results=True,
+                        dedupe_datasets=False, sharded=False):
+        """
+            Fetch the network and update its IDs, returning the document to be
+            written. If sharded, the scenarios are left without their data, to
+            be fetched one at a time with get_scenario_data.
+        """
 
-        self.update_attributes(network_j)
+        client = self.client
 
-        for node in network_j.nodes:
-            node.id = node.id * -1
-            self.update_attributes(node)
+        if scenario_id is not None:
+            scenario_id = [scenario_id]
 
-        for link in network_j.links:
-            link.id = link.id * -1
-            link.node_1_id = link.node_1_id * -1
-            link.node_2_id = link.node_2_id * -1
-            self.update_attributes(link)
+        #A sharded or filtered export fetches the data for each scenario separately.
+        #Each scenario's data is fetched whole, and a filter trims it afterwards.
+        fetch_scenarios = sharded is False and self.filters is not None
+        with phase(self.instrumentation, 'get_network'):
+            network_j = client.get_network(network_id=network_id,
+                                           scenario_id=scenario_id,
+                                           include_maps=False,
+                                           include_data=not (sharded or fetch_scenarios),
+                                           include_results=include_results)
 
-        for group in network_j.resourcegroups:
-            group.id = group.id * -1
-            self.update_attributes(group)
+        if self.filters is not None:
+            with phase(self.instrumentation, 'filter'):
+                self.filters.filter_network(network_j)
 
-        for scenario in network_j.scenarios:
-            scenario.resourcescenarios_1 = []
+        network_templates = []
 
-            for r_s in scenario.resourcescenarios:
-                new_rs = ExtendedDict({})
-                new_rs.resource_attr_id = r_s.resource_attr_id * -1
-                dataset = r_s.dataset
-                new_rs.dataset = ExtendedDict(dataset)
-                scenario.resourcescenarios_1.append(new_rs)
+        with phase(self.instrumentation, 'get_template'):
+            if network_j.types is not None and len(network_j.types) > 0:
+                template_id = network_j.types[0].template_id
 
-            scenario.resourcescenarios = scenario.resourcescenarios_1
+                tmpl = self.template_lookup.get(template_id)
+                if tmpl is None:
+                    tmpl = get_cached(self.cache, 'template_json', template_id,
+                                      lambda: client.get_template_as_json(template_id=template_id))
+                    self.template_lookup[template_id] = tmpl
+                network_templates.append(tmpl)
 
-            for rgi in scenario.resourcegroupitems:
-                if rgi.node_id is not None:
-                    rgi.ref_id = rgi.node_id * -1
-                if rgi.subgroup_id is not None:
-                    rgi.ref_id = rgi.subgroup_id * -1
-                if rgi.link_id is not None:
-                    rgi.ref_id = rgi.link_id * -1
-                rgi.group_id = rgi.group_id * -1
+        with phase(self.instrumentation, 'update_ids'):
+            self.update_ids(network_j, sharded=sharded or fetch_scenarios, dedupe_datasets=dedupe_datasets)
 
-        # Creating the timestamp to add at the end of the filename
+        if fetch_scenarios is True:
+            with phase(self.instrumentation, 'get_scenarios'):
+                for scenario in network_j.scenarios:
+                    scenario_j = self.get_scenario_data(scenario.id, include_results=include_results,
+                                                        dedupe_datasets=dedupe_datasets)
+                    scenario.resourcescenarios = scenario_j.resourcescenarios
+                    scenario.resourcegroupitems = scenario_j.resourcegroupitems
 
-        rules = client.get_resource_rules(ref_key='NETWORK',
-                                          ref_id=network_j.id)
+        with phase(self.instrumentation, 'get_rules'):
+            rules = client.get_resource_rules(ref_key='NETWORK',
+                                              ref_id=network_j.id)
 
 
         output_data = {'attributes': self.attr_dict,
@@ -193,21 +377,107 @@ class ExportJSON:
                        'templates': network_templates,
                        'rules': rules}
 
+        if dedupe_datasets is True:
+            output_data['format_version'] = DATASET_TABLE_FORMAT
+            output_data['datasets'] = self.datasets
+
+        if self.columns is not None:
+            #Filled in as the scenarios are written, in a sharded export
+            output_data['columnar'] = self.columns.table
+
         additional_data = self.get_additional_data()
 
         output_data.update(additional_data)
 
-        dump_kwargs = {}
-        if newlines is True:
-            dump_kwargs["indent"] = 0
+        return output_data
 
-        final_data = json.dumps(output_data, **dump_kwargs)
+    def get_scenario_data(self, scenario_id, datasets=None, include_results=True,
+                          dedupe_datasets=False):
+        """
+            Fetch all the data of one scenario of a sharded or filtered export,
+            and update its IDs as update_ids does, dropping any data a filter excludes.
+            returns:
+                The scenario, with its resource scenarios and group items as records
+        """
+        scenario_j = self.client.get_scenario(scenario_id=scenario_id,
+                                              include_data=True,
+                                              include_results=include_results)
+        self.update_scenario(scenario_j, self.datasets if datasets is None else datasets,
+                             dedupe_datasets=dedupe_datasets)
+        return scenario_j
+
+    def update_ids(self, network_j, sharded=False, dedupe_datasets=False):
+        """
+            Negate the IDs of the network's resources and resource attributes,
+            and update the scenarios unless they are written separately (sharded).
+        """
+        self.load_dimensions()
 
-        self.write_network(network_j.name, final_data, target_dir, zipped=zipped)
+        self.update_attributes(network_j)
 
-        LOG.info("File export complete.")
+        for node in network_j.nodes:
+            node.id = node.id * -1
+            self.update_attributes(node)
 
+        for link in network_j.links:
+            link.id = link.id * -1
+            link.node_1_id = link.node_1_id * -1
+            link.node_2_id = link.node_2_id * -1
+            self.update_attributes(link)
+
+        for group in network_j.resourcegroups:
+            group.id = group.id * -1
+            self.update_attributes(group)
 
+        self.datasets = {}
+
+        if sharded is False:
+            for scenario in network_j.scenarios:
+                self.update_scenario(scenario, self.datasets, dedupe_datasets=dedupe_datasets)
+
+    def update_scenario(self, scenario, datasets, dedupe_datasets=False):
+        """
+            Make the IDs in a scenario's resource scenarios and resource group
+            items negative, and optionally move its datasets into the dataset table.
+        """
+        if self.filters is not None:
+            self.filters.filter_scenario(scenario)
+
+        resourcescenarios = []
+
+        for r_s in scenario.resourcescenarios:
+            new_rs = ResourceScenario(resource_attr_id=r_s.resource_attr_id * -1)
+            dataset = r_s.dataset
+            if dedupe_datasets is True and dataset.hash is not None:
+                dataset_key = str(dataset.hash)
+                with self.datasets_lock:
+                    if dataset_key not in datasets:
+                        datasets[dataset_key] = self.make_dataset(dataset)
+                new_rs.dataset_key = dataset_key
+            else:
+                new_rs.dataset = self.make_dataset(dataset)
+            resourcescenarios.append(new_rs)
+
+        scenario.resourcescenarios = resourcescenarios
+
+        scenario.resourcegroupitems = [ResourceGroupItem(rgi) for rgi in scenario.resourcegroupitems]
+        for rgi in scenario.resourcegroupitems:
+            if rgi.node_id is not None:
+                rgi.ref_id = rgi.node_id * -1
+            if rgi.subgroup_id is not None:
+                rgi.ref_id = rgi.subgroup_id * -1
+            if rgi.link_id is not None:
+                rgi.ref_id = rgi.link_id * -1
+            rgi.group_id = rgi.group_id * -1
+
+    def make_dataset(self, dataset):
+        """
+            A copy of a dataset for the file, with its value in columns if this is a columnar export
+        """
+        dataset = Dataset(dataset)
+        if self.columns is not None:
+            self.columns.compact(dataset)
+        return dataset
 
     def get_additional_data(self):
         """
@@ -228,14 +498,158 @@ class ExportJSON:
 
         return {}
 
-    def write_network(self, network_name, network_data, target_dir, zipped=False):
+    def write_network(self, network_name, network_data, target_dir, zipped=False,
+                      newlines=False, output=None, compression=DEFAULT_CODEC,
+                      compression_level=None, index=False):
         """
-            Write the network to a file
+            Write the network to a file, section by section, so the whole
+            document never exists as a single string. If zipped, the JSON is
+            compressed with the given codec as it is written, with no
+            intermediate file. If output is a text stream, write to that instead.
+            If index, also write the index of the file (see index.py).
         """
         write_output("Writing network to file")
         write_progress(3, self.num_steps)
 
-        # Returning the file
+        if output is not None:
+            JSONStreamWriter(output, newlines=newlines).write(network_data)
+            output.flush()
+            return None
+
+        json_location = self.get_file_name(network_name, target_dir, 'json')
+
+        if zipped is True and (compression == DEFAULT_CODEC or self.columns is not None):
+            location = self.get_file_name(network_name, target_dir, 'zip')
+            if self.columns is not None:
+                #Complete the list of blocks before it is written
+                self.columns.flush()
+            with open_archive(location, compression, compression_level) as zip_file:
+                with zip_file.open(os.path.basename(json_location), 'w', force_zip64=True) as member:
+                    with io.TextIOWrapper(member, encoding='utf-8', newline='') as output_file:
+                        writer = self.get_writer(output_file, newlines, index)
+                        writer.write(network_data)
+                if self.columns is not None:
+                    self.columns.write_to(zip_file)
+                if index is True:
+                    zip_file.writestr(INDEX_MEMBER, json.dumps(writer.index))
+        else:
+            if zipped is True:
+                location = self.get_file_name(network_name, target_dir, EXTENSIONS[compression])
+                with open_writer(location, compression, compression_level) as stream:
+                    with io.TextIOWrapper(stream, encoding='utf-8', newline='') as output_file:
+                        writer = self.get_writer(output_file, newlines, index)
+                        writer.write(network_data)
+            else:
+                location = json_location
+                with open(location, 'w', newline='') as output_file:
+                    writer = self.get_writer(output_file, newlines, index)
+                    writer.write(network_data)
+
+            if index is True:
+                index_location = self.get_file_name(network_name + INDEX_SUFFIX, target_dir, 'json')
+                with open(index_location, 'w') as index_file:
+                    json.dump(writer.index, index_file)
+
+        write_output("Network Written to %s "%(location))
+
+        return location
+
+    def get_writer(self, output_file, newlines, index):
+        """
+            A writer of the network file, which records its index if index is True
+        """
+        if index is True:
+            return IndexedJSONStreamWriter(output_file, newlines=newlines)
+        return JSONStreamWriter(output_file, newlines=newlines)
+
+    def write_sharded_network(self, network_name, network_data, target_dir, newlines=False,
+                              include_results=True, dedupe_datasets=False,
+                              max_workers=DEFAULT_SCENARIO_WORKERS,
+                              compression=DEFAULT_CODEC, compression_level=None):
+        """
+            Write the network to a zip file in which the data for each scenario
+            is in its own file. The scenarios are fetched from the server
+            concurrently, and each is written out as soon as it arrives.
+            The network itself is written last, so that the dataset table
+            contains the datasets of every scenario.
+        """
+        write_output("Writing network to file")
+        write_progress(3, self.num_steps)
+
+        location = self.get_file_name(network_name, target_dir, 'zip')
+
+        network_j = network_data['network']
+        datasets = network_data.get('datasets', {})
+        manifest = {'network': SHARDED_NETWORK_FILE, 'scenarios': []}
+
+        for i, scenario in enumerate(network_j.scenarios):
+            scenario.pop('resourcescenarios', None)
+            scenario.pop('resourcegroupitems', None)
+            manifest['scenarios'].append({'id': scenario.id,
+                                          'name': scenario.name,
+                                          'file': 'scenarios/%s.json' % i})
+
+        #Only one member of the zip can be written at a time
+        zip_lock = threading.Lock()
+        #The column writer of a columnar export is shared by all the scenarios
+        columns_lock = threading.Lock()
+
+        with open_archive(location, compression, compression_level) as zip_file:
+
+            def write_member(member_name, data, streamed=STREAMED):
+                with zip_file.open(member_name, 'w', force_zip64=True) as member:
+                    with io.TextIOWrapper(member, encoding='utf-8') as output_file:
+                        JSONStreamWriter(output_file, newlines=newlines, streamed=streamed).write(data)
+
+            def write_scenario(scenario_entry):
+                scenario_j = self.client.get_scenario(scenario_id=scenario_entry['id'],
+                                                      include_data=True,
+                                                      include_results=include_results)
+                if self.columns is not None:
+                    with columns_lock:
+                        self.update_scenario(scenario_j, datasets, dedupe_datasets=dedupe_datasets)
+                else:
+                    self.update_scenario(scenario_j, datasets, dedupe_datasets=dedupe_datasets)
+
+                #Encode the shard while the other scenarios are being fetched and encoded,
+                #and hold the zip only to compress it into its member
+                shard = {'resourcescenarios': scenario_j.resourcescenarios,
+                         'resourcegroupitems': scenario_j.resourcegroupitems}
+                output_file = io.StringIO()
+                JSONStreamWriter(output_file, newlines=newlines, streamed=SHARD_STREAMED).write(shard)
+                data = output_file.getvalue().encode('utf-8')
+
+                with zip_lock:
+                    zip_file.writestr(scenario_entry['file'], data)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                #Consume the results so any error is raised here
+                list(pool.map(write_scenario, manifest['scenarios']))
+
+            if self.columns is not None:
+                self.columns.write_to(zip_file)
+
+            write_member(SHARDED_NETWORK_FILE, network_data)
+            write_member(SHARDED_MANIFEST_FILE, manifest, streamed=set())
+
+        write_output("Network Written to %s "%(location))
+
+        return location
+
+    def write_summary(self, network_name, summary, target_dir):
+        """
+            Write the summary of an export, for a later delta export
+        """
+        location = self.get_file_name(network_name + '_summary', target_dir, 'json')
+        with open(location, 'w') as summary_file:
+            json.dump(summary, summary_file)
+        write_output("Summary Written to %s "%(location))
+        return location
+
+    def get_file_name(self, network_name, target_dir, extension):
+        """
+            The path of the file to write a network to, creating the directory if needed.
+        """
         if target_dir is None:
             target_dir = os.path.join(os.path.expanduser('~'), 'Desktop')
 
@@ -245,20 +659,4 @@ class ExportJSON:
         #replacing not ascii chars with "-"
         network_name = re.sub("[^A-Za-z0-9-_]", "-", network_name)
 
-        location = os.path.join(target_dir, '%s.json'%(network_name))
-
-        #Write the file
-        with open(location, 'w') as output_file:
-            output_file.write(network_data)
-
-        #Now zip it if required
-        if zipped is True:
-            zip_file_name = '%s.zip'%(network_name)
-            zip_location = os.path.join(target_dir, zip_file_name)
-            with zipfile.ZipFile(zip_location, 'w') as zip_file:
-                # writing each file one by one
-                zip_file.write(location,
-                               os.path.basename(location),
-                               compress_type=zipfile.ZIP_DEFLATED)
-
-        write_output("Network Written to %s "%(location))
+        return os.path.join(target_dir, '%s.%s'%(network_name, extension))
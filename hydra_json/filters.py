@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Filters which export only part of a network: some of its attributes,
+    resources of some types, resources whose names match a pattern, or some
+    of its scenarios.
+
+    The network is fetched without its data, and filtered. Only the chosen
+    scenarios' data is then fetched, one scenario at a time. The server
+    returns all of each scenario's data, so the data of the resource
+    attributes which were filtered out is still fetched; it is dropped
+    once each scenario arrives, before it is converted or written.
+"""
+import fnmatch
+import logging
+
+from hydra_client import HydraClientError
+
+from .index import select_scenarios
+
+log = logging.getLogger(__name__)
+
+#The ref key and network collection of each type of resource
+RESOURCE_COLLECTIONS = (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups'))
+
+class ExportFilter:
+    """
+        The parts of a network to export. A filter which is None selects
+        everything.
+        args:
+            attributes (list): The names of the attributes to export
+            resource_types (list): The names of the types of the nodes, links and
+                                   groups to export (the name of each one's first type)
+            scenarios (list): The IDs or names of the scenarios to export
+            name_pattern (str): A pattern, with * and ? wildcards, which the names
+                                of the nodes, links and groups to export match
+        The nodes at the ends of each link exported are exported with it, so the
+        network stays valid. Group items are only exported with their resource
+        and group.
+    """
+
+    def __init__(self, attributes=None, resource_types=None, scenarios=None, name_pattern=None):
+        self.attributes = None if attributes is None else set(attributes)
+        self.resource_types = None if resource_types is None else set(resource_types)
+        self.scenarios = None if scenarios is None else list(scenarios)
+        self.name_pattern = name_pattern
+
+        #The IDs of the resource attributes and resources exported, filled in by filter_network
+        self.resource_attr_ids = set()
+        self.resource_ids = {'NODE': set(), 'LINK': set(), 'GROUP': set()}
+
+    def copy(self):
+        """
+            A new filter with the same settings, for exporting another network
+        """
+        return ExportFilter(attributes=self.attributes, resource_types=self.resource_types,
+                            scenarios=self.scenarios, name_pattern=self.name_pattern)
+
+    def is_empty(self):
+        return (self.attributes is None and self.resource_types is None
+                and self.scenarios is None and self.name_pattern is None)
+
+    def match_resource(self, resource):
+        """
+            Whether a node, link or group is exported
+        """
+        if self.resource_types is not None:
+            types = resource.get('types') or []
+            if len(types) == 0 or types[0].name not in self.resource_types:
+                return False
+        if self.name_pattern is not None:
+            if not fnmatch.fnmatchcase(resource.name, self.name_pattern):
+                return False
+        return True
+
+    def filter_attributes(self, resource):
+        """
+            Drop the attributes of a resource which are not exported, and
+            record the IDs of those which are
+        """
+        if self.attributes is not None:
+            resource.attributes = [ra for ra in resource.attributes or [] if ra.name in self.attributes]
+        self.resource_attr_ids.update(ra.id for ra in resource.attributes or [])
+
+    def filter_network(self, network_j):
+        """
+            Drop the resources, attributes and scenarios of a network, as
+            returned by the server without its data, which are not exported
+        """
+        self.filter_attributes(network_j)
+
+        network_j.links = [l for l in network_j.links if self.match_resource(l)]
+        #The ends of the links are kept whether they match or not
+        end_node_ids = set(l.node_1_id for l in network_j.links) | set(l.node_2_id for l in network_j.links)
+        network_j.nodes = [n for n in network_j.nodes if n.id in end_node_ids or self.match_resource(n)]
+        network_j.resourcegroups = [g for g in network_j.resourcegroups if self.match_resource(g)]
+
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            for resource in network_j[collection]:
+                self.resource_ids[ref_key].add(resource.id)
+                self.filter_attributes(resource)
+
+        if self.scenarios is not None:
+            network_j.scenarios = select_scenarios(network_j.scenarios, self.scenarios)
+
+        log.info("Exporting %s nodes, %s links, %s groups and %s scenarios",
+                 len(network_j.nodes), len(network_j.links),
+                 len(network_j.resourcegroups), len(network_j.scenarios))
+
+        if len(network_j.scenarios) == 0:
+            raise HydraClientError("The network has no scenarios to export")
+
+    def filter_scenario(self, scenario_j):
+        """
+            Drop the data of a scenario, as returned by the server, which is not
+            exported. The whole scenario has already been fetched by then.
+        """
+        scenario_j.resourcescenarios = [rs for rs in scenario_j.resourcescenarios or []
+                                        if rs.resource_attr_id in self.resource_attr_ids]
+
+        scenario_j.resourcegroupitems = [rgi for rgi in scenario_j.resourcegroupitems or []
+                                         if self.match_group_item(rgi)]
+
+    def match_group_item(self, rgi):
+        """
+            Whether a resource group item is exported: both its group and its resource must be
+        """
+        if rgi.get('group_id') not in self.resource_ids['GROUP']:
+            return False
+        if rgi.get('node_id') is not None:
+            return rgi.node_id in self.resource_ids['NODE']
+        if rgi.get('link_id') is not None:
+            return rgi.link_id in self.resource_ids['LINK']
+        if rgi.get('subgroup_id') is not None:
+            return rgi.subgroup_id in self.resource_ids['GROUP']
+        return True
@@ -18,23 +18,44 @@
 
 import argparse as ap
 import logging
-import zipfile
-import tempfile
 
 from hydra_client.output import write_progress, write_output
 from hydra_client import RequestError, HydraClientError
 from hydra_client.objects import ExtendedDict
 
+from . import reader
+from . import delta
+from . import index
+from .cache import get_cached, MemoryCache
+from .instrument import phase
+from .defaults import DATA_CHUNK_SIZE, RULE_WORKERS
+from .columnar import ColumnReader
+from .validate import NetworkValidator, describe_problems
+from .records import ResourceScenario, ResourceGroupItem, Dataset,\
+                     compact_network, compact_resource, to_dicts, replace_records
+
 import json
 
 import os, sys
+import threading
 
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 log = logging.getLogger(__name__)
 
 __location__ = os.path.split(sys.argv[0])[0]
 
+ATTRIBUTE_BATCH_SIZE = 500
+
+#The ref key and network collection of each type of resource
+RESOURCE_COLLECTIONS = (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups'))
+
+#The client calls which add, update and delete each type of resource, and the name of its argument
+RESOURCE_CALLS = {'NODE': ('add_node', 'update_node', 'delete_node', 'node'),
+                  'LINK': ('add_link', 'update_link', 'delete_link', 'link'),
+                  'GROUP': ('add_group', 'update_group', 'delete_group', 'group')}
+
 class ImportJSON:
     """
        Importer of JSON files into Hydra. Also accepts XML files.
@@ -42,18 +63,33 @@ class ImportJSON:
 
     Network = None
 
-    def __init__(self, client):
+    def __init__(self, client, cache=None, instrumentation=None, checkpoint=None):
 
         self.warnings = []
         self.files = []
 
         self.client = client
 
+        #An optional ReferenceCache of templates, attributes and dimensions
+        self.cache = cache
+
+        #An optional Instrumentation, recording the time and client calls of each phase
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            self.client = instrumentation.wrap(client)
+
+        #An optional ImportCheckpoint, recording the progress of the import
+        self.checkpoint = checkpoint
+        #The progress of a previous run, if the import is being resumed
+        self.resume = {}
+
         self.new_network = None
         self.input_network = None
         self.attr_negid_posid_lookup = {}
         self.type_id_map = {} # a mapping from a type ID to a type object
         self.name_maps = {'NODE': {}, 'LINK': {}, 'GROUP': {}}
+        self.datasets = {} # the dataset table of a file which has one, keyed on dataset hash
+        self.columns = None # a ColumnReader, if the file has values stored in columns
 
         #This is a special case to cater for the fact that the NAME of a network type
         #often changes from one template to another, even when then node type names
@@ -63,10 +99,46 @@ class ImportJSON:
         #3 steps: start, read, save
         self.num_steps = 3
 
-    def import_network(self, network, template_id, project_id, network_name=None):
+        #The number of attributes to create in a single request
+        self.attribute_batch_size = ATTRIBUTE_BATCH_SIZE
+        #Set to False if the server does not support adding attributes in bulk
+        self.bulk_attributes = True
+        #The approximate size of each batch of scenario data in a chunked import
+        self.data_chunk_size = DATA_CHUNK_SIZE
+        #The number of rules to add at the same time
+        self.rule_workers = RULE_WORKERS
+        #The rules which could not be added, as returned by add_rules
+        self.rule_errors = []
+        #Held while attributes and rule type definitions are created. Imports
+        #which share a cache share this, so each is only created once.
+        self.reference_lock = threading.Lock()
+        #Check the whole file before anything is written to the server, so that
+        #all its problems are reported together and nothing is left half-imported
+        self.validate = True
+        #The problems found by the last check, as returned by validate_network
+        self.problems = []
+
+    def import_network(self, network, template_id, project_id, network_name=None, stream=False,
+                       chunked=False, resume=False, skip_rules=False, scenarios=None, dry_run=False):
         """
             Read the file containing the network data and send it to
             the server.
+            args:
+                stream (bool): Read the file one record at a time rather than
+                               loading the whole document (requires ijson).
+                chunked (bool): Create the network without its scenario data,
+                                then send the data in batches of about
+                                self.data_chunk_size bytes, rather than in one request.
+                                With stream, the data is read from the file again
+                                batch by batch, so it is never all in memory.
+                resume (bool): Continue an interrupted import from the last step
+                               recorded in self.checkpoint, rather than starting again.
+                skip_rules (bool): Don't add the rules. They can be added later with import_rules.
+                scenarios (list): Import only the scenarios with these IDs or names.
+                                  If the file has an index, the others are not read (see index.py).
+                dry_run (bool): Only check the file, as validate_network does, and
+                                put its problems in self.problems. Nothing is
+                                written to the server.
         """
 
         write_output("Reading Network")
@@ -74,77 +146,429 @@ class ImportJSON:
 
         if network is not None:
 
-            if zipfile.is_zipfile(network):
-                log.info("File is zipped...extracting..")
-                tmp_folder = tempfile.mkdtemp()
-                zip_ref = zipfile.ZipFile(network, 'r')
-                zip_ref.extractall(tmp_folder)
-                zip_ref.close()
+            if template_id is None:
+                raise HydraClientError("Please specifiy a template")
+            if scenarios is not None and stream is True:
+                raise HydraClientError("A subset of the scenarios can't be streamed. "
+                                       "Export the network with an index to read only them.")
+            if dry_run is True:
+                self.validate_network(network, template_id, stream=stream, scenarios=scenarios)
+                if len(self.problems) == 0:
+                    write_output("No problems found. The network can be imported.")
+                else:
+                    write_output(describe_problems(self.problems))
+                return network
+
+            self.template_id = template_id
+            with phase(self.instrumentation, 'get_template'):
+                self.get_template()
+
+            cache = self.cache
+            if cache is None and self.validate is True:
+                #Fetch the attributes and dimensions once for both the check and the import
+                self.cache = MemoryCache()
+            try:
+                if self.checkpoint is not None:
+                    if resume is True and self.checkpoint.load() is True:
+                        self.checkpoint.check_source(network, template_id, project_id)
+                        self.resume = dict(self.checkpoint.state)
+                        log.info("Resuming the import from checkpoint %s", self.checkpoint.path)
+                    else:
+                        self.checkpoint.start(network, template_id, project_id)
+
+                self.init_lookups()
+
+                with phase(self.instrumentation, 'read'):
+                    if stream is True:
+                        json_rules = self.read_network_stream(network, scenario_data=not chunked)
+                    else:
+                        json_rules = self.read_network(network, scenarios=scenarios)
+
+                scenario_data = None
+                if chunked is True:
+                    if stream is True:
+                        #Read from the file again as it is sent
+                        scenario_data = self.iter_scenario_data(network, reader.read_manifest(network))
+                    else:
+                        scenario_data = self.pop_scenario_data()
 
-                # Looking inside the extracted folder for the file to import. Navigating eventual subfolders tree to the json file
-                network = self.get_network_file_name(tmp_folder, {})
+                self.save_network(None if skip_rules is True else json_rules, project_id,
+                                  network_name=network_name, scenario_data=scenario_data)
 
-            with open(network, 'r') as netfile:
-                json_data = json.load(netfile)
+                if self.checkpoint is not None:
+                    self.checkpoint.remove()
 
-            self.input_network = ExtendedDict(json_data['network'])
+                message = f"Network {self.new_network.name} imported with ID {self.new_network.id}."
+                if len(self.new_network.scenarios) > 0:
+                    message += f"\nScenario ID:{self.new_network.scenarios[0].id}"
+                write_output(message)
+            finally:
+                self.cache = cache
+        else:
+            raise HydraClientError("A network ID must be specified!")
+        return network
 
-            if project_id is None:
-                project = self.create_project()
-                json_data['network']['project_id'] = project['id']
+    def init_lookups(self):
+        """
+            Clear the lookups made while a network is read
+        """
+        #a mapping from attr ID to unit ID
+        self.attr_id_unit_id_lookup = {}
+        #a mapping from resource attr ID to unit id
+        self.ra_id_unit_id_lookup = {}
+
+        #a mapping from the resource_attr_id of each RS in scenario [0] to the
+        #resource_attr_id it is sent with, which differs if its RA is a duplicate
+        self.rs_lookup = {}
+        #a mapping from the resource_attr_id of a removed duplicate to the one kept in its place
+        self.duplicate_ra_lookup = {}
+
+    def save_network(self, json_rules, project_id, network_name=None, scenario_data=None):
+        """
+            Send the network which has been read, and its rules, to the server.
+            args:
+                json_rules (list): The rules to add to the network, or None to add none
+                project_id (int): The project to put it in. If None, one is created.
+                scenario_data (iterable): If given, the network is created without its
+                                          scenario data, and these records, as produced
+                                          by iter_scenario_data, are sent in batches after it.
+            returns:
+                The new network
+        """
+        if project_id is None:
+            project_id = self.resume.get('project_id')
+        if project_id is None:
+            project_id = self.create_project(self.input_network)['id']
+            self.save_progress(project_id=project_id)
+
+        self.input_network.project_id = project_id
+
+        if network_name:
+            self.input_network.name = network_name
+
+        write_output("Saving Network")
+        write_progress(3, self.num_steps)
+
+        #The network ID can be specified to get the network...
+        with phase(self.instrumentation, 'add_network'):
+            if self.resume.get('network_id') is not None:
+                #The network was created before the import was interrupted
+                self.new_network = self.client.get_network(network_id=self.resume['network_id'],
+                                                           include_maps=False,
+                                                           include_data=False)
             else:
-                json_data['network']['project_id'] = project_id
+                for scenario in self.input_network.scenarios:
+                    self.restore_values(scenario.get('resourcescenarios', []))
+                #Made into dicts in place, rather than copied, so the network isn't held twice
+                self.new_network = self.client.add_network(replace_records(self.input_network))
+                self.save_progress(network_id=self.new_network.id)
 
+        if scenario_data is not None:
+            with phase(self.instrumentation, 'add_scenario_data'):
+                self.add_scenario_data(scenario_data)
 
-            if template_id is None:
-                raise HydraClientError("Please specifiy a template")
-            self.template_id = template_id
-            self.get_template()
+        if json_rules is not None:
+            with phase(self.instrumentation, 'add_rules'):
+                self.add_rules(json_rules)
 
-            #a mapping from attr ID to unit ID
-            self.attr_id_unit_id_lookup = {}
-            #a mapping from resource attr ID to unit id
-            self.ra_id_unit_id_lookup = {}
+        return self.new_network
 
-            self.make_attribute_id_mapping(json_data.get('attributes', []))
+    def read_network(self, network, scenarios=None):
+        """
+            Load the whole network file, or only the given scenarios
+            of it, and remap its IDs.
+            returns:
+                The rules contained in the file
+        """
+        json_data = self.load_network(network, scenarios=scenarios)
 
-            #Replace the attr_id for each resource attribute with the DB's correct ID
-            for ra_j in self.input_network.attributes:
-                ra_j.attr_id = self.attr_negid_posid_lookup[ra_j.attr_id]
+        return self.read_network_data(json_data, network)
 
-            self.input_network.project_id = project_id
+    def load_network(self, network, scenarios=None):
+        """
+            Load the whole network file, or only the given scenarios of it
+        """
+        with phase(self.instrumentation, 'parse'):
+            if scenarios is not None:
+                return index.load_network(network, scenarios)
+            return reader.load_network(network)
 
+    def read_network_data(self, json_data, network=None):
+        """
+            Remap the IDs of a network which has already been loaded, such
+            as one from ExportJSON.get_export_data, as read_network does.
+            args:
+                json_data (dict): The network document
+                network (str): The file it was loaded from, if any
+            returns:
+                The rules contained in the document
+        """
+        if self.validate is True:
+            self.check_network_data(json_data)
+            if len(self.problems) > 0:
+                raise HydraClientError(describe_problems(self.problems))
+
+        self.input_network = extend_network(compact_network(json_data['network']))
 
-            if network_name:
-                self.input_network.name = network_name
+        self.datasets = json_data.get('datasets', {})
+        if json_data.get('columnar') is not None:
+            self.columns = ColumnReader(network, json_data['columnar'])
 
-            #a mapping from a resource_attr_id to an RS in scenario [0]
-            self.rs_lookup = {}
-            self.make_rs_lookup()
+        with phase(self.instrumentation, 'make_attribute_id_mapping'):
+            self.make_attribute_id_mapping(json_data.get('attributes', []))
+
+        #Replace the attr_id for each resource attribute with the DB's correct ID
+        for ra_j in self.input_network.attributes:
+            ra_j.attr_id = self.attr_negid_posid_lookup[ra_j.attr_id]
 
+        self.make_rs_lookup()
 
-            #make all the negative type and attribute IDs into positive ones from the DB
+        #make all the negative type and attribute IDs into positive ones from the DB
+        with phase(self.instrumentation, 'update_type_and_attribute_ids'):
             self.update_type_and_attribute_ids()
+            self.retarget_rs_lookup()
 
+        with phase(self.instrumentation, 'update_units'):
             self.update_units()
 
-            write_output("Saving Network")
-            write_progress(3, self.num_steps)
+        return json_data.get('rules', [])
 
-            #The network ID can be specified to get the network...
-            self.new_network = self.client.add_network(self.input_network)
+    def read_network_stream(self, network, scenario_data=True):
+        """
+            Read the network file incrementally, remapping each node, link, group
+            and resource scenario as it is parsed, so the raw document is never
+            held in memory. The file is read in four passes:
+                1: The attributes, datasets and the network's own properties
+                2: The resource attribute IDs which have data in the first scenario
+                3: The nodes, links and groups
+                4: The scenarios and the rules
+            args:
+                scenario_data (bool): If False, the scenarios are read without
+                                      their resource scenarios and group items.
+            returns:
+                The rules contained in the file
+        """
+        manifest = reader.read_manifest(network)
 
-            self.add_rules(json_data.get('rules', []))
+        if self.validate is True:
+            self.check_network_stream(network, manifest)
+            if len(self.problems) > 0:
+                raise HydraClientError(describe_problems(self.problems))
 
-            write_output(f"Network {self.new_network.name} imported with ID {self.new_network.id}.\n"+
-                         f"Scenario ID:{self.new_network.scenarios[0].id}")
-        else:
-            raise HydraClientError("A network ID must be specified!")
-        return network
+        with phase(self.instrumentation, 'parse_header'):
+            json_attributes = self.read_header_stream(network, manifest)
+
+        with phase(self.instrumentation, 'make_attribute_id_mapping'):
+            self.make_attribute_id_mapping(json_attributes)
+
+        #Replace the attr_id for each resource attribute with the DB's correct ID
+        for ra_j in self.input_network.get('attributes', []):
+            ra_j.attr_id = self.attr_negid_posid_lookup[ra_j.attr_id]
+
+        with phase(self.instrumentation, 'update_type_and_attribute_ids'):
+            self.read_resources_stream(network)
+
+        json_rules = []
+        with phase(self.instrumentation, 'read_scenarios'):
+            if scenario_data is True:
+                records = self.iter_scenario_data(network, manifest, items=(reader.RULES,))
+            else:
+                records = reader.iter_scenario_records(network, manifest=manifest, items=(reader.RULES,))
+
+            scenario = ExtendedDict({'resourcescenarios': [], 'resourcegroupitems': []})
+            for path, value in records:
+                if path == reader.RESOURCESCENARIOS:
+                    if scenario_data is True:
+                        scenario.resourcescenarios.append(value)
+                elif path == reader.RESOURCEGROUPITEMS:
+                    if scenario_data is True:
+                        scenario.resourcegroupitems.append(value)
+                elif path == reader.RULES:
+                    json_rules.append(value)
+                elif path == reader.SCENARIO:
+                    self.input_network.scenarios.append(scenario)
+                    scenario = ExtendedDict({'resourcescenarios': [], 'resourcegroupitems': []})
+                else:
+                    scenario[path[len(reader.SCENARIO) + 1:]] = value
+
+        return json_rules
+
+    def read_header_stream(self, network, manifest=None):
+        """
+            Read everything in the file except the resources and the scenario
+            data: Set self.input_network to the network's own properties, with
+            empty resource and scenario lists, fill self.datasets and self.rs_lookup,
+            and return the file's attributes.
+        """
+        json_attributes = {}
+        header = {}
+        columnar = {}
+        with reader.open_network(network) as netfile:
+            records = reader.iter_records(netfile,
+                                          members={'attributes': (),
+                                                   'datasets': (),
+                                                   'columnar': (),
+                                                   reader.NETWORK: reader.NETWORK_COLLECTIONS})
+            for path, value in records:
+                if path.startswith('attributes.'):
+                    json_attributes[path[len('attributes.'):]] = value
+                elif path.startswith('datasets.'):
+                    self.datasets[path[len('datasets.'):]] = value
+                elif path.startswith('columnar.'):
+                    columnar[path[len('columnar.'):]] = value
+                elif path.startswith(reader.NETWORK + '.'):
+                    header[path[len(reader.NETWORK) + 1:]] = value
+
+        for path, value in reader.iter_scenario_records(network, manifest=manifest):
+            if path == reader.SCENARIO:
+                #Only the first scenario is needed
+                break
+            if path == reader.RESOURCESCENARIOS:
+                #Only the resource attribute ID is needed to find and retarget duplicates.
+                ra_id = value['resource_attr_id']
+                self.rs_lookup[ra_id] = ra_id
+
+        if len(columnar) > 0:
+            self.columns = ColumnReader(network, columnar)
+
+        for collection in reader.NETWORK_COLLECTIONS:
+            header[collection] = []
+        self.input_network = extend_resource(compact_resource(header))
+
+        return json_attributes
+
+    def read_resources_stream(self, network):
+        """
+            Read the nodes, links and groups one at a time, update their type
+            and attribute IDs and add them to self.input_network
+        """
+        self.get_type_name_map()
+        if len(self.input_network.get('types', [])) > 0:
+            self.input_network.types = [self.network_template_type]
+
+        resource_paths = {reader.NODES: RESOURCE_COLLECTIONS[0],
+                          reader.LINKS: RESOURCE_COLLECTIONS[1],
+                          reader.GROUPS: RESOURCE_COLLECTIONS[2]}
+        with reader.open_network(network) as netfile:
+            for path, resource in reader.iter_records(netfile, items=tuple(resource_paths)):
+                ref_key, collection = resource_paths[path]
+                resource_j = extend_resource(compact_resource(resource))
+                self.name_maps[ref_key][resource_j.name] = resource_j.id
+                self.update_type_and_attribute(resource_j)
+                self.input_network[collection].append(resource_j)
+
+    def iter_scenario_data(self, network, manifest=None, items=()):
+        """
+            Read the scenarios one record at a time, as reader.iter_scenario_records,
+            but with each resource scenario's dataset and unit filled in and any
+            duplicate resource attribute retargeted, ready for upload.
+        """
+        first_scenario = True
+        for path, value in reader.iter_scenario_records(network, manifest=manifest, items=items):
+            if path == reader.RESOURCESCENARIOS:
+                rs = self.resolve_dataset(ResourceScenario(value))
+                if first_scenario is True:
+                    #Follow any retargeting of a duplicate resource attribute
+                    rs.resource_attr_id = self.rs_lookup[rs.resource_attr_id]
+                self.update_unit(rs)
+                value = rs
+            elif path == reader.RESOURCEGROUPITEMS:
+                value = ResourceGroupItem(value)
+            elif path == reader.SCENARIO:
+                first_scenario = False
+            yield path, value
+
+    def validate_network(self, network, template_id, stream=False, scenarios=None):
+        """
+            Check a network file against a template and the attributes and
+            dimensions on the server, and find everything which would stop
+            it being imported. Nothing is written to the server.
+            args:
+                stream, scenarios: As import_network
+            returns:
+                The problems found, which are also put in self.problems.
+                If there are none, the file can be imported.
+        """
+        if scenarios is not None and stream is True:
+            raise HydraClientError("A subset of the scenarios can't be streamed. "
+                                   "Export the network with an index to read only them.")
+        self.template_id = template_id
+        with phase(self.instrumentation, 'get_template'):
+            self.get_template()
+
+        if stream is True:
+            return self.check_network_stream(network)
+        return self.check_network_data(self.load_network(network, scenarios=scenarios))
+
+    def get_validator(self):
+        """
+            A NetworkValidator for self.template and the server's attributes and dimensions
+        """
+        all_attributes = get_cached(self.cache, 'attributes', 'all', self.client.get_attributes)
+        dimensions = get_cached(self.cache, 'dimensions', 'all', self.client.get_dimensions)
+        return NetworkValidator(self.template, all_attributes, dimensions)
 
+    def check_network_data(self, json_data):
+        """
+            Check a network document which has been loaded, and put its problems in self.problems
+        """
+        with phase(self.instrumentation, 'validate'):
+            validator = self.get_validator()
+            self.problems = validator.check_network_data(json_data)
+            self.warnings.extend(validator.warnings)
+        return self.problems
+
+    def check_network_stream(self, network, manifest=None):
+        """
+            Check a network file one record at a time, in the order the streaming
+            import reads it, and put its problems in self.problems
+        """
+        if manifest is None:
+            manifest = reader.read_manifest(network)
+
+        with phase(self.instrumentation, 'validate'):
+            validator = self.get_validator()
+
+            json_attributes = {}
+            network_j = {}
+            with reader.open_network(network) as netfile:
+                records = reader.iter_records(netfile,
+                                              members={'attributes': (),
+                                                       'datasets': (),
+                                                       reader.NETWORK: reader.NETWORK_COLLECTIONS})
+                for path, value in records:
+                    if path.startswith('attributes.'):
+                        json_attributes[path[len('attributes.'):]] = value
+                    elif path.startswith('datasets.'):
+                        validator.add_datasets([path[len('datasets.'):]])
+                    elif path.startswith(reader.NETWORK + '.'):
+                        network_j[path[len(reader.NETWORK) + 1:]] = value
+            validator.check_attributes(json_attributes)
+            validator.check_network(network_j)
+
+            resource_paths = {reader.NODES: 'NODE', reader.LINKS: 'LINK', reader.GROUPS: 'GROUP'}
+            with reader.open_network(network) as netfile:
+                for path, resource in reader.iter_records(netfile, items=tuple(resource_paths)):
+                    validator.check_resource(resource_paths[path], resource)
+            validator.end_resources()
+
+            for path, value in reader.iter_scenario_records(network, manifest=manifest):
+                if path == reader.RESOURCESCENARIOS:
+                    validator.check_resource_scenario(value)
+                elif path == reader.RESOURCEGROUPITEMS:
+                    validator.check_group_item(value)
+                elif path == reader.SCENARIO:
+                    validator.end_scenario()
+                elif path == reader.SCENARIO + '.name':
+                    validator.scenario_name = value
+
+            self.problems = validator.finish()
+            self.warnings.extend(validator.warnings)
+        return self.problems
 
     def get_template(self):
-        self.template = self.client.get_template(self.template_id)
+        self.template = get_cached(self.cache, 'template', self.template_id,
+                                   lambda: self.client.get_template(self.template_id))
 
     def make_rs_lookup(self):
         if self.input_network.get('scenarios') is None:
@@ -153,13 +577,27 @@ class ImportJSON:
             return
 
         for rs in self.input_network['scenarios'][0].get('resourcescenarios', []):
-            self.rs_lookup[rs.resource_attr_id] = rs
+            self.rs_lookup[rs.resource_attr_id] = rs.resource_attr_id
+
+    def retarget_rs_lookup(self):
+        """
+            Point the data in scenario [0] of each duplicate resource attribute
+            which was removed at the resource attribute kept in its place, as
+            recorded in self.rs_lookup by update_type_and_attribute.
+        """
+        if len(self.input_network.get('scenarios') or []) == 0:
+            return
+        rs_lookup = self.rs_lookup
+        for rs in self.input_network['scenarios'][0].get('resourcescenarios', []):
+            rs.resource_attr_id = rs_lookup[rs.resource_attr_id]
 
     def import_template(self, template_file):
         """
             Import a template file
         """
         template = self.client.import_template_json(template_file)
+        if self.cache is not None:
+            self.cache.invalidate('template', template.id)
         return template.id
 
     def create_project(self, network):
@@ -198,8 +636,20 @@ class ImportJSON:
             args:
                 json_attributes: A list of attribute objects containing
         """
+        if self.resume.get('attr_negid_posid_lookup') is not None:
+            #The attributes were matched, and any missing ones created, before the import was interrupted
+            self.attr_negid_posid_lookup = self.resume['attr_negid_posid_lookup']
+            self.make_unit_lookup()
+            return
+
+        all_attributes = get_cached(self.cache, 'attributes', 'all', self.client.get_attributes)
 
-        all_attributes = self.client.get_attributes()
+        if self.cache is not None:
+            #Cached attributes may predate the template, in which case fetch them again
+            attr_ids = set(a.id for a in all_attributes)
+            if any(ta.attr_id not in attr_ids for tt in self.template.templatetypes for ta in tt.typeattrs):
+                self.cache.invalidate('attributes', 'all')
+                all_attributes = get_cached(self.cache, 'attributes', 'all', self.client.get_attributes)
 
         #Map a name/dimension combo to a positive DB id
         attr_name_id_lookup = {}
@@ -208,17 +658,22 @@ class ImportJSON:
             attr_name_id_lookup[(a.name.lower().strip(), a.dimension_id)] = a.id
             attr_id_lookup[a.id] = a
 
+        self.make_unit_lookup()
+
         typeattrs_name_lookup = {}
         for tt in self.template.templatetypes:
             for ta in tt.typeattrs:
                 attr = attr_id_lookup[ta.attr_id]
-                if ta.unit_id is not None:
-                    self.attr_id_unit_id_lookup[ta.attr_id] = ta.unit_id
                 typeattrs_name_lookup[attr.name] = attr
 
-        dimensions = self.client.get_dimensions()
+        dimensions = get_cached(self.cache, 'dimensions', 'all', self.client.get_dimensions)
         dimension_map = {d.name.lower(): d.id for d in dimensions}
 
+        #The name/dimension key of each of the file's attributes
+        neg_id_keys = {}
+        #The attributes which are not in the DB, keyed on name/dimension
+        missing_attributes = {}
+
         #Map the file's negative attr_id to the DB's positive ID
         for neg_id in json_attributes:
             attr_j = ExtendedDict(json_attributes[neg_id])
@@ -233,20 +688,80 @@ class ImportJSON:
                 attr_j = db_attr
                 #Add it to the name/dimension -> lookup
                 attr_name_id_lookup[(db_attr.name.lower().strip(), db_attr.dimension_id)] = db_attr.id
-            elif attr_name_id_lookup.get((attr_j.name.lower().strip(), attr_j.dimension_id)) is None:
 
-                #Attribute not in the DB?
-                #Add it
-                newattr = self.client.add_attribute(attr_j)
+            key = (attr_j.name.lower().strip(), attr_j.dimension_id)
+
+            if attr_name_id_lookup.get(key) is None:
+                #Attribute not in the DB? Add it with the others, below.
+                missing_attributes.setdefault(key, attr_j)
+
+            neg_id_keys[int(neg_id)] = key
+
+        #A template attribute may have been found for an attribute which was missing earlier on
+        new_attributes = [a for k, a in missing_attributes.items() if attr_name_id_lookup.get(k) is None]
+
+        with self.reference_lock:
+            if self.cache is not None and len(new_attributes) > 0:
+                #Another import sharing the cache may have created some of them since
+                all_attributes = get_cached(self.cache, 'attributes', 'all', self.client.get_attributes)
+                for a in all_attributes:
+                    attr_name_id_lookup.setdefault((a.name.lower().strip(), a.dimension_id), a.id)
+                new_attributes = [a for k, a in missing_attributes.items() if attr_name_id_lookup.get(k) is None]
+
+            new_db_attributes = self.add_attributes(new_attributes)
+            for newattr in new_db_attributes:
                 #Add it to the name/dimension -> lookup
                 attr_name_id_lookup[(newattr.name.lower().strip(), newattr.dimension_id)] = newattr.id
 
-            key = (attr_j.name.lower().strip(), attr_j.dimension_id)
+            if self.cache is not None and len(new_db_attributes) > 0:
+                self.cache.put('attributes', 'all', list(all_attributes) + new_db_attributes)
+
+        #Add the id to the negative id -> positive id map
+        for neg_id, key in neg_id_keys.items():
+            self.attr_negid_posid_lookup[neg_id] = attr_name_id_lookup[key]
 
-            #Add the id to the negative id -> positive id map
-            self.attr_negid_posid_lookup[int(neg_id)] = attr_name_id_lookup[(attr_j.name.lower().strip(),
-                                                                             attr_j.dimension_id)]
+        self.save_progress(attr_negid_posid_lookup=self.attr_negid_posid_lookup)
 
+    def make_unit_lookup(self):
+        """
+            Map each attribute in the template to the unit of its type attribute, if it has one
+        """
+        for tt in self.template.templatetypes:
+            for ta in tt.typeattrs:
+                if ta.unit_id is not None:
+                    self.attr_id_unit_id_lookup[ta.attr_id] = ta.unit_id
+
+    def save_progress(self, **progress):
+        """
+            Record a step of the import in the checkpoint, if there is one
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.update(**progress)
+
+    def add_attributes(self, attributes):
+        """
+            Create attributes in the DB, self.attribute_batch_size at a time.
+            If the server has no bulk 'add_attributes' call, fall back to
+            adding them one by one.
+            args:
+                attributes (list): The attributes to add
+            returns:
+                The new attributes, as returned by the server
+        """
+        new_attributes = []
+        for i in range(0, len(attributes), self.attribute_batch_size):
+            batch = attributes[i:i+self.attribute_batch_size]
+            if self.bulk_attributes is True:
+                try:
+                    new_attributes.extend(self.client.add_attributes(batch))
+                    continue
+                except RequestError as e:
+                    log.info("Unable to add attributes in bulk (%s). Adding them individually.", e)
+                    self.bulk_attributes = False
+            for attr_j in batch:
+                new_attributes.append(self.client.add_attribute(attr_j))
+
+        return new_attributes
 
     def update_type_and_attribute(self, resource_j):
         """
@@ -261,30 +776,32 @@ class ImportJSON:
             resource_j.types = [self.type_id_map[resource_j.types[0].name]]
 
         #Replace the attr_id for each resource attribute with the DB's correct ID
-        attr_ids = []
-        attr_lookup = {}
-        dupe_removed_attrs = {} # the new resources' attributes, but with any dupes removed
+        attr_negid_posid_lookup = self.attr_negid_posid_lookup
+        attr_id_unit_id_lookup = self.attr_id_unit_id_lookup
+        rs_lookup = self.rs_lookup
+        dupe_removed_attrs = {} # the new resources' attributes, keyed on attr ID, but with any dupes removed
         for ra_j in resource_j.attributes:
-            attr_id = self.attr_negid_posid_lookup[ra_j.attr_id]
+            attr_id = attr_negid_posid_lookup[ra_j.attr_id]
             #we have seen this attr id before, suggesting it's a dupe, so ignore it
-            if attr_id in attr_ids:
+            if attr_id in dupe_removed_attrs:
+                replacement_ra_id = dupe_removed_attrs[attr_id]['id']
+                self.duplicate_ra_lookup[ra_j.id] = replacement_ra_id
                 #is there any data associated to this RA?
-                if self.rs_lookup.get(ra_j.id) is not None:
+                if rs_lookup.get(ra_j.id) is not None:
                     #yes, so find the RA that we're actually using, and set it on the RS so it is pointing to
                     #something that'll actually be in the network
-                    replacement_ra_id = dupe_removed_attrs[attr_id]['id']
-                    if self.rs_lookup.get(replacement_ra_id):
+                    if rs_lookup.get(replacement_ra_id) is not None:
                         #there's data on both RAs, so err on the side of caution and leave the dupe in
                         raise HydraClientError(f"A duplicate attribute has been found for {ra_j.name} on {resource_j.name}.\n"+
-                                f"Delete one of the resource scenario {ra_j.id} or {dupe_removed_attrs[attr_id].id}")
+                                f"Delete one of the resource scenario {ra_j.id} or {replacement_ra_id}")
                     else:
-                        self.rs_lookup[ra_j.id]['resource_attr_id'] = dupe_removed_attrs[attr_id]['id']
+                        rs_lookup[ra_j.id] = replacement_ra_id
                 continue # this is a dupe we can remove, so ignore it.
             ra_j.attr_id = attr_id
             dupe_removed_attrs[attr_id] = ra_j
-            attr_ids.append(attr_id)
-            if self.attr_id_unit_id_lookup.get(attr_id):
-                self.ra_id_unit_id_lookup[ra_j.id] = self.attr_id_unit_id_lookup[attr_id]
+            unit_id = attr_id_unit_id_lookup.get(attr_id)
+            if unit_id:
+                self.ra_id_unit_id_lookup[ra_j.id] = unit_id
 
         resource_j.attributes = list(dupe_removed_attrs.values())
 
@@ -296,8 +813,35 @@ class ImportJSON:
 
         for s in self.input_network.get('scenarios', []):
             for rs in s.get("resourcescenarios", []):
-                if rs.dataset.unit_id is None and self.ra_id_unit_id_lookup.get(rs.resource_attr_id) is not None:
-                    rs.dataset.unit_id = self.ra_id_unit_id_lookup[rs.resource_attr_id]
+                self.resolve_dataset(rs)
+                self.update_unit(rs)
+
+    def resolve_dataset(self, rs):
+        """
+            If the RS refers to a dataset in the file's dataset table (format
+            version 2) rather than containing it, put a copy of the dataset on it.
+            Each RS gets its own copy as its unit may be set independently.
+        """
+        if rs.get('dataset_key') is not None:
+            rs.dataset = Dataset(self.datasets[rs.pop('dataset_key')])
+        return rs
+
+    def restore_values(self, resource_scenarios):
+        """
+            Rebuild the values of any datasets stored in columns. This is left
+            until they are sent, so only the compact form is held until then.
+        """
+        if self.columns is None:
+            return
+        for rs in resource_scenarios:
+            self.columns.restore(rs.dataset)
+
+    def update_unit(self, rs):
+        """
+            Set the unit of a single RS's dataset from its type attribute, if it is unset.
+        """
+        if rs.dataset.unit_id is None and self.ra_id_unit_id_lookup.get(rs.resource_attr_id) is not None:
+            rs.dataset.unit_id = self.ra_id_unit_id_lookup[rs.resource_attr_id]
 
 
     def update_type_and_attribute_ids(self):
@@ -313,17 +857,11 @@ class ImportJSON:
             self.input_network.types = [self.network_template_type]
 
         #map the name of the nodes, links and groups to its negative ID
-        for n_j in self.input_network.nodes:
-            self.name_maps['NODE'][n_j.name] = n_j.id
-            self.update_type_and_attribute(n_j)
-
-        for l_j in self.input_network.links:
-            self.name_maps['LINK'][l_j.name] = l_j.id
-            self.update_type_and_attribute(l_j)
-
-        for g_j in self.input_network.resourcegroups:
-            self.name_maps['GROUP'][g_j.name] = g_j.id
-            self.update_type_and_attribute(g_j)
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            name_map = self.name_maps[ref_key]
+            for resource_j in self.input_network[collection]:
+                name_map[resource_j.name] = resource_j.id
+                self.update_type_and_attribute(resource_j)
 
     def get_type_name_map(self):
         """
@@ -373,45 +911,482 @@ class ImportJSON:
 
         return reverse_id_lookups
 
-    def add_rules(self, json_rules):
+    def pop_scenario_data(self):
+        """
+            Remove the resource scenarios and group items from the scenarios of
+            the input network, so it can be created without them.
+            returns:
+                The removed data, as a list of records in the form produced
+                by iter_scenario_data
+        """
+        records = []
+        for scenario in self.input_network.get('scenarios', []):
+            for rs in scenario.get('resourcescenarios', []):
+                records.append((reader.RESOURCESCENARIOS, rs))
+            for rgi in scenario.get('resourcegroupitems', []):
+                records.append((reader.RESOURCEGROUPITEMS, rgi))
+            records.append((reader.SCENARIO, None))
+            scenario['resourcescenarios'] = []
+            scenario['resourcegroupitems'] = []
+        return records
+
+    def create_resource_attr_lookup(self, network_j, reverse_id_lookups):
+        """
+            Create a mapping from the negative resource attribute IDs which came
+            in the JSON to the IDs of the resource attributes just created. These
+            are matched on the resource and the attribute, which are unique together.
+            args:
+                network_j (dict): The new network, with its resource attributes
+                reverse_id_lookups (dict of dicts): As returned by create_reverse_id_lookups
+        """
+        new_ra_ids = {}
+        resources = [('NETWORK', [network_j]),
+                     ('NODE', network_j.nodes),
+                     ('LINK', network_j.links),
+                     ('GROUP', network_j.resourcegroups)]
+        for ref_key, new_resources in resources:
+            for resource in new_resources:
+                for ra in resource.get('attributes') or []:
+                    new_ra_ids[(ref_key, resource.id, ra.attr_id)] = ra.id
+
+        ra_lookup = {}
+        #The network's resource attributes are dicts once it has been sent
+        for ra_j in self.input_network.get('attributes', []):
+            ra_lookup[ra_j['id']] = new_ra_ids[('NETWORK', network_j.id, ra_j['attr_id'])]
+
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            for resource_j in self.input_network[collection]:
+                resource_id = reverse_id_lookups[ref_key][resource_j.id]
+                for ra_j in resource_j.attributes:
+                    ra_lookup[ra_j['id']] = new_ra_ids[(ref_key, resource_id, ra_j['attr_id'])]
+
+        return ra_lookup
+
+    def add_scenario_data(self, records):
+        """
+            Add the resource scenarios and group items to the scenarios of
+            the newly created network, sending the resource scenarios in batches
+            of about self.data_chunk_size bytes. When resuming, the data which
+            was sent before the import was interrupted is skipped.
+            args:
+                records (iterable): (path, value) records as produced by iter_scenario_data
+        """
+        if self.resume.get('resource_attr_lookup') is not None:
+            reverse_id_lookups = self.resume['reverse_id_lookups']
+            ra_lookup = self.resume['resource_attr_lookup']
+            scenario_ids = self.resume['scenario_ids']
+        else:
+            if not has_resource_attributes(self.new_network):
+                #Fetch the new network's resource attributes, as add_network didn't return them
+                self.new_network = self.client.get_network(network_id=self.new_network.id,
+                                                           include_maps=False,
+                                                           include_data=False)
+
+            reverse_id_lookups = self.create_reverse_id_lookups()
+            ra_lookup = self.create_resource_attr_lookup(self.new_network, reverse_id_lookups)
+
+            #The new scenarios are matched to those in the file by name, which is unique in a network
+            new_scenario_ids = {s.name: s.id for s in self.new_network.scenarios}
+            scenario_ids = [new_scenario_ids[s.name] for s in self.input_network.scenarios]
+
+            self.save_progress(reverse_id_lookups=reverse_id_lookups,
+                               resource_attr_lookup=ra_lookup,
+                               scenario_ids=scenario_ids)
+
+        #The scenario being sent, and the number of its resource scenarios already sent
+        progress = self.resume.get('scenario_data', {'scenario': 0, 'resourcescenarios': 0})
+
+        scenario_index = 0
+        rs_index = 0
+        batch = []
+        batch_size = 0
+        group_items = []
+        for path, value in records:
+            if scenario_index < progress['scenario']:
+                if path == reader.SCENARIO:
+                    scenario_index += 1
+                continue
+
+            if path == reader.RESOURCESCENARIOS:
+                rs_index += 1
+                if scenario_index == progress['scenario'] and rs_index <= progress['resourcescenarios']:
+                    continue
+                value.resource_attr_id = ra_lookup[value.resource_attr_id]
+                #The dataset's ID is from the server the file came from, so let this server find or create it
+                value.dataset.id = None
+                batch.append(value)
+                batch_size += estimate_size(value)
+                if batch_size >= self.data_chunk_size:
+                    self.add_resource_scenarios(scenario_ids[scenario_index], batch)
+                    self.save_progress(scenario_data={'scenario': scenario_index,
+                                                      'resourcescenarios': rs_index})
+                    batch = []
+                    batch_size = 0
+            elif path == reader.RESOURCEGROUPITEMS:
+                value.group_id = reverse_id_lookups['GROUP'][value.group_id]
+                id_key = {'NODE': 'node_id', 'LINK': 'link_id', 'GROUP': 'subgroup_id'}[value.ref_key]
+                #The exporter puts the negative ID of the item in ref_id
+                ref_id = value.get('ref_id')
+                if ref_id is None:
+                    ref_id = value[id_key]
+                value.ref_id = value[id_key] = reverse_id_lookups[value.ref_key][ref_id]
+                value.id = None
+                group_items.append(value)
+            elif path == reader.SCENARIO:
+                if len(batch) > 0:
+                    self.add_resource_scenarios(scenario_ids[scenario_index], batch)
+                    batch = []
+                    batch_size = 0
+                if len(group_items) > 0:
+                    self.client.add_resourcegroupitems(scenario_id=scenario_ids[scenario_index],
+                                                       items=to_dicts(group_items))
+                    group_items = []
+                scenario_index += 1
+                rs_index = 0
+                self.save_progress(scenario_data={'scenario': scenario_index, 'resourcescenarios': 0})
+
+    def add_resource_scenarios(self, scenario_id, resource_scenarios):
+        """
+            Send one batch of resource scenarios to a scenario
+        """
+        log.info("Adding %s resource scenarios to scenario %s", len(resource_scenarios), scenario_id)
+        self.restore_values(resource_scenarios)
+        self.client.update_resourcedata(scenario_id=scenario_id,
+                                        resource_scenarios=to_dicts(resource_scenarios))
+
+    def add_rules(self, json_rules, network_id=None):
+        """
+            Add the rules to the network, self.rule_workers at a time. The rule
+            type definitions they need are created first, once each. A rule
+            which fails is recorded in self.rule_errors and does not stop the others.
+            args:
+                json_rules (list): The rules
+                network_id (int): The network to add them to. Defaults to the new network.
+            returns:
+                The errors, as dicts with the 'index' and 'name' of the rule and the 'error'
+        """
+        if network_id is None:
+            network_id = self.new_network.id
+
+        #The rules added before the import was interrupted
+        rules_added = set(self.resume.get('rules', []))
+        json_rules = [(i, r) for i, r in enumerate(json_rules) if i not in rules_added]
 
-        rule_type_definition_codes = [rtd.code for rtd in self.client.get_rule_type_definitions()]
+        self.add_rule_type_definitions([r for i, r in json_rules])
 
-        for r in json_rules:
-            r['id'] = None
-            r['network_id'] = self.new_network.id
+        def add_rule(rule):
+            rule = dict(rule, id=None, network_id=network_id)
+            self.client.add_rule(ExtendedDict(rule))
 
-            #make sure rule types are added
-            for t in r.get('types', []):
-                if t['code'] not in rule_type_definition_codes:
+        self.rule_errors = []
+        with ThreadPoolExecutor(max_workers=self.rule_workers) as pool:
+            futures = {pool.submit(add_rule, r): (i, r) for i, r in json_rules}
+            try:
+                for future in as_completed(futures):
+                    i, r = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        log.warning("Unable to add rule %s (%s): %s", i, r.get('name'), e)
+                        self.rule_errors.append({'index': i, 'name': r.get('name'), 'error': str(e)})
+                        continue
+                    rules_added.add(i)
+                    self.save_progress(rules=sorted(rules_added))
+            except BaseException:
+                #Stop, but record the rules being added as it stopped, so they aren't added twice on resuming
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                rules_added.update(i for future, (i, r) in futures.items()
+                                   if not future.cancelled() and future.exception() is None)
+                self.save_progress(rules=sorted(rules_added))
+                raise
+
+        if len(self.rule_errors) > 0:
+            self.rule_errors.sort(key=lambda e: e['index'])
+            self.warnings.extend(f"Rule {e['name']}: {e['error']}" for e in self.rule_errors)
+            write_output(f"{len(self.rule_errors)} of {len(json_rules)} rules could not be added")
+
+        return self.rule_errors
+
+    def add_rule_type_definitions(self, json_rules):
+        """
+            Create the rule type definitions used by the rules which are not on
+            the server. Each is created once, from the first rule which has
+            its full definition, or from its code and name otherwise.
+        """
+        with self.reference_lock:
+            rule_type_definitions = get_cached(self.cache, 'rule_type_definitions', 'all',
+                                               self.client.get_rule_type_definitions)
+            existing_codes = set(rtd.code for rtd in rule_type_definitions)
+
+            missing = {}
+            for r in json_rules:
+                for t in r.get('types') or []:
+                    if t['code'] in existing_codes:
+                        continue
                     if t.get('typedefinition') is not None:
-                        self.client.add_rule_type_definition(ExtendedDict(t['typedefinition']))
+                        missing[t['code']] = t['typedefinition']
                     else:
                         # if the rule hasn't come with a typedefintiion, just make one where the name is the same as the code
-                        self.client.add_rule_type_definition(ExtendedDict({'code':t['code'], 'name': t['name']}))
+                        missing.setdefault(t['code'], {'code': t['code'], 'name': t['name']})
+
+            for typedefinition in missing.values():
+                self.client.add_rule_type_definition(ExtendedDict(typedefinition))
+
+            if self.cache is not None and len(missing) > 0:
+                self.cache.invalidate('rule_type_definitions', 'all')
+
+    def import_rules(self, network_file, network_id):
+        """
+            Add the rules in a network file to an existing network, such as
+            one imported from the file without its rules.
+            returns:
+                The errors, as add_rules
+        """
+        with reader.open_network(network_file) as netfile:
+            json_rules = json.load(netfile).get('rules', [])
+        with phase(self.instrumentation, 'add_rules'):
+            return self.add_rules(json_rules, network_id=network_id)
+
+    def apply_delta(self, delta_file, network_id):
+        """
+            Apply a delta, written by ExportJSON with `previous`, to an existing
+            network: usually one imported from the previous export. Resources and
+            scenarios are matched by name. Only the changes are sent, and the
+            data of each scenario is sent in batches of about self.data_chunk_size bytes.
+            args:
+                delta_file (str): The path to the delta file
+                network_id (int): The network to apply it to
+            returns:
+                The number of changes of each kind which were applied
+        """
+        with reader.open_network(delta_file) as netfile:
+            delta_j = json.load(netfile)
+        if delta_j.get('format') != delta.DELTA_FORMAT:
+            raise HydraClientError(f"{delta_file} is not a delta")
+
+        write_output("Applying delta")
+
+        with phase(self.instrumentation, 'get_network'):
+            self.new_network = self.client.get_network(network_id=network_id,
+                                                       include_maps=False,
+                                                       include_data=False)
+
+        network_types = self.new_network.types or []
+        self.template_id = network_types[0].template_id if len(network_types) > 0 else None
+        if self.template_id is not None:
+            with phase(self.instrumentation, 'get_template'):
+                self.get_template()
+        else:
+            self.template = ExtendedDict({'templatetypes': []})
+
+        self.init_lookups()
+        #Stands in for the network in the file, for get_type_name_map
+        self.input_network = ExtendedDict({'name': self.new_network.name, 'types': network_types})
 
-            self.client.add_rule(ExtendedDict(r))
+        with phase(self.instrumentation, 'make_attribute_id_mapping'):
+            self.make_attribute_id_mapping(delta_j['attributes'])
+        self.get_type_name_map()
 
+        with phase(self.instrumentation, 'update_resources'):
+            resource_ids = self.apply_resource_changes(delta_j)
 
-    def get_network_file_name(self, base_path, not_valid_filenames):
-        # Starting from the passed path, finds the first valid file and return its path
-        foldercontents = os.listdir(base_path)
+        with phase(self.instrumentation, 'update_resource_attributes'):
+            ra_ids = self.apply_resource_attribute_changes(delta_j, resource_ids)
 
-        #Remove any hidden files
-        visible_files = []
-        for f in foldercontents:
-            if f[0] != '.' and f[0] != '_' and f not in not_valid_filenames:
-                # We cannot add the just unzipped FILE!
-                visible_files.append(f)
+        with phase(self.instrumentation, 'update_scenarios'):
+            self.apply_scenario_changes(delta_j, ra_ids)
 
-        last_file = visible_files[-1] #This ensures you ignore hidden files.
+        counts = delta.count_changes(delta_j)
+        write_output(f"Delta applied to network {network_id}: " +
+                     ", ".join(f"{v} {k}" for k, v in counts.items() if v > 0))
+        return counts
 
-        data_dir = os.path.join(base_path, last_file)
+    def apply_resource_changes(self, delta_j):
+        """
+            Delete, update and add the nodes, links and groups in a delta.
+            Removed scenarios are deleted first, so their data is not moved.
+            returns:
+                The ID of each resource in the network, by ref key and name
+        """
+        network_id = self.new_network.id
+
+        scenario_ids = {s.name: s.id for s in self.new_network.scenarios}
+        for scenario_j in delta_j['scenarios']['removed']:
+            if scenario_j['name'] in scenario_ids:
+                self.client.delete_scenario(scenario_id=scenario_ids[scenario_j['name']])
+
+        resource_ids = {}
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            resource_ids[ref_key] = {r.name: r.id for r in self.new_network[collection]}
+
+        #Links go before the nodes at their ends
+        for ref_key, collection in reversed(RESOURCE_COLLECTIONS):
+            delete_call, arg_name = RESOURCE_CALLS[ref_key][2:]
+            for resource_j in delta_j['resources'][ref_key]['removed']:
+                resource_id = resource_ids[ref_key].pop(resource_j['name'], None)
+                if resource_id is None:
+                    log.warning("%s %s is not in the network", ref_key, resource_j['name'])
+                    continue
+                getattr(self.client, delete_call)(**{arg_name + '_id': resource_id, 'purge_data': True})
+
+        #Nodes go before the links which join them
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            add_call, update_call, _, arg_name = RESOURCE_CALLS[ref_key]
+            changes = delta_j['resources'][ref_key]
+
+            for change in changes['updated']:
+                resource_j = ExtendedDict(change['resource'])
+                resource_j.attributes = []
+                self.update_type_and_attribute(resource_j)
+                del resource_j['attributes']
+                resource_j.id = resource_ids[ref_key].pop(change['name'])
+                self.update_link_nodes(resource_j, delta_j, resource_ids)
+                getattr(self.client, update_call)(**{arg_name: to_dicts(resource_j)})
+                resource_ids[ref_key][resource_j.name] = resource_j.id
+
+            for resource_j in changes['added']:
+                resource_j = ExtendedDict(resource_j)
+                self.update_type_and_attribute(resource_j)
+                self.update_link_nodes(resource_j, delta_j, resource_ids)
+                new_resource = getattr(self.client, add_call)(**{'network_id': network_id,
+                                                                 arg_name: to_dicts(resource_j)})
+                resource_ids[ref_key][new_resource.name] = new_resource.id
+
+        return resource_ids
+
+    def update_link_nodes(self, resource_j, delta_j, resource_ids):
+        """
+            Point a link from a delta at the nodes of the network
+        """
+        for key in ('node_1_id', 'node_2_id'):
+            if resource_j.get(key) is not None:
+                resource_j[key] = resource_ids['NODE'][delta_j['node_names'][str(resource_j[key])]]
 
-        if os.path.isdir(data_dir):
-            # If it is a folder, navigate inside
-            data_dir = self.get_network_file_name(data_dir, not_valid_filenames)
+    def apply_resource_attribute_changes(self, delta_j, resource_ids):
+        """
+            Add and delete the resource attributes in a delta
+            returns:
+                The ID of each resource attribute in the network, keyed on
+                (ref_key, resource name, attr_id), as made by ra_key
+        """
+        network_id = self.new_network.id
+
+        for ra_j in delta_j['resource_attributes']['added']:
+            ref_key, name, attr_id = ra_j['ref']
+            resource_id = network_id if ref_key == 'NETWORK' else resource_ids[ref_key][name]
+            self.client.add_resource_attribute(resource_type=ref_key,
+                                               resource_id=resource_id,
+                                               attr_id=self.attr_negid_posid_lookup[attr_id],
+                                               is_var=ra_j.get('attr_is_var') or 'N')
+
+        #Fetch the resource attributes, including those of any new resources
+        self.new_network = self.client.get_network(network_id=network_id,
+                                                   include_maps=False,
+                                                   include_data=False)
+        ra_ids = {}
+        resources = [('NETWORK', [self.new_network])]
+        resources.extend((ref_key, self.new_network[collection]) for ref_key, collection in RESOURCE_COLLECTIONS)
+        for ref_key, network_resources in resources:
+            for resource in network_resources:
+                name = None if ref_key == 'NETWORK' else resource.name
+                for ra in resource.get('attributes') or []:
+                    ra_ids[(ref_key, name, ra.attr_id)] = ra.id
+
+        for ra_j in delta_j['resource_attributes']['removed']:
+            ra_id = ra_ids.pop(self.ra_key(ra_j['ref']), None)
+            if ra_id is not None:
+                self.client.delete_resource_attribute(resource_attr_id=ra_id)
+
+        return ra_ids
+
+    def ra_key(self, ref):
+        """
+            The key of a resource attribute referred to in a delta as [ref_key, resource name, attr_id]
+        """
+        ref_key, name, attr_id = ref
+        return (ref_key, name, self.attr_negid_posid_lookup[attr_id])
 
-        return data_dir
+    def apply_scenario_changes(self, delta_j, ra_ids):
+        """
+            Add the new scenarios in a delta, then update and delete the
+            resource scenarios of the new and changed scenarios.
+        """
+        network_id = self.new_network.id
+        scenario_ids = {s.name: s.id for s in self.new_network.scenarios}
+
+        for scenario_j in delta_j['scenarios']['added']:
+            new_scenario = {k: v for k, v in scenario_j.items() if k not in ('id', 'resourcescenarios')}
+            new_scenario.update({'network_id': network_id, 'resourcescenarios': [], 'resourcegroupitems': []})
+            new_scenario = self.client.add_scenario(network_id=network_id, scenario=new_scenario)
+            scenario_ids[new_scenario.name] = new_scenario.id
+
+        for scenario_j in delta_j['scenarios']['added'] + delta_j['scenarios']['updated']:
+            scenario_id = scenario_ids[scenario_j['name']]
+
+            batch = []
+            batch_size = 0
+            for rs in scenario_j['resourcescenarios']:
+                rs = ResourceScenario(rs)
+                rs.resource_attr_id = ra_ids[self.ra_key(delta_j['ra_refs'][str(rs.resource_attr_id)])]
+                rs.dataset.id = None
+                batch.append(rs)
+                batch_size += estimate_size(rs)
+                if batch_size >= self.data_chunk_size:
+                    self.add_resource_scenarios(scenario_id, batch)
+                    batch = []
+                    batch_size = 0
+            if len(batch) > 0:
+                self.add_resource_scenarios(scenario_id, batch)
+
+            for ref in scenario_j.get('removed', []):
+                ra_id = ra_ids.get(self.ra_key(ref))
+                if ra_id is not None:
+                    self.client.delete_resource_scenario(scenario_id=scenario_id, resource_attr_id=ra_id)
+
+def estimate_size(rs):
+    """
+        The approximate size of a resource scenario when sent to the server,
+        which is dominated by its dataset's value.
+    """
+    value = rs.dataset.get('value')
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return len(value) + 256
+
+def has_resource_attributes(network_j):
+    """
+        Whether a network, as returned by the server, includes the resource
+        attributes of itself and all its nodes, links and groups
+    """
+    resources = [network_j] + [r for _, collection in RESOURCE_COLLECTIONS
+                               for r in network_j.get(collection) or []]
+    return all(r.get('attributes') is not None for r in resources)
 
+#The members of a network, resource or scenario which hold compact records
+RECORD_MEMBERS = ('attributes', 'resourcescenarios', 'resourcegroupitems')
 
+def extend_resource(resource):
+    """
+        An ExtendedDict of a compacted network, node, link, group or scenario
+        whose records are left as they are. ExtendedDict makes a new
+        ExtendedDict of each item of every list it is given, records included.
+    """
+    resource_j = ExtendedDict({k: v for k, v in resource.items() if k not in RECORD_MEMBERS})
+    for key in RECORD_MEMBERS:
+        if key in resource:
+            resource_j[key] = resource[key]
+    return resource_j
+
+def extend_network(network):
+    """
+        An ExtendedDict of a compacted network (see records.compact_network),
+        with its nodes, links, groups and scenarios made into ExtendedDicts
+        by extend_resource, so their records are kept.
+    """
+    network_j = extend_resource({k: v for k, v in network.items() if k not in reader.NETWORK_COLLECTIONS})
+    for collection in reader.NETWORK_COLLECTIONS:
+        if network.get(collection) is not None:
+            network_j[collection] = [extend_resource(r) for r in network[collection]]
+    return network_j
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Random access to the parts of a network file through its index, so
+    that one scenario, or the data of a few resources, can be read without
+    parsing the rest of the file.
+
+    The index is written by an export with `index`, as described in
+    writer.IndexedJSONStreamWriter. It is a member of a zipped export
+    (_index.json), or a file beside any other (<network name>_index.json).
+    A plain JSON file is memory-mapped, and only the requested parts are
+    parsed. A compressed file still has to be decompressed up to the last
+    part requested, but nothing else is parsed.
+"""
+import os
+import mmap
+import json
+import zipfile
+import logging
+
+from hydra_client import HydraClientError
+
+from . import reader
+from . import compression
+from .writer import INDEX_FORMAT
+
+log = logging.getLogger(__name__)
+
+#The member of a zip archive holding the index. The underscore keeps it
+#from being taken for the network file.
+INDEX_MEMBER = '_index.json'
+#The suffix of the file beside a network file holding its index
+INDEX_SUFFIX = '_index'
+
+def get_index_location(network):
+    """
+        The location of the index file beside a network file
+    """
+    base = compression.strip_extension(network)
+    base = os.path.splitext(base)[0]
+    return base + INDEX_SUFFIX + '.json'
+
+def read_index(network):
+    """
+        Return the index of a network file, or None if it doesn't have one
+    """
+    if zipfile.is_zipfile(network):
+        with zipfile.ZipFile(network, 'r') as zip_file:
+            if INDEX_MEMBER not in zip_file.namelist():
+                return None
+            with zip_file.open(INDEX_MEMBER, 'r') as index_file:
+                index = json.load(index_file)
+    else:
+        location = get_index_location(network)
+        if not os.path.exists(location):
+            return None
+        #The index must be newer than the file it describes
+        if os.path.getmtime(location) < os.path.getmtime(network):
+            log.warning("Ignoring the index %s, which is older than %s", location, network)
+            return None
+        with open(location, 'r') as index_file:
+            index = json.load(index_file)
+
+    if index.get('format') != INDEX_FORMAT:
+        raise HydraClientError("The index of %s is not valid" % network)
+    return index
+
+def select_scenarios(scenarios, selection):
+    """
+        Pick scenarios (or their index entries) by ID or name.
+        args:
+            scenarios (list): Dicts with an 'id' and 'name'
+            selection (list): The IDs or names to pick
+        returns:
+            The scenarios picked, in file order
+    """
+    selection = [str(s) for s in selection]
+    picked = [s for s in scenarios if str(s.get('id')) in selection or s.get('name') in selection]
+
+    found = set(str(s.get('id')) for s in picked) | set(s.get('name') for s in picked)
+    missing = [s for s in selection if s not in found]
+    if len(missing) > 0:
+        raise HydraClientError("Scenarios not found: %s. The file has: %s"
+                               % (', '.join(missing),
+                                  ', '.join('%s (%s)' % (s.get('name'), s.get('id')) for s in scenarios)))
+    return picked
+
+class NetworkIndex:
+    """
+        Reads parts of a network file using its index
+    """
+
+    def __init__(self, network, index=None):
+        self.network = network
+        self.index = index if index is not None else read_index(network)
+        if self.index is None:
+            raise HydraClientError("%s has no index. Export it with --index." % network)
+
+    def read_ranges(self, ranges):
+        """
+            Read the bytes of each [start, end) of the uncompressed file
+            returns:
+                A list of bytes, in the order of ranges
+        """
+        ranges = [tuple(r) for r in ranges]
+        if len(ranges) == 0:
+            return []
+
+        if not zipfile.is_zipfile(self.network) and compression.detect_codec(self.network) is None:
+            with open(self.network, 'rb') as network_file:
+                with mmap.mmap(network_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return [mapped[start:end] for start, end in ranges]
+
+        #A compressed stream can only seek forward cheaply, so read in file order
+        parts = [None] * len(ranges)
+        with reader.open_network(self.network) as stream:
+            for i in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+                start, end = ranges[i]
+                stream.seek(start)
+                parts[i] = stream.read(end - start)
+        return parts
+
+    def load_sections(self, paths):
+        """
+            Parse the values at the given paths ('attributes', 'network.nodes' ...)
+            returns:
+                A dict of the value of each path
+        """
+        sections = self.index['sections']
+        parts = self.read_ranges([sections[p] for p in paths])
+        return {path: json.loads(part) for path, part in zip(paths, parts)}
+
+    def get_scenarios(self, selection=None):
+        """
+            The index entries of the scenarios with the given IDs or names, or of all of them
+        """
+        if selection is None:
+            return self.index['scenarios']
+        return select_scenarios(self.index['scenarios'], selection)
+
+    def load_network(self, scenarios=None):
+        """
+            Load the network file as reader.load_network does, but with
+            only some of its scenarios.
+            args:
+                scenarios (list): The IDs or names of the scenarios to load, or None for all
+        """
+        entries = self.get_scenarios(scenarios)
+
+        top_paths = [p for p in self.index['sections'] if '.' not in p and p != 'network']
+        network_paths = [p for p in self.index['sections']
+                         if p.startswith('network.') and p != 'network.scenarios']
+
+        parts = self.read_ranges([self.index['sections'][p] for p in top_paths + network_paths] +
+                                 [e['range'] for e in entries])
+        values = [json.loads(part) for part in parts]
+
+        json_data = dict(zip(top_paths, values))
+        json_data['network'] = {p.split('.', 1)[1]: v for p, v in zip(network_paths, values[len(top_paths):])}
+        json_data['network']['scenarios'] = values[len(top_paths) + len(network_paths):]
+        return json_data
+
+    def load_resource_scenarios(self, scenario, ref_key, resource_ids):
+        """
+            Load the resource scenarios of some resources in a scenario
+            args:
+                scenario: The ID or name of the scenario
+                ref_key (str): NODE, LINK, GROUP or NETWORK
+                resource_ids (list): The IDs of the resources, as in the file
+            returns:
+                A dict of the resource scenarios of each resource ID which has any
+        """
+        blocks = self.get_scenarios([scenario])[0]['resources'].get(ref_key, {})
+        resource_ids = [str(r) for r in resource_ids if str(r) in blocks]
+        parts = self.read_ranges([blocks[r] for r in resource_ids])
+        return {r: json.loads(b'[' + part + b']') for r, part in zip(resource_ids, parts)}
+
+def load_network(network, scenarios):
+    """
+        Load a network file with only the given scenarios, by ID or name.
+        Only they are read if the file has an index. Otherwise, the whole
+        file is loaded and the others dropped.
+    """
+    index = read_index(network)
+    if index is not None:
+        return NetworkIndex(network, index=index).load_network(scenarios)
+
+    log.warning("%s has no index, so all of it is read", network)
+    json_data = reader.load_network(network)
+    json_data['network']['scenarios'] = select_scenarios(json_data['network']['scenarios'], scenarios)
+    return json_data
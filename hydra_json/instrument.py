@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Phase-level instrumentation of imports and exports: the wall time, peak
+    memory, and the number of client calls and payload bytes of each phase.
+"""
+import sys
+import json
+import time
+import logging
+import threading
+import contextlib
+import collections
+import tracemalloc
+
+from .records import Record
+
+try:
+    import resource
+except ImportError:
+    #Not available on Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+class Instrumentation:
+    """
+        Records the phases of an import or export. Phases may be nested, in
+        which case a phase's figures include those of the phases inside it.
+
+        Usage:
+            instrumentation = Instrumentation()
+            ImportJSON(client, instrumentation=instrumentation).import_network(...)
+            report = instrumentation.report()
+    """
+
+    def __init__(self, trace_memory=False, measure_payload=False):
+        """
+            args:
+                trace_memory (bool): Measure each phase's peak Python memory
+                                     with tracemalloc. This is accurate but slow.
+                                     Otherwise there is no figure for each phase,
+                                     only the process's lifetime peak RSS in the report.
+                measure_payload (bool): Measure the size of each client call's
+                                        arguments and result, as JSON. This
+                                        encodes every request and response
+                                        again, so it is slow on large networks.
+        """
+        self.trace_memory = trace_memory
+        self.measure_payload = measure_payload
+
+        self.lock = threading.Lock()
+        self.call_counts = collections.Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        self.phases = []
+        self.stack = []
+        #The peak traced memory of each phase in the stack, before the latest
+        #reset of tracemalloc's peak, including that of the phases inside it
+        self.peaks = []
+        self.started = time.time()
+
+    def wrap(self, client):
+        """
+            Return a proxy of the client which counts calls made through it
+        """
+        return InstrumentedClient(client, self)
+
+    def record_call(self, name, args, kwargs, result):
+        sent = received = 0
+        if self.measure_payload is True:
+            sent = payload_size([args, kwargs])
+            received = payload_size(result)
+        with self.lock:
+            self.call_counts[name] += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+            Record the block of code inside this context as a phase
+        """
+        self.stack.append(name)
+        full_name = '.'.join(self.stack)
+
+        if self.trace_memory is True:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            else:
+                #Keep the outer phase's peak so far, as it's about to be reset
+                self.peaks[-1] = max(self.peaks[-1], tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            self.peaks.append(0)
+
+        start_calls = collections.Counter(self.call_counts)
+        start_sent = self.bytes_sent
+        start_received = self.bytes_received
+        start = time.time()
+        try:
+            yield
+        finally:
+            entry = {'name': full_name,
+                     'wall_time': time.time() - start,
+                     'calls': dict(self.call_counts - start_calls),
+                     'bytes_sent': self.bytes_sent - start_sent,
+                     'bytes_received': self.bytes_received - start_received}
+            if self.trace_memory is True:
+                entry['peak_memory'] = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if len(self.peaks) > 0:
+                    self.peaks[-1] = max(self.peaks[-1], entry['peak_memory'])
+                else:
+                    tracemalloc.stop()
+            self.phases.append(entry)
+            self.stack.pop()
+            log.info("Phase %s took %.3fs", full_name, entry['wall_time'])
+
+    def report(self):
+        """
+            The structured report of all the phases recorded so far
+        """
+        return {'started': self.started,
+                'wall_time': time.time() - self.started,
+                'calls': dict(self.call_counts),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                #The peak since the process started, not just of what was recorded
+                'lifetime_peak_rss': peak_rss(),
+                'phases': list(self.phases)}
+
+    def write_report(self, path):
+        """
+            Write the report as JSON to a file, or to stderr if path is '-'
+        """
+        if path == '-':
+            json.dump(self.report(), sys.stderr, indent=2)
+            sys.stderr.write('\n')
+        else:
+            with open(path, 'w') as report_file:
+                json.dump(self.report(), report_file, indent=2)
+
+class InstrumentedClient:
+    """
+        A proxy of a hydra client which reports every call to an Instrumentation
+    """
+
+    def __init__(self, client, instrumentation):
+        self._client = client
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self._instrumentation.record_call(name, args, kwargs, result)
+            return result
+        return call
+
+def phase(instrumentation, name):
+    """
+        A context recording a phase if there is an instrumentation, or doing nothing if not.
+    """
+    if instrumentation is None:
+        return contextlib.nullcontext()
+    return instrumentation.phase(name)
+
+def payload_size(value):
+    """
+        The size of a value, encoded as JSON
+    """
+    try:
+        return len(json.dumps(value, default=lambda v: v.as_dict() if isinstance(v, Record) else str(v)))
+    except (TypeError, ValueError):
+        return 0
+
+def peak_rss():
+    """
+        The peak resident memory of the process since it started, in bytes, if it is available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
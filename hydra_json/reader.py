@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+#\
+# ImportJSON is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# ImportJSON is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with ImportJSON.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Readers for network files. The file is read as a stream (straight out of
+    a zip archive or compressed file if need be) and, for the streaming
+    import, parsed one record at a time so that a network never has to be
+    loaded as a single document.
+"""
+import json
+import logging
+import zipfile
+import contextlib
+
+from hydra_client import HydraClientError
+
+from . import compression
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+log = logging.getLogger(__name__)
+
+#Paths (in ijson prefix notation) of the parts of a network file
+NETWORK = 'network'
+NODES = 'network.nodes.item'
+LINKS = 'network.links.item'
+GROUPS = 'network.resourcegroups.item'
+SCENARIO = 'network.scenarios.item'
+RESOURCESCENARIOS = 'network.scenarios.item.resourcescenarios.item'
+RESOURCEGROUPITEMS = 'network.scenarios.item.resourcegroupitems.item'
+RULES = 'rules.item'
+
+#The members of a sharded network archive, in which each scenario's data is in its own file
+SHARDED_NETWORK_FILE = 'network.json'
+SHARDED_MANIFEST_FILE = 'manifest.json'
+
+#The members of a network and a scenario which are read one record at a time
+NETWORK_COLLECTIONS = ('nodes', 'links', 'resourcegroups', 'scenarios')
+SCENARIO_COLLECTIONS = ('resourcescenarios', 'resourcegroupitems')
+
+def iter_records(stream, items=(), members=None):
+    """
+        Walk a JSON stream once, building one value at a time.
+        args:
+            stream: A binary file-like object
+            items (iterable): Paths to arrays items, for example 'network.nodes.item'.
+                              Each item is yielded as (path, item)
+            members (dict): A mapping from the path of an object to the keys
+                            which should be skipped in it. Every other member of
+                            the object is yielded as (path.key, value) and the end
+                            of the object as (path, None).
+        returns:
+            A generator of (path, value) tuples, in file order.
+    """
+    if ijson is None:
+        raise HydraClientError("The streaming import requires the 'ijson' package.")
+
+    members = {} if members is None else members
+
+    building = None
+    pending = None
+    builder = None
+    for path, event, value in ijson.parse(stream, use_float=True):
+        if building is None:
+            if path in members:
+                if event == 'map_key':
+                    pending = None if value in members[path] else '%s.%s' % (path, value)
+                elif event == 'end_map':
+                    pending = None
+                    yield path, None
+                continue
+            if path != pending and path not in items:
+                continue
+            if event in ('map_key', 'end_map', 'end_array'):
+                continue
+            building = path
+            builder = ijson.ObjectBuilder()
+
+        builder.event(event, value)
+
+        #Either a scalar or the close of the container which started this value
+        if path == building and event not in ('start_map', 'start_array', 'map_key'):
+            yield building, builder.value
+            building = None
+            pending = None
+            builder = None
+
+def get_visible_members(zip_file):
+    """
+        List the files in a zip archive, ignoring directories and any
+        hidden ('.' or '_' prefixed) files or folders.
+    """
+    candidates = []
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        parts = [p for p in info.filename.split('/') if p != '']
+        if any(p[0] in ('.', '_') for p in parts):
+            continue
+        candidates.append(info.filename)
+    return candidates
+
+def get_network_member(zip_file):
+    """
+        Pick the network file from the index of a zip archive.
+    """
+    candidates = get_visible_members(zip_file)
+
+    if len(candidates) == 0:
+        raise HydraClientError("No network file found in %s" % zip_file.filename)
+
+    return candidates[-1]
+
+def read_manifest(network):
+    """
+        Return the manifest of a sharded network archive, or None if the
+        file is not one.
+    """
+    if not zipfile.is_zipfile(network):
+        return None
+    with zipfile.ZipFile(network, 'r') as zip_file:
+        if SHARDED_MANIFEST_FILE not in zip_file.namelist():
+            return None
+        with zip_file.open(SHARDED_MANIFEST_FILE, 'r') as manifest_file:
+            return json.load(manifest_file)
+
+def get_bundle_members(network):
+    """
+        Return the network files in a zip archive of several networks, or
+        None if the file is a single network, zipped or not.
+    """
+    if not zipfile.is_zipfile(network):
+        return None
+    with zipfile.ZipFile(network, 'r') as zip_file:
+        if SHARDED_MANIFEST_FILE in zip_file.namelist():
+            return None
+        members = get_visible_members(zip_file)
+    if len(members) < 2:
+        return None
+    return members
+
+@contextlib.contextmanager
+def open_network(network, member=None):
+    """
+        Open a network file for reading as a binary stream. Zip archives and
+        compressed files are decompressed as they are read, without extracting
+        them to disk. The compression is recognised from the file's first bytes.
+        args:
+            network (str): The path to the file
+            member (str): The member of a zip archive to open. By default, the
+                          network file of a sharded archive or the only visible
+                          file in any other archive.
+    """
+    if zipfile.is_zipfile(network):
+        log.info("File is zipped...reading from the archive..")
+        with zipfile.ZipFile(network, 'r') as zip_file:
+            if member is None:
+                if SHARDED_MANIFEST_FILE in zip_file.namelist():
+                    member = SHARDED_NETWORK_FILE
+                else:
+                    member = get_network_member(zip_file)
+            with zip_file.open(member, 'r') as stream:
+                yield stream
+    else:
+        codec = compression.detect_codec(network)
+        if codec is not None:
+            log.info("File is compressed with %s...", codec)
+            with compression.open_reader(network, codec) as stream:
+                yield stream
+        else:
+            with open(network, 'rb') as stream:
+                yield stream
+
+def load_network(network, member=None):
+    """
+        Load a whole network file as a dict. The scenario data of a sharded
+        file is put back on its scenarios.
+        args:
+            member (str): The network file to load from a zip archive of
+                          several networks, as listed by get_bundle_members
+    """
+    with open_network(network, member=member) as netfile:
+        json_data = json.load(netfile)
+
+    if member is not None:
+        return json_data
+
+    manifest = read_manifest(network)
+    if manifest is not None:
+        for scenario, shard in zip(json_data['network']['scenarios'], manifest['scenarios']):
+            with open_network(network, member=shard['file']) as shardfile:
+                scenario.update(json.load(shardfile))
+
+    return json_data
+
+def iter_scenario_records(network, manifest=None, items=()):
+    """
+        Walk the scenarios of a network file, as iter_records does with
+            items=(RESOURCESCENARIOS, RESOURCEGROUPITEMS) and members={SCENARIO: SCENARIO_COLLECTIONS},
+        for both single and sharded files. In a sharded file, each scenario's
+        resource scenarios and group items are read from its own file.
+        args:
+            network (str): The path to the file
+            manifest (dict): The manifest of a sharded file, from read_manifest
+            items (tuple): Any other paths in the network file to yield
+    """
+    if manifest is None:
+        with open_network(network) as stream:
+            yield from iter_records(stream,
+                                    items=(RESOURCESCENARIOS, RESOURCEGROUPITEMS) + tuple(items),
+                                    members={SCENARIO: SCENARIO_COLLECTIONS})
+        return
+
+    shards = iter(manifest['scenarios'])
+    with open_network(network) as stream:
+        for path, value in iter_records(stream, items=items, members={SCENARIO: SCENARIO_COLLECTIONS}):
+            if path == SCENARIO:
+                shard = next(shards)
+                with open_network(network, member=shard['file']) as shard_stream:
+                    shard_records = iter_records(shard_stream,
+                                                 items=('resourcescenarios.item',
+                                                        'resourcegroupitems.item'))
+                    for shard_path, shard_value in shard_records:
+                        yield '%s.%s' % (SCENARIO, shard_path), shard_value
+            yield path, value
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Compact records for the collections of which a network has the most
+    members: resource attributes, resource scenarios with their datasets,
+    and resource group items.
+
+    A record holds its fields in slots rather than a dict of its own, so it
+    takes a fraction of the memory of an ExtendedDict. Like an ExtendedDict,
+    its fields can be read and set as attributes or items, and a field which
+    has not been set reads as None. Fields which are not declared are kept in
+    a small dict, so no data is lost. A record encodes to the same JSON as
+    the dict it was made from, with encode_record as the encoder's default.
+"""
+
+class Record:
+    """
+        The base of the compact records. Subclasses declare their fields as __slots__.
+    """
+    __slots__ = ('_extra',)
+
+    #Fields whose value is itself a record, and the class of that record
+    nested = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = tuple(cls.__slots__)
+        cls.field_set = frozenset(cls.__slots__)
+
+    def __init__(self, values=None, **kwargs):
+        object.__setattr__(self, '_extra', None)
+        if values is not None:
+            self.update(values)
+        if len(kwargs) > 0:
+            self.update(kwargs)
+
+    def update(self, values):
+        #Set declared fields directly, as this is done for every record read
+        field_set = self.field_set
+        nested = self.nested
+        for key, value in values.items():
+            if key in field_set and key not in nested:
+                object.__setattr__(self, key, value)
+            else:
+                self[key] = value
+
+    def __getattr__(self, name):
+        #Only called for fields which have not been set, and undeclared fields
+        if name.startswith('__'):
+            raise AttributeError(name)
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None:
+            return extra.get(name)
+        return None
+
+    def __setattr__(self, name, value):
+        if name in self.nested and isinstance(value, dict):
+            value = self.nested[name](value)
+        if name in self.field_set:
+            object.__setattr__(self, name, value)
+        else:
+            if self._extra is None:
+                object.__setattr__(self, '_extra', {})
+            self._extra[name] = value
+
+    def __getitem__(self, key):
+        if key in self.field_set:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    __setitem__ = __setattr__
+
+    def __delitem__(self, key):
+        if key in self.field_set:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.items()))
+
+    def keys(self):
+        keys = [f for f in self.fields if f in self]
+        if self._extra is not None:
+            keys.extend(self._extra)
+        return keys
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if len(default) > 0:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def as_dict(self):
+        """
+            The record as a dict. Nested records are left as they are.
+        """
+        #Read the slots directly, as this is done for every record written
+        values = {}
+        for field in self.fields:
+            try:
+                values[field] = object.__getattribute__(self, field)
+            except AttributeError:
+                pass
+        if self._extra is not None:
+            values.update(self._extra)
+        return values
+
+class ResourceAttribute(Record):
+    __slots__ = ('id', 'attr_id', 'ref_key', 'node_id', 'link_id', 'group_id', 'network_id',
+                 'name', 'dimension_id', 'attr_is_var', 'cr_date')
+
+class Dataset(Record):
+    __slots__ = ('id', 'name', 'type', 'value', 'unit_id', 'hidden', 'hash', 'metadata',
+                 'cr_date', 'created_by', 'value_columns')
+
+class ResourceScenario(Record):
+    __slots__ = ('resource_attr_id', 'scenario_id', 'dataset', 'dataset_key')
+    nested = {'dataset': Dataset}
+
+class ResourceGroupItem(Record):
+    __slots__ = ('id', 'ref_key', 'ref_id', 'node_id', 'link_id', 'subgroup_id', 'group_id',
+                 'scenario_id')
+
+def compact_resource(resource):
+    """
+        Replace the attributes of a network, node, link or group (a dict) with records
+    """
+    if resource.get('attributes') is not None:
+        resource['attributes'] = [ResourceAttribute(a) for a in resource['attributes']]
+    return resource
+
+def compact_scenario(scenario):
+    """
+        Replace the resource scenarios and group items of a scenario (a dict) with records
+    """
+    if scenario.get('resourcescenarios') is not None:
+        scenario['resourcescenarios'] = [ResourceScenario(rs) for rs in scenario['resourcescenarios']]
+    if scenario.get('resourcegroupitems') is not None:
+        scenario['resourcegroupitems'] = [ResourceGroupItem(rgi) for rgi in scenario['resourcegroupitems']]
+    return scenario
+
+def compact_network(network):
+    """
+        Replace the bulk collections of a network (a dict, as read from a file) with records
+    """
+    compact_resource(network)
+    for collection in ('nodes', 'links', 'resourcegroups'):
+        for resource in network.get(collection) or []:
+            compact_resource(resource)
+    for scenario in network.get('scenarios') or []:
+        compact_scenario(scenario)
+    return network
+
+def encode_record(value):
+    """
+        For use as the default of a JSON encoder
+    """
+    if isinstance(value, Record):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def to_dicts(value):
+    """
+        A copy of a value in which any records are replaced by dicts, for
+        passing to code which expects only JSON types, such as the client.
+    """
+    if isinstance(value, (Record, dict)):
+        return {k: to_dicts(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_dicts(v) for v in value]
+    return value
+
+def replace_records(value):
+    """
+        Replace any records in a value, and in the dicts and lists in it, with
+        dicts, in place, as to_dicts does in a copy. Each record can be freed
+        as soon as its dict is made, so the value isn't held twice. Dicts and
+        lists are kept, so their ExtendedDicts stay as they are.
+    """
+    if isinstance(value, Record):
+        return {k: replace_records(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = replace_records(item)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            value[i] = replace_records(item)
+    return value
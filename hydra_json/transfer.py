@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Copy a network from one Hydra server to another, without writing it to
+    a file. The network is exported from the source server as it would be
+    for a sharded file, and handed to the importer as it is. Its scenarios
+    are then fetched from the source one at a time, the next while the
+    current one is being sent, and their data sent to the target in batches,
+    as in a chunked import.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from hydra_client import HydraClientError
+from hydra_client.output import write_output
+
+from . import reader
+from .exporter import ExportJSON
+from .importer import ImportJSON
+from .instrument import phase
+from .cache import MemoryCache
+
+log = logging.getLogger(__name__)
+
+def copy_network(source_client, target_client, network_id, template_id, project_id,
+                 network_name=None, scenario_id=None, include_results=True,
+                 source_cache=None, target_cache=None, instrumentation=None,
+                 data_chunk_size=None):
+    """
+        Copy a network from the source server to the target server.
+        args:
+            source_client: A logged-in client of the server to copy from
+            target_client: A logged-in client of the server to copy to
+            network_id (int): The network to copy
+            template_id (int): The template on the target server which matches the network
+            project_id (int): The project on the target server to put it in.
+                              If None, one is created.
+            network_name (str): A name for the copy, rather than the network's own
+            scenario_id (int): Copy only this scenario
+            include_results (bool): Copy the scenarios' results
+            source_cache, target_cache (ReferenceCache): Optional caches of each server's reference data
+            instrumentation (Instrumentation): Records the time and calls of each phase
+            data_chunk_size (int): The approximate size of each batch of scenario data, in bytes
+        returns:
+            The new network, as returned by the target server
+    """
+    if template_id is None:
+        raise HydraClientError("Please specifiy a template")
+
+    exporter = ExportJSON(source_client, cache=source_cache, instrumentation=instrumentation)
+    if target_cache is None:
+        #The network is checked against the target's attributes and dimensions before
+        #it is imported, so hold them for the import rather than fetching them again
+        target_cache = MemoryCache()
+    importer = ImportJSON(target_client, cache=target_cache, instrumentation=instrumentation)
+    if data_chunk_size is not None:
+        importer.data_chunk_size = data_chunk_size
+
+    write_output("Retrieving Network")
+    with phase(instrumentation, 'export'):
+        export_data = exporter.get_export_data(network_id, scenario_id=scenario_id,
+                                               include_results=include_results, sharded=True)
+
+    #The scenarios' data is sent separately, after the network is created
+    scenarios = list(export_data['network'].scenarios)
+    for scenario in export_data['network'].scenarios:
+        scenario.resourcescenarios = []
+        scenario.resourcegroupitems = []
+
+    importer.template_id = template_id
+    with phase(instrumentation, 'get_template'):
+        importer.get_template()
+    importer.init_lookups()
+
+    with phase(instrumentation, 'read'):
+        json_rules = importer.read_network_data(export_data)
+
+    scenario_data = iter_scenario_data(exporter, importer, scenarios, include_results=include_results)
+    new_network = importer.save_network(json_rules, project_id, network_name=network_name,
+                                        scenario_data=scenario_data)
+
+    write_output(f"Network {network_id} copied to {target_client.url} with ID {new_network.id}.")
+    return new_network
+
+def iter_scenario_data(exporter, importer, scenarios, include_results=True):
+    """
+        Fetch the data of each scenario from the source server, yielding it
+        as the records of ImportJSON.iter_scenario_data. The next scenario is
+        fetched while the records of the current one are being sent.
+    """
+    def fetch(scenario):
+        return exporter.get_scenario_data(scenario.id, include_results=include_results)
+
+    if len(scenarios) == 0:
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(fetch, scenarios[0])
+        for i in range(len(scenarios)):
+            scenario_j = pending.result()
+            if i + 1 < len(scenarios):
+                pending = pool.submit(fetch, scenarios[i + 1])
+
+            if len(importer.duplicate_ra_lookup) > 0:
+                retarget_duplicates(scenario_j, importer.duplicate_ra_lookup)
+            for rs in scenario_j.resourcescenarios:
+                importer.update_unit(rs)
+                yield reader.RESOURCESCENARIOS, rs
+            for rgi in scenario_j.resourcegroupitems:
+                yield reader.RESOURCEGROUPITEMS, rgi
+            yield reader.SCENARIO, None
+
+def retarget_duplicates(scenario_j, duplicate_ra_lookup):
+    """
+        Point the data of each duplicate resource attribute which was removed from
+        the network at the resource attribute kept in its place, as ImportJSON does
+        for the data in a file.
+        args:
+            scenario_j (dict): A scenario, with its resource scenarios
+            duplicate_ra_lookup (dict): The kept resource attribute ID of each removed one
+        returns:
+            None
+    """
+    ra_ids = set(rs.resource_attr_id for rs in scenario_j.resourcescenarios)
+    for rs in scenario_j.resourcescenarios:
+        replacement_ra_id = duplicate_ra_lookup.get(rs.resource_attr_id)
+        if replacement_ra_id is None:
+            continue
+        if replacement_ra_id in ra_ids:
+            #there's data on both RAs, so err on the side of caution, as the importer does
+            raise HydraClientError(f"A duplicate attribute has been found in scenario {scenario_j.name}.\n"+
+                    f"Delete one of the resource scenario {rs.resource_attr_id} or {replacement_ra_id}")
+        rs.resource_attr_id = replacement_ra_id
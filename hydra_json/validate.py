@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# hydra-json is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# hydra-json is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with hydra-json.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    A check of a network file against a template and the server's
+    attributes and dimensions, which finds everything that would stop the
+    file being imported before anything is written to the server.
+
+    The file is read once. The lookups it is checked against are made
+    when the validator is created, and the file's own (its attributes,
+    resources and resource attributes) as it is read. A file is given to
+    the validator in the order the importer reads it: its attributes and
+    datasets, the network, its nodes, links and groups, and then its
+    scenarios, each followed by end_scenario.
+"""
+import logging
+
+log = logging.getLogger(__name__)
+
+#The number of problems described. Any more are only counted.
+MAX_PROBLEMS = 1000
+
+#The ref key and network collection of each type of resource
+RESOURCE_COLLECTIONS = (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups'))
+
+#The field of a resource group item holding the ID of each type of resource
+GROUP_ITEM_ID_KEYS = {'NODE': 'node_id', 'LINK': 'link_id', 'GROUP': 'subgroup_id'}
+
+def describe_problems(problems):
+    """
+        A message listing the problems found in a file
+    """
+    return '\n'.join(["The network can't be imported:"] + ['  %s' % p for p in problems])
+
+class NetworkValidator:
+    """
+        Finds the problems in a network file which would stop it being
+        imported with a template, as ImportJSON would find them, without
+        writing anything to the server.
+        args:
+            template: The template, from the server
+            attributes (list): All the attributes on the server
+            dimensions (list): All the dimensions on the server
+    """
+
+    def __init__(self, template, attributes, dimensions):
+        #The problems found, and their number, which may be more than are kept
+        self.problems = []
+        self.num_problems = 0
+        #What is worth reporting, but doesn't stop the network being imported
+        self.warnings = []
+
+        self.dimension_map = {d.name.lower(): d.id for d in dimensions}
+
+        attr_id_lookup = {a.id: a for a in attributes}
+        self.template_name = template.name
+        self.type_names = set()
+        self.has_network_type = False
+        #The attributes of the template, keyed on name, as the importer uses them in place of the file's
+        self.typeattrs_name_lookup = {}
+        for tt in template.templatetypes:
+            self.type_names.add(tt.name)
+            if tt.resource_type == 'NETWORK':
+                self.has_network_type = True
+            for ta in tt.typeattrs:
+                attr = attr_id_lookup.get(ta.attr_id)
+                if attr is not None:
+                    self.typeattrs_name_lookup[attr.name] = attr
+
+        #The name and dimension of each of the file's attributes, which the importer
+        #matches on, keyed on its ID in the file
+        self.attribute_keys = {}
+        #The keys of the file's dataset table
+        self.dataset_keys = set()
+        #Whether the network has a type, without which the importer doesn't look up the others
+        self.network_has_type = False
+        #The IDs of the resources in the file, and their names, by ref key
+        self.resource_ids = {'NODE': set(), 'LINK': set(), 'GROUP': set()}
+        self.resource_names = {'NODE': set(), 'LINK': set(), 'GROUP': set()}
+        #The name of each link and the IDs of its nodes, checked once all the nodes are read
+        self.link_nodes = []
+        #The IDs of the resource attributes in the file
+        self.resource_attr_ids = set()
+        #The description of each resource with duplicate attributes, and the IDs of
+        #its resource attributes of each duplicated attribute, the one kept first
+        self.duplicates = []
+        #The IDs of the duplicate resource attributes which the importer removes,
+        #and of those which have data in the first scenario
+        self.removed_ra_ids = set()
+        self.duplicate_ra_ids = set()
+        self.duplicate_data = set()
+
+        #The scenario being read, counting from 0
+        self.scenario_index = 0
+        self.scenario_name = None
+
+    def add_problem(self, problem):
+        self.num_problems += 1
+        if len(self.problems) < MAX_PROBLEMS:
+            self.problems.append(problem)
+
+    def add_warning(self, warning):
+        log.warning(warning)
+        self.warnings.append(warning)
+
+    def check_attributes(self, json_attributes):
+        """
+            Check the file's attributes, keyed on their ID in the file
+        """
+        for neg_id, attr_j in json_attributes.items():
+            dimension = attr_j.get('dimension')
+            dimension_id = None
+            if dimension is not None and dimension.strip() != '':
+                dimension_id = self.dimension_map.get(dimension.lower())
+                if dimension_id is None:
+                    self.add_problem(f"Attribute {attr_j.get('name')} ({neg_id}) has the dimension "
+                                     f"'{dimension}', which is not on the server")
+
+            #An attribute with the same name in the template is used instead
+            db_attr = self.typeattrs_name_lookup.get(attr_j.get('name'))
+            if db_attr is not None:
+                key = (db_attr.name.lower().strip(), db_attr.dimension_id)
+            else:
+                key = ((attr_j.get('name') or '').lower().strip(), dimension_id)
+
+            self.attribute_keys[int(neg_id)] = key
+
+    def add_datasets(self, dataset_keys):
+        """
+            Record the keys of the file's dataset table
+        """
+        self.dataset_keys.update(dataset_keys)
+
+    def check_network(self, network_j):
+        """
+            Check the network's own type and resource attributes
+        """
+        if len(network_j.get('types') or []) > 0:
+            self.network_has_type = True
+            if self.has_network_type is False:
+                self.add_problem(f"The network has a type, but template {self.template_name} "
+                                 f"has no network type")
+        self.check_resource_attributes(f"Network {network_j.get('name')}", network_j,
+                                       remove_duplicates=False)
+
+    def check_resource(self, ref_key, resource_j):
+        """
+            Check a node, link or group
+        """
+        name = resource_j.get('name')
+        description = f"{ref_key.capitalize()} {name}"
+
+        if name in self.resource_names[ref_key]:
+            self.add_problem(f"There is more than one {ref_key.lower()} called {name}")
+        self.resource_names[ref_key].add(name)
+        self.resource_ids[ref_key].add(resource_j.get('id'))
+
+        types = resource_j.get('types') or []
+        if len(types) > 0:
+            type_name = types[0].get('name')
+            if self.network_has_type is False:
+                self.add_problem(f"{description} has the type {type_name}, but the network has "
+                                 f"no type, so the types of its nodes, links and groups can't be found")
+            elif type_name not in self.type_names:
+                self.add_problem(f"{description} has the type {type_name}, which is not in "
+                                 f"template {self.template_name}")
+
+        if ref_key == 'LINK':
+            self.link_nodes.append((name, resource_j.get('node_1_id'), resource_j.get('node_2_id')))
+
+        self.check_resource_attributes(description, resource_j)
+
+    def check_resource_attributes(self, description, resource_j, remove_duplicates=True):
+        """
+            Check that the resource attributes of a resource refer to the file's
+            attributes, and find any duplicates which the importer removes
+            args:
+                remove_duplicates (bool): Whether the importer removes the resource's
+                                          duplicate attributes. It does for nodes,
+                                          links and groups, but not the network.
+        """
+        #The resource attributes of each attribute, the first of which is kept
+        kept = {}
+        for ra_j in resource_j.get('attributes') or []:
+            self.resource_attr_ids.add(ra_j.get('id'))
+            key = self.attribute_keys.get(ra_j.get('attr_id'))
+            if key is None:
+                self.add_problem(f"{description}: resource attribute {ra_j.get('id')} has the attribute "
+                                 f"{ra_j.get('attr_id')}, which is not in the file's attributes")
+                continue
+            kept.setdefault(key, []).append(ra_j.get('id'))
+
+        if remove_duplicates is False:
+            return
+
+        for key, ra_ids in kept.items():
+            if len(ra_ids) > 1:
+                self.duplicates.append((description, key[0], ra_ids))
+                self.duplicate_ra_ids.update(ra_ids)
+                self.removed_ra_ids.update(ra_ids[1:])
+
+    def end_resources(self):
+        """
+            Check what could only be checked once all the resources are read
+        """
+        node_ids = self.resource_ids['NODE']
+        for name, node_1_id, node_2_id in self.link_nodes:
+            for node_id in (node_1_id, node_2_id):
+                if node_id not in node_ids:
+                    self.add_problem(f"Link {name} joins the node {node_id}, which is not in the network")
+        self.link_nodes = []
+
+    def get_scenario_description(self):
+        if self.scenario_name is not None:
+            return f"Scenario {self.scenario_name}"
+        return f"Scenario {self.scenario_index + 1}"
+
+    def check_resource_scenario(self, rs):
+        """
+            Check a resource scenario of the current scenario
+        """
+        ra_id = rs.get('resource_attr_id')
+        if ra_id not in self.resource_attr_ids:
+            self.add_problem(f"{self.get_scenario_description()}: there is data for the resource "
+                             f"attribute {ra_id}, which is not in the network")
+        elif self.scenario_index == 0:
+            if ra_id in self.duplicate_ra_ids:
+                self.duplicate_data.add(ra_id)
+        elif ra_id in self.removed_ra_ids:
+            #Only the data in the first scenario is moved to the resource attribute which is kept
+            self.add_problem(f"{self.get_scenario_description()}: there is data for the resource "
+                             f"attribute {ra_id}, a duplicate which is removed")
+
+        dataset_key = rs.get('dataset_key')
+        if dataset_key is not None:
+            if dataset_key not in self.dataset_keys:
+                self.add_problem(f"{self.get_scenario_description()}: the data of resource attribute "
+                                 f"{ra_id} is the dataset {dataset_key}, which is not in the file's datasets")
+        elif rs.get('dataset') is None:
+            self.add_problem(f"{self.get_scenario_description()}: resource attribute {ra_id} has no dataset")
+
+    def check_group_item(self, rgi):
+        """
+            Check a resource group item of the current scenario
+        """
+        if rgi.get('group_id') not in self.resource_ids['GROUP']:
+            self.add_problem(f"{self.get_scenario_description()}: an item is in the group "
+                             f"{rgi.get('group_id')}, which is not in the network")
+
+        ref_key = rgi.get('ref_key')
+        if ref_key not in GROUP_ITEM_ID_KEYS:
+            self.add_problem(f"{self.get_scenario_description()}: an item of group {rgi.get('group_id')} "
+                             f"has the ref key {ref_key}")
+            return
+        #The exporter puts the ID of the item in ref_id
+        ref_id = rgi.get('ref_id')
+        if ref_id is None:
+            ref_id = rgi.get(GROUP_ITEM_ID_KEYS[ref_key])
+        if ref_id not in self.resource_ids[ref_key]:
+            self.add_problem(f"{self.get_scenario_description()}: group {rgi.get('group_id')} contains "
+                             f"the {ref_key.lower()} {ref_id}, which is not in the network")
+
+    def end_scenario(self):
+        """
+            Move on to the next scenario
+        """
+        self.scenario_index += 1
+        self.scenario_name = None
+
+    def check_scenario(self, scenario_j):
+        """
+            Check a whole scenario, with its data
+        """
+        self.scenario_name = scenario_j.get('name')
+        for rs in scenario_j.get('resourcescenarios') or []:
+            self.check_resource_scenario(rs)
+        for rgi in scenario_j.get('resourcegroupitems') or []:
+            self.check_group_item(rgi)
+        self.end_scenario()
+
+    def finish(self):
+        """
+            Check what could only be checked once the whole file is read
+            returns:
+                The problems found. Any warnings are in self.warnings.
+        """
+        if self.scenario_index == 0:
+            self.add_warning("The network has no scenarios")
+
+        for description, attr_name, ra_ids in self.duplicates:
+            with_data = [ra_id for ra_id in ra_ids if ra_id in self.duplicate_data]
+            if len(with_data) > 1:
+                self.add_problem(f"{description} has the attribute {attr_name} more than once, with data "
+                                 f"on each in the first scenario. Delete all but one of the resource "
+                                 f"scenarios {', '.join(str(i) for i in with_data)}")
+
+        log.info("%s problems found in the network", self.num_problems)
+        if self.num_problems > len(self.problems):
+            return self.problems + ['... and %s more problems' % (self.num_problems - len(self.problems))]
+        return self.problems
+
+    def check_network_data(self, json_data):
+        """
+            Check a whole network document, as loaded by reader.load_network
+            returns:
+                The problems found
+        """
+        network_j = json_data['network']
+
+        self.check_attributes(json_data.get('attributes') or {})
+        self.add_datasets(json_data.get('datasets') or {})
+        self.check_network(network_j)
+        for ref_key, collection in RESOURCE_COLLECTIONS:
+            for resource_j in network_j.get(collection) or []:
+                self.check_resource(ref_key, resource_j)
+        self.end_resources()
+
+        for scenario_j in network_j.get('scenarios') or []:
+            self.check_scenario(scenario_j)
+
+        return self.finish()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) Copyright 2015 University of Manchester\
+#\
+# ExportJSON is free software: you can redistribute it and/or modify\
+# it under the terms of the GNU General Public License as published by\
+# the Free Software Foundation, either version 3 of the License, or\
+# (at your option) any later version.\
+#\
+# ExportJSON is distributed in the hope that it will be useful,\
+# but WITHOUT ANY WARRANTY; without even the implied warranty of\
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the\
+# GNU General Public License for more details.\
+# \
+# You should have received a copy of the GNU General Public License\
+# along with ExportJSON.  If not, see <http://www.gnu.org/licenses/>\
+#
+"""
+    Incremental writer for network files, used by the exporter so that
+    a network is never held in memory as a single JSON string.
+"""
+import json
+
+from .records import encode_record
+
+#Paths (in the same notation as the reader) of the containers which are
+#written one member at a time. Anything else is encoded as a single value.
+STREAMED = {
+    '',
+    'network',
+    'network.nodes',
+    'network.links',
+    'network.resourcegroups',
+    'network.scenarios',
+    'network.scenarios.item',
+    'network.scenarios.item.resourcescenarios',
+    'network.scenarios.item.resourcegroupitems',
+}
+
+#The 'format' of an index of a network file, written by IndexedJSONStreamWriter
+INDEX_FORMAT = 'index'
+INDEXED_SCENARIO = 'network.scenarios.item'
+INDEXED_RESOURCESCENARIOS = 'network.scenarios.item.resourcescenarios'
+#The ref key and network collection of each type of resource
+INDEXED_RESOURCES = (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups'))
+
+#The same, for the files holding a single scenario's data in a sharded export
+SHARD_STREAMED = {
+    '',
+    'resourcescenarios',
+    'resourcegroupitems',
+}
+
+class JSONStreamWriter:
+    """
+        Write a document to a text stream section by section. Only one
+        record (a node, a resource scenario...) is encoded at any one time.
+    """
+
+    def __init__(self, stream, newlines=False, streamed=STREAMED):
+        self.stream = stream
+        self.streamed = streamed
+        if newlines is True:
+            self.encoder = json.JSONEncoder(indent=0, default=encode_record)
+            self.separator = ',\n'
+            self.open_sep = '\n'
+        else:
+            self.encoder = json.JSONEncoder(default=encode_record)
+            self.separator = ', '
+            self.open_sep = ''
+
+    def write(self, value, path=''):
+        """
+            Write a value to the stream, descending into any container
+            whose path is in self.streamed.
+        """
+        if path in self.streamed and isinstance(value, dict):
+            self.emit('{' + self.open_sep)
+            for i, (key, member) in enumerate(value.items()):
+                if i > 0:
+                    self.emit(self.separator)
+                self.emit(self.encoder.encode(key) + ': ')
+                self.write(member, key if path == '' else '%s.%s' % (path, key))
+            self.emit(self.open_sep + '}')
+        elif path in self.streamed and isinstance(value, list):
+            self.emit('[' + self.open_sep)
+            for i, item in enumerate(value):
+                if i > 0:
+                    self.emit(self.separator)
+                self.write(item, path + '.item')
+            self.emit(self.open_sep + ']')
+        else:
+            self.emit(self.encoder.encode(value))
+
+    def emit(self, text):
+        self.stream.write(text)
+
+class IndexedJSONStreamWriter(JSONStreamWriter):
+    """
+        A JSONStreamWriter which also records where each part of a network
+        file is, as byte offsets into the uncompressed document, in self.index:
+            sections: The [start, end) of each top-level value and each
+                      value of the network, keyed on its path ('network.nodes').
+            scenarios: For each scenario, its id, name and [start, end), the
+                       [start, end) of its resourcescenarios and resourcegroupitems,
+                       and, under 'resources', of the resource scenarios of each
+                       resource, keyed on ref key and resource ID.
+        The resource scenarios of a scenario are written grouped by resource,
+        so each resource's are in one block.
+        The encoder escapes any non-ASCII characters, so the number of
+        characters written is the number of bytes.
+    """
+
+    def __init__(self, stream, newlines=False, streamed=STREAMED):
+        super().__init__(stream, newlines=newlines, streamed=streamed)
+        self.position = 0
+        self.index = {'format': INDEX_FORMAT, 'sections': {}, 'scenarios': []}
+        #The ref key and ID of the resource of each resource attribute
+        self.resource_lookup = {}
+        #The order of the resources in the file
+        self.resource_order = {}
+        #The resource whose resource scenarios are being written
+        self.current_resource = None
+
+    def emit(self, text):
+        self.stream.write(text)
+        self.position += len(text)
+
+    def write(self, value, path=''):
+        if path == '' and isinstance(value, dict) and value.get('network') is not None:
+            self.make_resource_lookup(value['network'])
+        elif path == INDEXED_SCENARIO:
+            self.index['scenarios'].append({'id': value.get('id'),
+                                            'name': value.get('name'),
+                                            'sections': {},
+                                            'resources': {}})
+        elif path == INDEXED_RESOURCESCENARIOS and isinstance(value, list):
+            value = sorted(value, key=lambda rs: self.resource_order.get(rs['resource_attr_id'], -1))
+            self.current_resource = None
+
+        start = self.position
+        super().write(value, path)
+        end = self.position
+
+        if path == '':
+            return
+        if path.count('.') == 0 or (path.count('.') == 1 and path.startswith('network.')):
+            self.index['sections'][path] = [start, end]
+        elif path == INDEXED_SCENARIO:
+            self.index['scenarios'][-1]['range'] = [start, end]
+        elif path.startswith(INDEXED_SCENARIO + '.') and path.count('.') == 3:
+            self.index['scenarios'][-1]['sections'][path.rsplit('.', 1)[1]] = [start, end]
+        elif path == INDEXED_RESOURCESCENARIOS + '.item':
+            self.add_resource_scenario(value, start, end)
+
+    def make_resource_lookup(self, network):
+        """
+            Map each resource attribute of the network to its resource
+        """
+        resources = [('NETWORK', network)]
+        for ref_key, collection in INDEXED_RESOURCES:
+            resources.extend((ref_key, r) for r in network.get(collection) or [])
+
+        for order, (ref_key, resource) in enumerate(resources):
+            for ra in resource.get('attributes') or []:
+                self.resource_lookup[ra['id']] = (ref_key, str(resource['id']))
+                self.resource_order[ra['id']] = order
+
+    def add_resource_scenario(self, rs, start, end):
+        """
+            Extend the block of the resource of a resource scenario which has just
+            been written, or start a new one
+        """
+        resource = self.resource_lookup.get(rs['resource_attr_id'])
+        if resource is None:
+            self.current_resource = None
+            return
+        ref_key, resource_id = resource
+        blocks = self.index['scenarios'][-1]['resources'].setdefault(ref_key, {})
+        if resource == self.current_resource:
+            blocks[resource_id][1] = end
+        else:
+            blocks[resource_id] = [start, end]
+            self.current_resource = resource
@@ -8,6 +8,11 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[],
+    extras_require={
+        'streaming': ['ijson>=3.1'],
+        'columnar': ['numpy'],
+        'zstd': ['zstandard'],
+    },
     entry_points='''
     [console_scripts]
     hydra-json=hydra_json.cli:start_cli
@@ -0,0 +1,298 @@
+"""
+    Two stand-ins for a Hydra server. RecordingClient records exactly what
+    an import sends, for the tests of the importer and exporter on a small
+    hand-built network. The round-trip tests import and export synthetic
+    networks (see benchmarks/synthetic.py) through the in-process fake server
+    in benchmarks/fake_server.py.
+"""
+import copy
+import json
+import hashlib
+import collections
+
+import pytest
+
+from hydra_client import RequestError
+from hydra_client.objects import ExtendedDict
+
+from benchmarks import synthetic
+from benchmarks.fake_server import FakeHydraClient
+from benchmarks.run import quiet
+
+from hydra_json import ImportJSON, ExportJSON
+
+TYPES = (('Network', 'NETWORK'), ('Demand', 'NODE'), ('Supply', 'NODE'), ('edge', 'LINK'))
+ATTRIBUTES = {'-1': {'name': 'flow', 'dimension': None},
+              '-2': {'name': 'demand', 'dimension': 'Volume'}}
+DIMENSIONS = [{'id': 1, 'name': 'Volume'}, {'id': 2, 'name': 'Flow'}]
+
+#The size of the synthetic network
+NODES = 6
+SYNTHETIC_ATTRIBUTES = 3
+SCENARIOS = 2
+
+class RecordingClient:
+    """
+        Serves a template with the types of the test network, records the
+        network sent to it by an import, and holds it, with the IDs a server
+        would give it, to be exported again.
+    """
+    def __init__(self, bulk_attributes=True):
+        self.attributes = []
+        self.payloads = []
+        self.networks = {}
+        self.next_id = 0
+        #Whether the server has the bulk add_attributes call
+        self.bulk_attributes = bulk_attributes
+        self.call_counts = collections.Counter()
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    def get_template(self, template_id):
+        self.call_counts['get_template'] += 1
+        return ExtendedDict({'id': template_id, 'name': 'Test',
+                             'templatetypes': [{'id': i + 1, 'name': name, 'resource_type': ref_key,
+                                                'template_id': template_id, 'typeattrs': []}
+                                               for i, (name, ref_key) in enumerate(TYPES)]})
+
+    def get_template_as_json(self, template_id=None):
+        self.call_counts['get_template_as_json'] += 1
+        return {'id': template_id, 'name': 'Test'}
+
+    def get_attributes(self):
+        self.call_counts['get_attributes'] += 1
+        return [ExtendedDict(a) for a in self.attributes]
+
+    def get_dimensions(self):
+        self.call_counts['get_dimensions'] += 1
+        return [ExtendedDict(d) for d in DIMENSIONS]
+
+    def get_dimension(self, dimension_id):
+        self.call_counts['get_dimension'] += 1
+        return ExtendedDict(DIMENSIONS[dimension_id - 1])
+
+    def create_attribute(self, attr):
+        new_attr = {'id': len(self.attributes) + 1, 'name': attr['name'], 'dimension_id': attr.get('dimension_id')}
+        self.attributes.append(new_attr)
+        return ExtendedDict(new_attr)
+
+    def add_attribute(self, attr):
+        self.call_counts['add_attribute'] += 1
+        return self.create_attribute(attr)
+
+    def add_attributes(self, attrs):
+        self.call_counts['add_attributes'] += 1
+        if self.bulk_attributes is False:
+            raise RequestError("add_attributes is not a known function")
+        return [self.create_attribute(attr) for attr in attrs]
+
+    def add_network(self, network):
+        network = json.loads(json.dumps(network))
+        self.payloads.append(copy.deepcopy(network))
+
+        network['id'] = len(self.payloads)
+        attributes = {a['id']: a for a in self.attributes}
+        ids = {}
+        ra_ids = {}
+        for collection in ('nodes', 'links', 'resourcegroups'):
+            for resource in network[collection]:
+                ids[resource['id']] = resource['id'] = self.new_id()
+        for resource in [network] + network['nodes'] + network['links'] + network['resourcegroups']:
+            for ra in resource['attributes']:
+                ra_ids[ra['id']] = ra['id'] = self.new_id()
+                ra['name'] = attributes[ra['attr_id']]['name']
+                ra['dimension_id'] = attributes[ra['attr_id']]['dimension_id']
+        for link in network['links']:
+            link['node_1_id'] = ids[link['node_1_id']]
+            link['node_2_id'] = ids[link['node_2_id']]
+        for scenario in network['scenarios']:
+            scenario['id'] = self.new_id()
+            for rs in scenario['resourcescenarios']:
+                rs['resource_attr_id'] = ra_ids[rs['resource_attr_id']]
+                dataset = rs['dataset']
+                dataset['hash'] = int(hashlib.sha1(dataset['value'].encode('utf-8')).hexdigest()[:15], 16)
+                dataset['id'] = dataset['hash']
+        self.networks[network['id']] = network
+        return ExtendedDict(network)
+
+    def describe(self, index=0):
+        """
+            What the network sent in an import holds, independent of its IDs:
+            the types and attributes of its resources, and the value of each
+            of their attributes in each scenario, by name.
+        """
+        network = self.payloads[index]
+        attr_names = {a['id']: a['name'] for a in self.attributes}
+        resources = {}
+        ra_names = {}
+        for ref_key, collection in (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups')):
+            for resource in network[collection]:
+                resources[(ref_key, resource['name'])] = {
+                    'types': [t['name'] for t in resource['types']],
+                    'attributes': sorted(attr_names[ra['attr_id']] for ra in resource['attributes'])}
+                for ra in resource['attributes']:
+                    ra_names[ra['id']] = (ref_key, resource['name'], attr_names[ra['attr_id']])
+        scenarios = {s['name']: {ra_names[rs['resource_attr_id']]: rs['dataset']['value']
+                                 for rs in s['resourcescenarios']}
+                     for s in network['scenarios']}
+        return {'name': network['name'], 'resources': resources, 'scenarios': scenarios}
+
+    def get_network(self, network_id=None, scenario_id=None, include_data=True, **kwargs):
+        network = copy.deepcopy(self.networks[network_id])
+        if scenario_id is not None:
+            network['scenarios'] = [s for s in network['scenarios'] if s['id'] in scenario_id]
+        if include_data is False:
+            for scenario in network['scenarios']:
+                scenario['resourcescenarios'] = []
+        return ExtendedDict(network)
+
+    def get_scenario(self, scenario_id=None, include_data=True, **kwargs):
+        self.call_counts['get_scenario'] += 1
+        for network in self.networks.values():
+            for scenario in network['scenarios']:
+                if scenario['id'] == scenario_id:
+                    return ExtendedDict(copy.deepcopy(scenario))
+        raise KeyError(scenario_id)
+
+    def get_networks(self, project_id=None, include_data=False):
+        return [ExtendedDict({'id': n['id'], 'name': n['name']}) for n in self.networks.values()
+                if n['project_id'] == project_id]
+
+    def get_resource_rules(self, ref_key=None, ref_id=None):
+        return []
+
+    def get_rule_type_definitions(self):
+        return []
+
+    def add_rule_type_definition(self, typedefinition):
+        pass
+
+    def add_rule(self, rule):
+        pass
+
+def make_network():
+    """
+        A network of three nodes and two links, in two scenarios. The first node has
+        a duplicate of its 'flow' attribute, which holds its data in the first scenario.
+        Both scenarios have the same value for the last link's attributes.
+    """
+    next_id = [0]
+    def new_id():
+        next_id[0] -= 1
+        return next_id[0]
+
+    #The resource attributes with data in the first scenario, and in the second
+    resource_attr_ids = ([], [])
+    def make_attributes(ref_key, duplicate=False):
+        attributes = [{'id': new_id(), 'ref_key': ref_key, 'attr_id': -1, 'name': 'flow'},
+                      {'id': new_id(), 'ref_key': ref_key, 'attr_id': -2, 'name': 'demand'}]
+        resource_attr_ids[1].extend(ra['id'] for ra in attributes)
+        if duplicate is True:
+            attributes.append({'id': new_id(), 'ref_key': ref_key, 'attr_id': -1, 'name': 'flow'})
+            resource_attr_ids[0].extend(ra['id'] for ra in attributes[1:])
+        else:
+            resource_attr_ids[0].extend(ra['id'] for ra in attributes)
+        return attributes
+
+    nodes = [{'id': new_id(), 'name': 'Node %s' % n, 'x': n, 'y': 0,
+              'types': [{'name': 'Demand' if n % 2 == 0 else 'Supply'}],
+              'attributes': make_attributes('NODE', duplicate=n == 0)}
+             for n in range(3)]
+    links = [{'id': new_id(), 'name': 'Link %s' % l,
+              'node_1_id': nodes[l]['id'], 'node_2_id': nodes[l + 1]['id'],
+              'types': [{'name': 'edge'}], 'attributes': make_attributes('LINK')}
+             for l in range(2)]
+    shared = resource_attr_ids[1][-2:]
+    scenarios = [{'id': s + 1, 'name': 'Scenario %s' % s,
+                  'resourcescenarios': [{'resource_attr_id': ra_id,
+                                         'dataset': {'id': None, 'type': 'scalar', 'unit_id': None,
+                                                     'name': 'data', 'metadata': {},
+                                                     'value': str(i if ra_id in shared else s * 100 + i)}}
+                                        for i, ra_id in enumerate(resource_attr_ids[s])],
+                  'resourcegroupitems': []}
+                 for s in range(2)]
+
+    return {'attributes': ATTRIBUTES,
+            'network': {'id': 1, 'name': 'Test network', 'types': [{'name': 'Network'}],
+                        'attributes': [], 'nodes': nodes, 'links': links,
+                        'resourcegroups': [], 'scenarios': scenarios},
+            'rules': []}
+
+@pytest.fixture
+def network_file(tmp_path):
+    path = tmp_path / 'network.json'
+    with open(path, 'w') as network_file:
+        json.dump(make_network(), network_file)
+    return str(path)
+
+def make_client():
+    """
+        A fake server with the synthetic template loaded
+    """
+    return FakeHydraClient(template=synthetic.make_template(attributes=SYNTHETIC_ATTRIBUTES))
+
+def import_file(client, network_file, **kwargs):
+    """
+        Import a network file into a fake server, returning the new network
+    """
+    importer = ImportJSON(client)
+    with quiet():
+        importer.import_network(network_file, client.template_id, 1, **kwargs)
+    return importer.new_network
+
+def export_network(client, network_id, target_dir, **kwargs):
+    """
+        Export a network from a fake server, returning the location of the file
+    """
+    with quiet():
+        return ExportJSON(client).export_network(network_id, target_dir=str(target_dir), **kwargs)
+
+def get_contents(client, network_id):
+    """
+        What a network holds, independent of its IDs: the names and types of
+        its resources, the attribute names of each, the ends of its links, its
+        rules, and the value of every attribute of every resource in each
+        scenario, by name.
+    """
+    network = client.get_network(network_id=network_id, include_data=True)
+    attributes = {a.id: a.name for a in client.get_attributes()}
+
+    resources = {}
+    ra_lookup = {}
+    node_names = {n.id: n.name for n in network.nodes}
+    for ref_key, collection in (('NODE', 'nodes'), ('LINK', 'links'), ('GROUP', 'resourcegroups')):
+        for resource in network[collection] or []:
+            types = [t.get('name') for t in resource.get('types') or []]
+            entry = {'types': types,
+                     'attributes': sorted(attributes[ra.attr_id] for ra in resource.attributes)}
+            if ref_key == 'LINK':
+                entry['nodes'] = (node_names[resource.node_1_id], node_names[resource.node_2_id])
+            resources[(ref_key, resource.name)] = entry
+            for ra in resource.attributes:
+                ra_lookup[ra.id] = (ref_key, resource.name, attributes[ra.attr_id])
+
+    scenarios = {}
+    for scenario in network.scenarios:
+        scenarios[scenario.name] = {ra_lookup[rs.resource_attr_id]: rs.dataset.value
+                                    for rs in scenario.resourcescenarios}
+
+    rules = sorted((r.name, r.value) for r in client.get_resource_rules(ref_key='NETWORK', ref_id=network_id))
+
+    return {'name': network.name, 'resources': resources, 'rules': rules, 'scenarios': scenarios}
+
+@pytest.fixture
+def synthetic_file(tmp_path):
+    return synthetic.write_network(str(tmp_path / 'source.json'), nodes=NODES,
+                                   attributes=SYNTHETIC_ATTRIBUTES, scenarios=SCENARIOS,
+                                   timesteps=4, rules=2)
+
+@pytest.fixture
+def source(synthetic_file):
+    """
+        A fake server holding the synthetic network, as network 1
+    """
+    client = make_client()
+    import_file(client, synthetic_file)
+    return client
@@ -0,0 +1,101 @@
+"""
+    Exporting and importing several networks at once
+"""
+import os
+import zipfile
+
+import pytest
+
+from hydra_json import ImportJSON
+from hydra_json.batch import export_networks, get_project_network_ids, import_networks, \
+    find_network_files
+
+from benchmarks import synthetic
+from benchmarks.run import quiet
+
+from conftest import RecordingClient, make_client, import_file, get_contents, SYNTHETIC_ATTRIBUTES
+
+def test_export_networks(network_file, tmp_path):
+    client = RecordingClient()
+    for n in range(3):
+        ImportJSON(client).import_network(network_file, 1, 1, network_name='Network %s' % n)
+    client.call_counts.clear()
+
+    results = export_networks(client, [3, 1, 99, 2], target_dir=str(tmp_path / 'export'), max_workers=2)
+
+    assert [r['network_id'] for r in results] == [3, 1, 99, 2]
+    #The network which doesn't exist fails, without stopping the others
+    assert [r['error'] is None for r in results] == [True, True, False, True]
+    assert [os.path.basename(r['location'] or '') for r in results] == \
+        ['Network-2.json', 'Network-0.json', '', 'Network-1.json']
+    #The reference data is fetched once for the batch
+    assert client.call_counts['get_dimensions'] == 1
+    assert client.call_counts['get_template_as_json'] == 1
+
+    for result in results:
+        if result['error'] is None:
+            target = RecordingClient()
+            ImportJSON(target).import_network(result['location'], 1, 1)
+            assert target.describe() == client.describe(result['network_id'] - 1)
+
+def test_project_network_ids(network_file):
+    client = RecordingClient()
+    for project_id in (1, 2, 1):
+        ImportJSON(client).import_network(network_file, 1, project_id)
+    assert get_project_network_ids(client, 1) == [1, 3]
+
+@pytest.fixture
+def network_dir(tmp_path):
+    """
+        A directory of three network files, and one which isn't a network
+    """
+    network_dir = tmp_path / 'networks'
+    network_dir.mkdir()
+    for n in range(3):
+        synthetic.write_network(str(network_dir / ('network_%s.json' % n)), nodes=3 + n,
+                                attributes=SYNTHETIC_ATTRIBUTES, timesteps=2, rules=2)
+    (network_dir / 'network_3.json').write_text('{"network": ')
+    return network_dir
+
+def get_expected(network_file):
+    expected = make_client()
+    network = import_file(expected, network_file)
+    return get_contents(expected, network.id)
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_import_networks(network_dir, chunked):
+    network_files = find_network_files(str(network_dir))
+    assert [os.path.basename(path) for path, member in network_files] == \
+        ['network_%s.json' % n for n in range(4)]
+
+    client = make_client()
+    with quiet():
+        results = import_networks(client, network_files, client.template_id, 1,
+                                  max_workers=2, chunked=chunked)
+
+    assert [r['network_file'] for r in results] == [path for path, member in network_files]
+    #The file which can't be read fails, without stopping the others
+    assert [r['error'] is None for r in results] == [True, True, True, False]
+    #The reference data is fetched once, and each rule type is created once
+    assert client.call_counts['get_template'] == 1
+    assert client.call_counts['get_attributes'] == 1
+    assert client.call_counts['add_rule_type_definition'] == 2
+    for result in results[:3]:
+        assert get_contents(client, result['network_id']) == get_expected(result['network_file'])
+
+def test_import_bundle(network_dir, tmp_path):
+    bundle = str(tmp_path / 'bundle.zip')
+    with zipfile.ZipFile(bundle, 'w') as zip_file:
+        for n in range(3):
+            zip_file.write(str(network_dir / ('network_%s.json' % n)), 'network_%s.json' % n)
+    network_files = find_network_files(bundle)
+    assert network_files == [(bundle, 'network_%s.json' % n) for n in range(3)]
+
+    client = make_client()
+    with quiet():
+        results = import_networks(client, network_files, client.template_id, 1)
+    assert [r['error'] for r in results] == [None] * 3
+    assert [r['network_file'] for r in results] == ['%s:network_%s.json' % (bundle, n) for n in range(3)]
+    for n, result in enumerate(results):
+        assert get_contents(client, result['network_id']) == \
+            get_expected(str(network_dir / ('network_%s.json' % n)))
@@ -0,0 +1,107 @@
+"""
+    The on-disk cache of server reference data
+"""
+import os
+import json
+
+from hydra_json import cache, ImportJSON
+from hydra_json.cache import ReferenceCache
+
+from conftest import RecordingClient
+
+class Fetch:
+    """
+        Counts the times an object is fetched from the server
+    """
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+def test_get(tmp_path):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path))
+    fetch = Fetch({'id': 1, 'name': 'Template'})
+
+    assert reference_cache.get('template', 1, fetch) == fetch.value
+    cached = reference_cache.get('template', 1, fetch)
+    assert cached.name == 'Template'
+    assert fetch.calls == 1
+    assert (reference_cache.hits, reference_cache.misses) == (1, 1)
+
+    #A new cache of the same server reads what was stored
+    assert ReferenceCache('http://server', cache_dir=str(tmp_path)).get('template', 1, fetch) == fetch.value
+    assert fetch.calls == 1
+
+def test_servers(tmp_path):
+    fetch = Fetch([{'id': 1, 'name': 'flow'}])
+    ReferenceCache('http://server', cache_dir=str(tmp_path)).get('attributes', 'all', fetch)
+    ReferenceCache('http://other-server', cache_dir=str(tmp_path)).get('attributes', 'all', fetch)
+    assert fetch.calls == 2
+
+def test_ttl(tmp_path, monkeypatch):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path), ttl=60)
+    fetch = Fetch([{'id': 1, 'name': 'Volume'}])
+    now = cache.time.time()
+
+    reference_cache.get('dimensions', 'all', fetch)
+    monkeypatch.setattr(cache.time, 'time', lambda: now + 59)
+    reference_cache.get('dimensions', 'all', fetch)
+    assert fetch.calls == 1
+
+    monkeypatch.setattr(cache.time, 'time', lambda: now + 61)
+    reference_cache.get('dimensions', 'all', fetch)
+    assert fetch.calls == 2
+
+def test_entry(tmp_path):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path))
+    value = {'id': 1, 'name': 'Template', 'updated_at': '2020-01-01'}
+    reference_cache.get('template', 1, Fetch(value))
+    #Only the time it was stored is kept with the value, which expires by age alone
+    with open(reference_cache.get_path('template', 1)) as entry_file:
+        entry = json.load(entry_file)
+    assert sorted(entry) == ['stored', 'value']
+    assert entry['value'] == value
+
+def test_invalidate(tmp_path):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path))
+    fetch = Fetch({'id': 1})
+    reference_cache.get('template', 1, fetch)
+    reference_cache.invalidate('template', 1)
+    reference_cache.invalidate('template', 2)
+    reference_cache.get('template', 1, fetch)
+    assert fetch.calls == 2
+
+def test_eviction(tmp_path):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path))
+    value = {'id': 1, 'description': 'x' * 1000}
+    for template_id in range(3):
+        reference_cache.put('template', template_id, value)
+        #Used in order, a second apart
+        os.utime(reference_cache.get_path('template', template_id), (template_id, template_id))
+    entry_size = os.path.getsize(reference_cache.get_path('template', 0))
+
+    #Reading an entry makes it the most recently used
+    reference_cache.get('template', 0, Fetch(value))
+    #Room for three entries, whose sizes vary slightly with the time they were stored
+    reference_cache.max_size = entry_size * 3 + 100
+    reference_cache.put('template', 3, value)
+
+    remaining = sorted(os.listdir(reference_cache.cache_dir))
+    assert remaining == ['template-0.json', 'template-2.json', 'template-3.json']
+
+def test_import(network_file, tmp_path):
+    reference_cache = ReferenceCache('http://server', cache_dir=str(tmp_path / 'cache'))
+    client = RecordingClient()
+    for i in range(2):
+        ImportJSON(client, cache=reference_cache).import_network(network_file, 1, 1)
+
+    #The second import finds the template, the dimensions and the attributes
+    #the first created in the cache
+    assert client.call_counts['get_template'] == 1
+    assert client.call_counts['get_dimensions'] == 1
+    assert client.call_counts['get_attributes'] == 1
+    assert client.call_counts['add_attributes'] == 1
+    assert client.describe(1) == client.describe(0)
@@ -0,0 +1,78 @@
+"""
+    The commands, run against the fake server
+"""
+import os
+import sys
+import subprocess
+
+from click.testing import CliRunner
+
+from hydra_json import cli
+
+from benchmarks.startup import HEAVY_MODULES
+
+from conftest import make_client, import_file, get_contents
+
+def run(client, monkeypatch, *args):
+    monkeypatch.setattr(cli, 'get_logged_in_client', lambda context, user_id=None: client)
+    return CliRunner().invoke(cli.cli, list(args), obj={})
+
+def test_lazy_imports():
+    #In a new interpreter, as this one has loaded everything already
+    command = ('import sys; sys.argv = ["hydra-json", "--help"]; from hydra_json.cli import start_cli\n'
+               'try:\n'
+               '    start_cli()\n'
+               'except SystemExit:\n'
+               '    pass\n'
+               'print(",".join(sorted(sys.modules)))')
+    process = subprocess.run([sys.executable, '-c', command], stdout=subprocess.PIPE,
+                             universal_newlines=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    loaded = set(process.stdout.strip().split('\n')[-1].split(','))
+    assert loaded.isdisjoint(HEAVY_MODULES)
+
+    #They are still there when they are asked for
+    from hydra_json import ImportJSON, ExportJSON, copy_network
+    from hydra_json.importer import ImportJSON as importer_class
+    assert ImportJSON is importer_class
+
+def test_export(source, monkeypatch, tmp_path):
+    result = run(source, monkeypatch, 'export', '-n', '1', '-d', str(tmp_path / 'export'))
+    assert result.exit_code == 0, result.output
+    assert len(list((tmp_path / 'export').glob('*.json'))) == 1
+
+def test_export_stdout(source, monkeypatch):
+    result = run(source, monkeypatch, 'export', '-n', '1', '--stdout')
+    assert result.exit_code == 0, result.output
+    assert '"network"' in result.stdout
+
+    #Options which only apply to files are refused, rather than ignored
+    result = run(source, monkeypatch, 'export', '-n', '1', '--stdout', '--zipped', '--summary')
+    assert result.exit_code == 2
+    assert "--stdout can't be used with --zipped, --summary" in result.output
+
+def test_chunked_import_resumes(synthetic_file, monkeypatch, tmp_path):
+    expected = make_client()
+    import_file(expected, synthetic_file)
+
+    client = make_client()
+    update_resourcedata = client.update_resourcedata
+    def interrupt(*args, **kwargs):
+        #Fail once the first scenario's data has been sent
+        if client.call_counts['update_resourcedata'] > 0:
+            raise ConnectionError("Interrupted")
+        return update_resourcedata(*args, **kwargs)
+    client.update_resourcedata = interrupt
+
+    import_args = ['import', '-f', synthetic_file, '-t', str(client.template_id), '-p', '1', '--chunked']
+    result = run(client, monkeypatch, *import_args)
+    assert isinstance(result.exception, ConnectionError)
+    assert os.path.exists(synthetic_file + '.checkpoint')
+
+    client.update_resourcedata = update_resourcedata
+    result = run(client, monkeypatch, *import_args, '--resume')
+    assert result.exit_code == 0, result.output
+    assert not os.path.exists(synthetic_file + '.checkpoint')
+
+    assert list(client.networks) == [1]
+    assert get_contents(client, 1) == get_contents(expected, 1)
@@ -0,0 +1,64 @@
+"""
+    A delta export, applied to the copy of the previous export, brings it up to date
+"""
+import os
+
+from hydra_json import ImportJSON
+
+from benchmarks.run import quiet
+
+from conftest import make_client, import_file, export_network, get_contents
+
+def change_network(client):
+    """
+        Change a value, add a node with data, and remove a link and a scenario
+    """
+    network = client.networks[1]
+    first, second = network['scenarios']
+
+    rs = dict(client.scenarios[first]['resourcescenarios'][0])
+    #The server hashes a new dataset
+    rs['dataset'] = dict(rs['dataset'], id=None, hash=None, value='changed')
+    client.update_resourcedata(scenario_id=first, resource_scenarios=[rs])
+
+    attr_id = network['nodes'][0]['attributes'][0]['attr_id']
+    node = client.add_node(network_id=1, node={'name': 'New node', 'x': 0, 'y': 0,
+                                               'types': network['nodes'][0]['types'],
+                                               'attributes': [{'attr_id': attr_id, 'attr_is_var': 'N'}]})
+    new_rs = {'resource_attr_id': node['attributes'][0]['id'],
+              'dataset': dict(rs['dataset'], value='new')}
+    client.update_resourcedata(scenario_id=first, resource_scenarios=[new_rs])
+
+    client.delete_link(link_id=network['links'][0]['id'])
+    client.delete_scenario(scenario_id=second)
+
+def test_apply_delta(source, tmp_path):
+    first_export = export_network(source, 1, tmp_path / 'first', summary=True)
+    target = make_client()
+    copy = import_file(target, first_export)
+    summary_file = first_export[:-len('.json')] + '_summary.json'
+    assert os.path.exists(summary_file)
+
+    change_network(source)
+    delta_file = export_network(source, 1, tmp_path / 'second', previous=summary_file)
+    assert delta_file.endswith('_delta.json')
+
+    with quiet():
+        counts = ImportJSON(target).apply_delta(delta_file, copy.id)
+    assert sum(counts.values()) > 0
+    assert target.call_counts['add_network'] == 1
+    assert get_contents(target, copy.id) == get_contents(source, 1)
+
+def test_unchanged_delta(source, tmp_path):
+    first_export = export_network(source, 1, tmp_path / 'first', summary=True)
+    target = make_client()
+    copy = import_file(target, first_export)
+    summary_file = first_export[:-len('.json')] + '_summary.json'
+
+    delta_file = export_network(source, 1, tmp_path / 'second', previous=summary_file)
+    target.reset_counts()
+    with quiet():
+        counts = ImportJSON(target).apply_delta(delta_file, copy.id)
+    assert sum(counts.values()) == 0
+    assert target.call_counts['update_resourcedata'] == 0
+    assert get_contents(target, copy.id) == get_contents(source, 1)
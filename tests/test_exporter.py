@@ -0,0 +1,130 @@
+"""
+    Exporting a network and importing the file again
+"""
+import json
+import time
+import zipfile
+import threading
+
+import pytest
+
+from hydra_json import ImportJSON, ExportJSON, exporter
+from hydra_json.writer import JSONStreamWriter
+
+from benchmarks.run import quiet
+
+from conftest import RecordingClient, make_client, import_file, get_contents
+
+def export_network(network_file, tmp_path, **kwargs):
+    """
+        Import the network file, and export it again. Returns the client
+        holding the network, and the location of the export.
+    """
+    client = RecordingClient()
+    ImportJSON(client).import_network(network_file, 1, 1)
+    location = ExportJSON(client).export_network(1, target_dir=str(tmp_path / 'export'), **kwargs)
+    return client, location
+
+def reimport(location, **kwargs):
+    client = RecordingClient()
+    ImportJSON(client).import_network(location, 1, 1, **kwargs)
+    return client.describe()
+
+@pytest.mark.parametrize('export_kwargs', [{}, {'newlines': True}, {'zipped': True}])
+def test_export(network_file, tmp_path, export_kwargs):
+    client, location = export_network(network_file, tmp_path, **export_kwargs)
+    assert reimport(location) == client.describe()
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_dedupe_datasets(network_file, tmp_path, stream):
+    if stream is True:
+        pytest.importorskip('ijson')
+    client, location = export_network(network_file, tmp_path, dedupe_datasets=True)
+
+    with open(location) as export_file:
+        export_data = json.load(export_file)
+    resourcescenarios = [rs for s in export_data['network']['scenarios'] for rs in s['resourcescenarios']]
+    assert all('dataset' not in rs for rs in resourcescenarios)
+    #The last link's data is the same in both scenarios
+    assert len(export_data['datasets']) == len(resourcescenarios) - 2
+    assert set(rs['dataset_key'] for rs in resourcescenarios) == set(export_data['datasets'])
+
+    assert reimport(location, stream=stream) == client.describe()
+
+@pytest.mark.parametrize('dedupe_datasets', [False, True])
+@pytest.mark.parametrize('stream', [False, True])
+def test_sharded(network_file, tmp_path, dedupe_datasets, stream):
+    if stream is True:
+        pytest.importorskip('ijson')
+    client, location = export_network(network_file, tmp_path, sharded=True, max_workers=2,
+                                      dedupe_datasets=dedupe_datasets)
+    #Each scenario is fetched on its own
+    assert client.call_counts['get_scenario'] == 2
+
+    with zipfile.ZipFile(location) as zip_file:
+        manifest = json.loads(zip_file.read('manifest.json'))
+        assert sorted(zip_file.namelist()) == \
+            sorted(['manifest.json', manifest['network']] + [s['file'] for s in manifest['scenarios']])
+        network = json.loads(zip_file.read(manifest['network']))['network']
+    assert all('resourcescenarios' not in s for s in network['scenarios'])
+    assert [s['name'] for s in manifest['scenarios']] == [s['name'] for s in network['scenarios']]
+
+    assert reimport(location, stream=stream) == client.describe()
+
+def test_sharded_dataset_table(network_file, tmp_path, monkeypatch):
+    #Slow enough that both scenarios reach the data they share at the same time
+    made = []
+    make_dataset = ExportJSON.make_dataset
+    def slow_make_dataset(self, dataset):
+        made.append(dataset.hash)
+        time.sleep(0.02)
+        return make_dataset(self, dataset)
+    monkeypatch.setattr(ExportJSON, 'make_dataset', slow_make_dataset)
+
+    client, location = export_network(network_file, tmp_path, sharded=True, max_workers=2,
+                                      dedupe_datasets=True)
+    #The last link's data is in both scenarios, but is only added to the table once
+    assert len(made) == len(set(made))
+    assert reimport(location) == client.describe()
+
+def test_sharded_encoding(source, tmp_path, monkeypatch):
+    #Each of the two scenarios' shards waits for the other to be encoded at the
+    #same time, which can only happen if encoding isn't done under the zip's lock
+    barrier = threading.Barrier(2, timeout=5)
+    class WaitingWriter(JSONStreamWriter):
+        def write(self, value, *args, **kwargs):
+            if isinstance(value, dict) and 'resourcescenarios' in value:
+                barrier.wait()
+            return super().write(value, *args, **kwargs)
+    monkeypatch.setattr(exporter, 'JSONStreamWriter', WaitingWriter)
+
+    with quiet():
+        location = ExportJSON(source).export_network(1, target_dir=str(tmp_path), sharded=True, max_workers=2)
+    target = make_client()
+    network = import_file(target, location)
+    assert get_contents(target, network.id) == get_contents(source, 1)
+
+def test_dimensions(network_file, tmp_path):
+    client = RecordingClient()
+    ImportJSON(client).import_network(network_file, 1, 1)
+    client.call_counts.clear()
+
+    location = ExportJSON(client).export_network(1, target_dir=str(tmp_path))
+    #All the dimensions are fetched at once, not one at a time
+    assert client.call_counts['get_dimensions'] == 1
+    assert client.call_counts['get_dimension'] == 0
+    with open(location) as export_file:
+        attributes = json.load(export_file)['attributes']
+    assert sorted((a['name'], a['dimension']) for a in attributes.values()) == \
+        [('demand', 'Volume'), ('flow', None)]
+
+def test_shared_dimensions(network_file, tmp_path):
+    client = RecordingClient()
+    ImportJSON(client).import_network(network_file, 1, 1)
+    client.call_counts.clear()
+
+    dimension_lookup = {}
+    for i in range(2):
+        ExportJSON(client, dimension_lookup=dimension_lookup).export_network(1, target_dir=str(tmp_path / str(i)))
+    assert client.call_counts['get_dimensions'] == 1
+    assert client.call_counts['get_dimension'] == 0
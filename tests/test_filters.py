@@ -0,0 +1,45 @@
+"""
+    Exports of part of a network, with ExportFilter
+"""
+from benchmarks import synthetic
+
+from hydra_json.filters import ExportFilter
+
+from conftest import make_client, import_file, export_network, get_contents
+
+def filtered_contents(source, tmp_path, **filters):
+    location = export_network(source, 1, tmp_path, filters=ExportFilter(**filters))
+    target = make_client()
+    network = import_file(target, location)
+    return get_contents(target, network.id)
+
+def test_link_type_keeps_links_and_their_nodes(source, tmp_path):
+    contents = filtered_contents(source, tmp_path, resource_types=[synthetic.LINK_TYPE])
+    full = get_contents(source, 1)
+
+    links = [r for r in contents['resources'] if r[0] == 'LINK']
+    assert len(links) == len([r for r in full['resources'] if r[0] == 'LINK'])
+    #Every node is the end of a link in the synthetic chain
+    for link in links:
+        for node_name in contents['resources'][link]['nodes']:
+            assert ('NODE', node_name) in contents['resources']
+
+def test_link_name_pattern_keeps_links(source, tmp_path):
+    contents = filtered_contents(source, tmp_path, name_pattern='Link_0')
+    assert sorted(contents['resources']) == [('LINK', 'Link_0'), ('NODE', 'Node_0'), ('NODE', 'Node_1')]
+    assert contents['resources'][('LINK', 'Link_0')]['nodes'] == ('Node_0', 'Node_1')
+
+def test_node_type_drops_links(source, tmp_path):
+    contents = filtered_contents(source, tmp_path, resource_types=[synthetic.NODE_TYPES[0]])
+    assert len(contents['resources']) > 0
+    assert all(r[0] == 'NODE' for r in contents['resources'])
+    assert all(v['types'] == [synthetic.NODE_TYPES[0]] for v in contents['resources'].values())
+
+def test_attributes_and_scenarios(source, tmp_path):
+    contents = filtered_contents(source, tmp_path, attributes=['attr_1'], scenarios=['Scenario 1'])
+    full = get_contents(source, 1)
+
+    assert list(contents['scenarios']) == ['Scenario 1']
+    assert all(v['attributes'] == ['attr_1'] for v in contents['resources'].values())
+    expected = {k: v for k, v in full['scenarios']['Scenario 1'].items() if k[2] == 'attr_1'}
+    assert contents['scenarios']['Scenario 1'] == expected
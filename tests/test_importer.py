@@ -0,0 +1,167 @@
+"""
+    Reading network files and remapping their IDs for the server
+"""
+import os
+import zipfile
+
+import pytest
+
+from hydra_client import HydraClientError
+
+from hydra_json import ImportJSON
+from hydra_json.checkpoint import ImportCheckpoint
+
+from benchmarks.run import quiet
+from benchmarks.attributes import make_resource, make_importer
+
+from conftest import RecordingClient, make_client, get_contents
+
+def import_network(network_file, **kwargs):
+    client = RecordingClient()
+    ImportJSON(client).import_network(network_file, 1, 1, **kwargs)
+    return client.payloads[0]
+
+def import_client(network_file):
+    client = RecordingClient()
+    ImportJSON(client).import_network(network_file, 1, 1)
+    return client
+
+def import_attributes(network_file, client, attribute_batch_size=None):
+    importer = ImportJSON(client)
+    if attribute_batch_size is not None:
+        importer.attribute_batch_size = attribute_batch_size
+    importer.import_network(network_file, 1, 1)
+    return importer
+
+def test_import(network_file):
+    network = import_network(network_file)
+
+    assert [n['types'][0]['name'] for n in network['nodes']] == ['Demand', 'Supply', 'Demand']
+    #The duplicate is removed, and its data moved to the attribute kept
+    first_node = network['nodes'][0]
+    assert [ra['attr_id'] for ra in first_node['attributes']] == [1, 2]
+    ra_ids = set(ra['id'] for n in network['nodes'] + network['links'] for ra in n['attributes'])
+    assert first_node['attributes'][0]['id'] in \
+        [rs['resource_attr_id'] for rs in network['scenarios'][0]['resourcescenarios']]
+    for scenario in network['scenarios']:
+        assert all(rs['resource_attr_id'] in ra_ids for rs in scenario['resourcescenarios'])
+
+def test_stream(network_file):
+    pytest.importorskip('ijson')
+    assert import_network(network_file, stream=True) == import_network(network_file)
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_zipped(network_file, tmp_path, stream):
+    if stream is True:
+        pytest.importorskip('ijson')
+    location = str(tmp_path / 'network.zip')
+    with zipfile.ZipFile(location, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.write(network_file, 'network/network.json')
+    assert import_network(location, stream=stream) == import_network(network_file)
+    #Nothing is extracted beside the archive
+    assert sorted(os.listdir(tmp_path)) == ['network.json', 'network.zip']
+
+@pytest.mark.parametrize('attribute_batch_size, calls', [(None, 1), (1, 2)])
+def test_bulk_attributes(network_file, attribute_batch_size, calls):
+    client = RecordingClient()
+    import_attributes(network_file, client, attribute_batch_size)
+    assert (client.call_counts['add_attributes'], client.call_counts['add_attribute']) == (calls, 0)
+    assert sorted(a['name'] for a in client.attributes) == ['demand', 'flow']
+
+def test_existing_attributes(network_file):
+    client = RecordingClient()
+    client.create_attribute({'name': 'flow', 'dimension_id': None})
+
+    import_attributes(network_file, client)
+    assert (client.call_counts['add_attributes'], client.call_counts['add_attribute']) == (1, 0)
+    assert sorted(a['name'] for a in client.attributes) == ['demand', 'flow']
+    assert client.describe() == import_client(network_file).describe()
+
+def test_bulk_attributes_fallback(network_file):
+    client = RecordingClient(bulk_attributes=False)
+    importer = import_attributes(network_file, client)
+    #The bulk call is tried once, then each attribute is added on its own
+    assert importer.bulk_attributes is False
+    assert (client.call_counts['add_attributes'], client.call_counts['add_attribute']) == (1, 2)
+    assert client.describe() == import_client(network_file).describe()
+
+def test_many_duplicate_attributes():
+    resource = make_resource(1000, duplicates=0.5)
+    importer = make_importer(1000)
+    importer.update_type_and_attribute(resource)
+    #The first of each attribute is kept, in order
+    assert [ra.attr_id for ra in resource.attributes] == list(range(1, 501))
+    assert [ra.id for ra in resource.attributes] == list(range(-1, -501, -1))
+    #Units are looked up for the attributes which are kept
+    assert set(importer.ra_id_unit_id_lookup) == set(range(-1, -501, -2))
+
+def test_duplicate_attributes_with_data():
+    resource = make_resource(4, duplicates=0.5)
+    importer = make_importer(4)
+    #Only the duplicate has data, which moves to the attribute which is kept
+    importer.rs_lookup = {-3: -3}
+    importer.update_type_and_attribute(resource)
+    assert importer.rs_lookup == {-3: -1}
+    #Every duplicate is recorded, with the attribute kept in its place
+    assert importer.duplicate_ra_lookup == {-3: -1, -4: -2}
+
+    resource = make_resource(4, duplicates=0.5)
+    importer.rs_lookup = {-1: -1, -3: -3}
+    with pytest.raises(HydraClientError):
+        importer.update_type_and_attribute(resource)
+
+def interrupt_after(client, name, calls):
+    """
+        Make a call to the fake server fail once it has been made `calls` times.
+        Returns a function to undo it.
+    """
+    method = getattr(client, name)
+    def interrupted(*args, **kwargs):
+        if client.call_counts[name] >= calls:
+            raise ConnectionError("Interrupted")
+        return method(*args, **kwargs)
+    setattr(client, name, interrupted)
+    return lambda: setattr(client, name, method)
+
+def import_with_checkpoint(client, network_file, resume=False, project_id=1, **kwargs):
+    importer = ImportJSON(client, checkpoint=ImportCheckpoint(network_file + '.checkpoint'))
+    #Several batches to each scenario
+    importer.data_chunk_size = 2000
+    with quiet():
+        importer.import_network(network_file, client.template_id, project_id, resume=resume, **kwargs)
+    return importer.new_network
+
+@pytest.mark.parametrize('calls', [1, 5])
+@pytest.mark.parametrize('import_kwargs', [{'chunked': True}, {'chunked': True, 'stream': True}])
+def test_resume(synthetic_file, calls, import_kwargs):
+    if import_kwargs.get('stream') is True:
+        pytest.importorskip('ijson')
+    expected = make_client()
+    import_with_checkpoint(expected, synthetic_file, **import_kwargs)
+    batches = expected.call_counts['update_resourcedata']
+    assert batches > calls
+
+    client = make_client()
+    restore = interrupt_after(client, 'update_resourcedata', calls)
+    with pytest.raises(ConnectionError):
+        import_with_checkpoint(client, synthetic_file, **import_kwargs)
+    assert os.path.exists(synthetic_file + '.checkpoint')
+    restore()
+
+    client.reset_counts()
+    network = import_with_checkpoint(client, synthetic_file, resume=True, **import_kwargs)
+    assert not os.path.exists(synthetic_file + '.checkpoint')
+    assert client.call_counts['add_network'] == 0
+    #Only the data which wasn't sent is sent
+    assert client.call_counts['update_resourcedata'] == batches - calls
+    assert list(client.networks) == [network.id]
+    assert get_contents(client, network.id) == get_contents(expected, 1)
+
+def test_resume_other_project(synthetic_file):
+    client = make_client()
+    restore = interrupt_after(client, 'update_resourcedata', 1)
+    with pytest.raises(ConnectionError):
+        import_with_checkpoint(client, synthetic_file, chunked=True)
+    restore()
+    with pytest.raises(HydraClientError):
+        import_with_checkpoint(client, synthetic_file, resume=True, project_id=2, chunked=True)
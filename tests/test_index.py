@@ -0,0 +1,45 @@
+"""
+    Reading single scenarios, and single resources' data, through the index of an export
+"""
+import json
+
+import pytest
+
+from hydra_client import HydraClientError
+
+from hydra_json.index import NetworkIndex
+
+from conftest import make_client, import_file, export_network, get_contents
+
+@pytest.mark.parametrize('export_kwargs', [{'index': True},
+                                           {'zipped': True, 'index': True},
+                                           {'zipped': True, 'index': True, 'compression': 'gzip'},
+                                           {}])
+def test_import_scenario(source, tmp_path, export_kwargs):
+    location = export_network(source, 1, tmp_path / 'export', **export_kwargs)
+    target = make_client()
+    #Without an index, the whole file is read and the other scenarios dropped
+    network = import_file(target, location, scenarios=['Scenario 1'])
+    contents = get_contents(target, network.id)
+
+    full = get_contents(source, 1)
+    assert contents['resources'] == full['resources']
+    assert contents['scenarios'] == {'Scenario 1': full['scenarios']['Scenario 1']}
+
+def test_resource_scenarios(source, tmp_path):
+    location = export_network(source, 1, tmp_path / 'export', index=True)
+    with open(location) as export_file:
+        export_data = json.load(export_file)
+    scenario = export_data['network']['scenarios'][0]
+    node = export_data['network']['nodes'][0]
+    ra_ids = set(ra['id'] for ra in node['attributes'])
+
+    blocks = NetworkIndex(location).load_resource_scenarios(scenario['name'], 'NODE', [node['id'], 0])
+    assert list(blocks) == [str(node['id'])]
+    assert blocks[str(node['id'])] == [rs for rs in scenario['resourcescenarios']
+                                       if rs['resource_attr_id'] in ra_ids]
+
+def test_no_index(source, tmp_path):
+    location = export_network(source, 1, tmp_path / 'export')
+    with pytest.raises(HydraClientError):
+        NetworkIndex(location)
@@ -0,0 +1,98 @@
+"""
+    The phases, calls and payloads recorded by instrumentation
+"""
+import json
+
+import pytest
+
+from hydra_json import ImportJSON, ExportJSON
+from hydra_json.instrument import Instrumentation, phase
+
+from benchmarks.run import quiet
+
+from conftest import make_client
+
+def test_phases():
+    instrumentation = Instrumentation()
+    client = instrumentation.wrap(make_client())
+    with instrumentation.phase('outer'):
+        client.get_attributes()
+        with instrumentation.phase('inner'):
+            client.get_dimensions()
+            client.get_dimensions()
+
+    #Inner phases finish first, and are named after the phases they're in
+    inner, outer = instrumentation.phases
+    assert inner['name'] == 'outer.inner'
+    assert inner['calls'] == {'get_dimensions': 2}
+    assert outer['name'] == 'outer'
+    assert outer['calls'] == {'get_attributes': 1, 'get_dimensions': 2}
+    assert outer['wall_time'] >= inner['wall_time']
+    #Payloads aren't measured unless asked for, as it means encoding them again
+    assert outer['bytes_sent'] == outer['bytes_received'] == 0
+
+def test_measure_payload():
+    instrumentation = Instrumentation(measure_payload=True)
+    client = instrumentation.wrap(make_client())
+    with instrumentation.phase('outer'):
+        client.get_attributes()
+        with instrumentation.phase('inner'):
+            client.get_dimensions()
+    inner, outer = instrumentation.phases
+    assert outer['bytes_received'] > inner['bytes_received'] > 0
+    assert outer['bytes_sent'] > 0
+
+def test_trace_memory():
+    instrumentation = Instrumentation(trace_memory=True)
+    with instrumentation.phase('allocate'):
+        data = [0] * 100000
+        del data
+    assert instrumentation.phases[0]['peak_memory'] >= 100000 * 8
+
+def test_nested_peak():
+    instrumentation = Instrumentation(trace_memory=True)
+    with instrumentation.phase('outer'):
+        data = [0] * 200000
+        del data
+        with instrumentation.phase('first'):
+            first = [0] * 100000
+            del first
+        with instrumentation.phase('second'):
+            second = [0] * 10000
+            del second
+    first, second, outer = (p['peak_memory'] for p in instrumentation.phases)
+    #The outer phase's peak, before the phases inside it, isn't lost when they start
+    assert outer >= 200000 * 8
+    assert 100000 * 8 <= first < 200000 * 8
+    assert 10000 * 8 <= second < 100000 * 8
+
+def test_no_instrumentation():
+    with phase(None, 'nothing'):
+        pass
+
+def test_import_export(synthetic_file, tmp_path):
+    client = make_client()
+    instrumentation = Instrumentation()
+    with quiet():
+        ImportJSON(client, instrumentation=instrumentation).import_network(synthetic_file,
+                                                                           client.template_id, 1)
+    names = [p['name'] for p in instrumentation.phases]
+    assert {'read.parse', 'add_network', 'add_rules'} <= set(names)
+    #Every call made by the import went through the instrumentation
+    assert all(client.call_counts[name] == count for name, count in instrumentation.call_counts.items())
+    assert instrumentation.call_counts['add_network'] == 1
+
+    instrumentation = Instrumentation()
+    with quiet():
+        ExportJSON(client, instrumentation=instrumentation).export_network(1, target_dir=str(tmp_path))
+    assert {'get_network', 'write'} <= set(p['name'] for p in instrumentation.phases)
+    assert instrumentation.call_counts['get_network'] == 1
+
+    report_file = tmp_path / 'report.json'
+    instrumentation.write_report(str(report_file))
+    report = json.loads(report_file.read_text())
+    assert report['calls'] == dict(instrumentation.call_counts)
+    assert [p['name'] for p in report['phases']] == [p['name'] for p in instrumentation.phases]
+    #The process's peak RSS covers its whole life, so it isn't given for each phase
+    assert 'lifetime_peak_rss' in report
+    assert all('peak_rss' not in p for p in report['phases'])
@@ -0,0 +1,62 @@
+"""
+    The incremental readers of network files
+"""
+import os
+import json
+import zipfile
+
+import pytest
+
+from hydra_client import HydraClientError
+
+from hydra_json import reader
+
+NETWORK_FILE = os.path.join(os.path.dirname(__file__), 'test.json')
+
+def load():
+    with open(NETWORK_FILE) as network_file:
+        return json.load(network_file)
+
+def test_items():
+    pytest.importorskip('ijson')
+    network = load()['network']
+    with open(NETWORK_FILE, 'rb') as network_file:
+        records = list(reader.iter_records(network_file, items=(reader.NODES, reader.LINKS,
+                                                                  reader.RESOURCESCENARIOS)))
+
+    assert [r for p, r in records if p == reader.NODES] == network['nodes']
+    assert [r for p, r in records if p == reader.LINKS] == network['links']
+    assert [r for p, r in records if p == reader.RESOURCESCENARIOS] == \
+        [rs for s in network['scenarios'] for rs in s['resourcescenarios']]
+
+def test_members():
+    pytest.importorskip('ijson')
+    network = load()['network']
+    with open(NETWORK_FILE, 'rb') as network_file:
+        records = list(reader.iter_records(network_file,
+                                           members={reader.NETWORK: reader.NETWORK_COLLECTIONS}))
+
+    #Each member except the collections, then the end of the network
+    assert records[-1] == (reader.NETWORK, None)
+    members = {p[len(reader.NETWORK) + 1:]: v for p, v in records[:-1]}
+    assert members == {k: v for k, v in network.items() if k not in reader.NETWORK_COLLECTIONS}
+
+def test_open_zipped_network(tmp_path):
+    location = str(tmp_path / 'network.zip')
+    with zipfile.ZipFile(location, 'w') as zip_file:
+        zip_file.writestr('__MACOSX/network.json', 'not the network')
+        zip_file.writestr('exports/', '')
+        zip_file.write(NETWORK_FILE, 'exports/network.json')
+        zip_file.writestr('exports/.network.json', 'not the network')
+
+    with reader.open_network(location) as stream:
+        assert json.load(stream) == load()
+
+def test_open_empty_zip(tmp_path):
+    location = str(tmp_path / 'network.zip')
+    with zipfile.ZipFile(location, 'w') as zip_file:
+        zip_file.writestr('.hidden', '')
+
+    with pytest.raises(HydraClientError):
+        with reader.open_network(location):
+            pass
@@ -0,0 +1,96 @@
+"""
+    The compact records which hold the bulk collections of a network
+"""
+import json
+
+import pytest
+
+from hydra_client.objects import ExtendedDict
+
+from hydra_json import ImportJSON
+from hydra_json.importer import extend_network
+from hydra_json.records import ResourceAttribute, ResourceScenario, Dataset, \
+    compact_network, encode_record, to_dicts, replace_records
+
+from benchmarks.run import quiet
+
+from conftest import make_client
+
+RS = {'resource_attr_id': -1, 'scenario_id': 2,
+      'dataset': {'id': 3, 'name': 'flow', 'type': 'scalar', 'value': '1.5', 'unit': 'm'}}
+
+def test_access():
+    rs = ResourceScenario(RS)
+    assert rs.resource_attr_id == rs['resource_attr_id'] == -1
+    #Datasets become records too, keeping fields which aren't declared
+    assert isinstance(rs.dataset, Dataset)
+    assert rs.dataset.unit == rs.dataset['unit'] == 'm'
+    #Fields which haven't been set read as None, like an ExtendedDict
+    assert rs.dataset_key is None
+    assert rs.get('dataset_key', 'default') == 'default'
+    with pytest.raises(KeyError):
+        rs['dataset_key']
+    assert 'dataset_key' not in rs and 'dataset' in rs
+
+    rs.dataset_key = 'key'
+    rs['source'] = 'file'
+    assert rs.keys() == ['resource_attr_id', 'scenario_id', 'dataset', 'dataset_key', 'source']
+    assert rs.pop('dataset_key') == 'key'
+    assert rs.pop('dataset_key', None) is None
+    del rs['source']
+    assert rs == RS
+
+def test_no_dict():
+    #The point of the records is that they hold no dict of their own
+    ra = ResourceAttribute({'id': -1, 'attr_id': -2, 'name': 'flow'})
+    assert not hasattr(ra, '__dict__')
+    ra.unknown = 1
+    assert ra.as_dict() == {'id': -1, 'attr_id': -2, 'name': 'flow', 'unknown': 1}
+
+def test_encode():
+    network = {'name': 'Network',
+               'attributes': [{'id': -1, 'attr_id': -2, 'extra': [1, 2]}],
+               'nodes': [{'id': -1, 'attributes': [{'id': -2, 'attr_id': -2}]}],
+               'scenarios': [{'name': 'Scenario', 'resourcescenarios': [dict(RS)],
+                              'resourcegroupitems': [{'id': -1, 'ref_key': 'NODE', 'ref_id': -1}]}]}
+    expected = json.dumps(network, sort_keys=True)
+
+    compacted = compact_network(json.loads(expected))
+    assert isinstance(compacted['nodes'][0]['attributes'][0], ResourceAttribute)
+    assert isinstance(compacted['scenarios'][0]['resourcescenarios'][0], ResourceScenario)
+    #Records encode to the JSON they were read from
+    assert json.dumps(compacted, sort_keys=True, default=encode_record) == expected
+    assert json.dumps(to_dicts(compacted), sort_keys=True) == expected
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_imported_records(synthetic_file, stream):
+    if stream is True:
+        pytest.importorskip('ijson')
+    client = make_client()
+    importer = ImportJSON(client)
+    save_network = importer.save_network
+    def check_records(*args, **kwargs):
+        #The network read is held as records until it is sent, not turned back into dicts
+        network = importer.input_network
+        assert all(isinstance(ra, ResourceAttribute) for n in network.nodes for ra in n.attributes)
+        assert all(isinstance(rs, ResourceScenario) for s in network.scenarios for rs in s.resourcescenarios)
+        return save_network(*args, **kwargs)
+    importer.save_network = check_records
+    with quiet():
+        importer.import_network(synthetic_file, client.template_id, 1, stream=stream)
+    assert importer.new_network is not None
+
+def test_replace_records():
+    network = ExtendedDict({'nodes': [{'id': -1, 'attributes': [{'id': -2, 'attr_id': -2}]}],
+                            'scenarios': [{'resourcescenarios': [dict(RS)]}]})
+    expected = json.dumps(network, sort_keys=True)
+    network = extend_network(compact_network(network))
+    node = network.nodes[0]
+    scenario = network.scenarios[0]
+
+    assert replace_records(network) is network
+    #The records are replaced by dicts within the same network, resources and scenarios
+    assert network.nodes[0] is node and network.scenarios[0] is scenario
+    assert type(node.attributes[0]) is dict
+    assert type(scenario.resourcescenarios[0]['dataset']) is dict
+    assert json.dumps(network, sort_keys=True) == expected
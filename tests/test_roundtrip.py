@@ -0,0 +1,117 @@
+"""
+    Exporting a network and importing the file, in each of the export's
+    formats and the import's modes, gives the same network back
+"""
+import pytest
+
+import zipfile
+
+from hydra_json import ImportJSON
+from hydra_json.instrument import Instrumentation
+
+from benchmarks import synthetic
+from benchmarks.run import quiet
+
+from conftest import make_client, import_file, export_network, get_contents, \
+    NODES, SYNTHETIC_ATTRIBUTES, SCENARIOS
+
+def roundtrip(source, tmp_path, import_kwargs=None, **export_kwargs):
+    location = export_network(source, 1, tmp_path, **export_kwargs)
+    target = make_client()
+    network = import_file(target, location, **(import_kwargs or {}))
+    return get_contents(target, network.id)
+
+def test_source(source):
+    #So that the comparisons below aren't of empty networks
+    contents = get_contents(source, 1)
+    assert len([r for r in contents['resources'] if r[0] == 'NODE']) == NODES
+    assert len([r for r in contents['resources'] if r[0] == 'LINK']) > 0
+    assert all(len(r['attributes']) == SYNTHETIC_ATTRIBUTES for r in contents['resources'].values())
+    assert len(contents['rules']) > 0
+    assert len(contents['scenarios']) == SCENARIOS
+    for values in contents['scenarios'].values():
+        assert len(values) == len(contents['resources']) * SYNTHETIC_ATTRIBUTES
+
+@pytest.mark.parametrize('export_kwargs', [{},
+                                           {'newlines': True},
+                                           {'zipped': True},
+                                           {'dedupe_datasets': True},
+                                           {'sharded': True},
+                                           {'sharded': True, 'dedupe_datasets': True},
+                                           {'index': True},
+                                           {'zipped': True, 'index': True}])
+def test_export_import(source, tmp_path, export_kwargs):
+    assert roundtrip(source, tmp_path, **export_kwargs) == get_contents(source, 1)
+
+@pytest.mark.parametrize('compression', ['deflate', 'gzip', 'bz2', 'lzma', 'zstd'])
+@pytest.mark.parametrize('import_kwargs', [{}, {'stream': True}])
+def test_compression(source, tmp_path, compression, import_kwargs):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    if import_kwargs.get('stream') is True:
+        pytest.importorskip('ijson')
+    contents = roundtrip(source, tmp_path, import_kwargs=import_kwargs, zipped=True,
+                         compression=compression, compression_level=1)
+    assert contents == get_contents(source, 1)
+
+@pytest.mark.parametrize('compression', ['bz2', 'lzma'])
+def test_compressed_shards(source, tmp_path, compression):
+    assert roundtrip(source, tmp_path, sharded=True, compression=compression) == get_contents(source, 1)
+
+@pytest.mark.parametrize('import_kwargs', [{'stream': True},
+                                           {'chunked': True},
+                                           {'stream': True, 'chunked': True}])
+@pytest.mark.parametrize('export_kwargs', [{}, {'dedupe_datasets': True}, {'sharded': True}])
+def test_import_modes(source, tmp_path, import_kwargs, export_kwargs):
+    if import_kwargs.get('stream') is True:
+        pytest.importorskip('ijson')
+    contents = roundtrip(source, tmp_path, import_kwargs=import_kwargs, **export_kwargs)
+    assert contents == get_contents(source, 1)
+
+def test_chunked_network_fetched_once(synthetic_file):
+    client = make_client()
+    instrumentation = Instrumentation()
+    with quiet():
+        ImportJSON(client, instrumentation=instrumentation).import_network(synthetic_file,
+                                                                           client.template_id, 1,
+                                                                           chunked=True)
+    #The resource attributes returned by add_network are used, rather than fetched again
+    assert instrumentation.call_counts['get_network'] == 0
+    assert all(len(s['resourcescenarios']) > 0 for s in client.scenarios.values())
+
+def test_chunk_size(synthetic_file):
+    client = make_client()
+    importer = ImportJSON(client)
+    importer.data_chunk_size = 2000
+    with quiet():
+        importer.import_network(synthetic_file, client.template_id, 1, chunked=True)
+    #The network is created without its data, which is sent in several batches a scenario
+    assert client.call_counts['update_resourcedata'] > SCENARIOS
+    assert all(len(s['resourcescenarios']) > 0 for s in client.scenarios.values())
+    expected = make_client()
+    import_file(expected, synthetic_file)
+    assert get_contents(client, importer.new_network.id) == get_contents(expected, 1)
+
+@pytest.mark.parametrize('import_kwargs', [{}, {'stream': True}, {'chunked': True}])
+@pytest.mark.parametrize('export_kwargs', [{'zipped': True}, {'sharded': True}])
+def test_columnar(tmp_path, import_kwargs, export_kwargs):
+    pytest.importorskip('numpy')
+    if import_kwargs.get('stream') is True:
+        pytest.importorskip('ijson')
+    #Values long enough to be moved into columns
+    network_file = synthetic.write_network(str(tmp_path / 'long.json'), nodes=3,
+                                           attributes=SYNTHETIC_ATTRIBUTES, timesteps=200)
+    source = make_client()
+    import_file(source, network_file)
+
+    location = export_network(source, 1, tmp_path / 'export', columnar=True, **export_kwargs)
+    with zipfile.ZipFile(location) as zip_file:
+        assert any(name.startswith('_columns/') for name in zip_file.namelist())
+    target = make_client()
+    network = import_file(target, location, **import_kwargs)
+    assert get_contents(target, network.id) == get_contents(source, 1)
+
+def test_export_scenario(source, tmp_path):
+    scenario_id = source.networks[1]['scenarios'][1]
+    contents = roundtrip(source, tmp_path, scenario_id=scenario_id)
+    assert contents['scenarios'] == {'Scenario 1': get_contents(source, 1)['scenarios']['Scenario 1']}
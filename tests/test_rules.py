@@ -0,0 +1,71 @@
+"""
+    Adding a network's rules, and the rule type definitions they use
+"""
+import pytest
+
+from hydra_json import ImportJSON
+
+from benchmarks import synthetic
+from benchmarks.run import quiet
+
+from conftest import make_client, SYNTHETIC_ATTRIBUTES
+
+RULES = 12
+
+@pytest.fixture
+def rules_file(tmp_path):
+    #Rule i has the type type_<i % 5>, so each type is used by several rules
+    return synthetic.write_network(str(tmp_path / 'rules.json'), nodes=2,
+                                   attributes=SYNTHETIC_ATTRIBUTES, timesteps=1, rules=RULES)
+
+def import_rules(client, rules_file, **kwargs):
+    importer = ImportJSON(client)
+    importer.rule_workers = 4
+    with quiet():
+        importer.import_network(rules_file, client.template_id, 1, **kwargs)
+    return importer
+
+def get_rules(client, network_id):
+    return sorted((r['name'], r['value']) for r in client.rules[network_id])
+
+def test_rules(rules_file):
+    client = make_client()
+    importer = import_rules(client, rules_file)
+    assert importer.rule_errors == []
+    assert get_rules(client, importer.new_network.id) == \
+        sorted(('rule_%s' % r, 'x = %s' % r) for r in range(RULES))
+    #Each type definition is created once, however many rules use it
+    assert client.call_counts['add_rule_type_definition'] == 5
+    assert sorted(client.rule_type_definitions) == ['type_%s' % t for t in range(5)]
+
+    #Those already on the server aren't created again
+    client.reset_counts()
+    import_rules(client, rules_file)
+    assert client.call_counts['add_rule_type_definition'] == 0
+    assert client.call_counts['add_rule'] == RULES
+
+def test_rule_errors(rules_file):
+    client = make_client()
+    add_rule = client.add_rule
+    def failing_add_rule(rule):
+        if rule['name'] in ('rule_3', 'rule_7'):
+            raise ValueError("Invalid rule")
+        return add_rule(rule)
+    client.add_rule = failing_add_rule
+
+    importer = import_rules(client, rules_file)
+    #The other rules are still added
+    assert len(client.rules[importer.new_network.id]) == RULES - 2
+    assert importer.rule_errors == [{'index': 3, 'name': 'rule_3', 'error': 'Invalid rule'},
+                                    {'index': 7, 'name': 'rule_7', 'error': 'Invalid rule'}]
+
+def test_skip_rules(rules_file):
+    client = make_client()
+    importer = import_rules(client, rules_file, skip_rules=True)
+    network_id = importer.new_network.id
+    assert client.call_counts['add_rule'] == 0
+
+    with quiet():
+        errors = ImportJSON(client).import_rules(rules_file, network_id)
+    assert errors == []
+    assert len(client.rules[network_id]) == RULES
@@ -0,0 +1,57 @@
+"""
+    Copying a network from one server to another
+"""
+import pytest
+
+from hydra_client import HydraClientError
+
+from hydra_json import copy_network
+
+from benchmarks.run import quiet
+
+from conftest import make_client, get_contents, SCENARIOS
+
+def copy(source):
+    target = make_client()
+    with quiet():
+        network = copy_network(source, target, 1, target.template_id, 1)
+    return get_contents(target, network.id)
+
+def add_duplicate(source):
+    """
+        Add a second resource attribute for the first attribute of the first
+        node, returning the IDs of the original and the duplicate
+    """
+    node = source.networks[1]['nodes'][0]
+    original = node['attributes'][0]
+    duplicate = source.add_resource_attribute('NODE', node['id'], original['attr_id'])
+    return original['id'], duplicate['id']
+
+def test_copy(source):
+    expected = get_contents(source, 1)
+    source.reset_counts()
+    assert copy(source) == expected
+    #The network is fetched without its data, and each scenario on its own
+    assert source.call_counts['get_network'] == 1
+    assert source.call_counts['get_scenario'] == SCENARIOS
+
+def test_copy_retargets_duplicate_data(source):
+    expected = get_contents(source, 1)
+    original_id, duplicate_id = add_duplicate(source)
+    #Move the data of the original onto the duplicate, which the copy drops
+    for scenario in source.scenarios.values():
+        for rs in scenario['resourcescenarios']:
+            if rs['resource_attr_id'] == original_id:
+                rs['resource_attr_id'] = duplicate_id
+
+    assert copy(source) == expected
+
+def test_copy_duplicate_data_on_both(source):
+    original_id, duplicate_id = add_duplicate(source)
+    for scenario in source.scenarios.values():
+        for rs in list(scenario['resourcescenarios']):
+            if rs['resource_attr_id'] == original_id:
+                scenario['resourcescenarios'].append(dict(rs, resource_attr_id=duplicate_id))
+
+    with pytest.raises(HydraClientError):
+        copy(source)
@@ -0,0 +1,86 @@
+"""
+    Files which can't be imported are rejected, with all their problems,
+    before anything is written to the server
+"""
+import json
+
+import pytest
+
+from hydra_client import HydraClientError
+
+from hydra_json import ImportJSON
+
+from benchmarks import synthetic
+from benchmarks.run import quiet
+
+from conftest import make_client, import_file, NODES, SYNTHETIC_ATTRIBUTES, SCENARIOS
+
+def write_broken_network(path):
+    """
+        A synthetic network with a link to a missing node, a node of a type
+        which isn't in the template, and data for a missing resource attribute
+    """
+    network_data = synthetic.make_network(nodes=NODES, attributes=SYNTHETIC_ATTRIBUTES, scenarios=SCENARIOS)
+    network = network_data['network']
+    network['links'][0]['node_2_id'] = -1000
+    network['nodes'][0]['types'][0]['name'] = 'Unknown'
+    network['scenarios'][1]['resourcescenarios'][0]['resource_attr_id'] = -2000
+    with open(path, 'w') as network_file:
+        json.dump(network_data, network_file)
+    return str(path)
+
+def check_problems(problems):
+    assert len(problems) == 3
+    assert any('-1000' in p for p in problems)
+    assert any('Unknown' in p for p in problems)
+    assert any('-2000' in p for p in problems)
+
+def test_dry_run(synthetic_file):
+    client = make_client()
+    importer = ImportJSON(client)
+    with quiet():
+        importer.import_network(synthetic_file, client.template_id, 1, dry_run=True)
+    assert importer.problems == []
+    assert len(client.networks) == 0
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_problems(tmp_path, stream):
+    network_file = write_broken_network(tmp_path / 'broken.json')
+    client = make_client()
+    importer = ImportJSON(client)
+    with quiet():
+        importer.import_network(network_file, client.template_id, 1, stream=stream, dry_run=True)
+    check_problems(importer.problems)
+    assert len(client.networks) == 0
+
+@pytest.mark.parametrize('import_kwargs', [{}, {'stream': True}, {'chunked': True}])
+def test_import_fails(tmp_path, import_kwargs):
+    network_file = write_broken_network(tmp_path / 'broken.json')
+    client = make_client()
+    client.reset_counts()
+    with pytest.raises(HydraClientError) as error:
+        import_file(client, network_file, **import_kwargs)
+    check_problems(str(error.value).split('\n')[1:])
+    assert len(client.networks) == 0
+    assert client.call_counts['add_attribute'] + client.call_counts['add_attributes'] == 0
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_no_scenarios(tmp_path, stream):
+    if stream is True:
+        pytest.importorskip('ijson')
+    network_data = synthetic.make_network(nodes=NODES, attributes=SYNTHETIC_ATTRIBUTES, scenarios=SCENARIOS)
+    network_data['network']['scenarios'] = []
+    network_file = str(tmp_path / 'empty.json')
+    with open(network_file, 'w') as empty_file:
+        json.dump(network_data, empty_file)
+
+    #Worth a warning, but the network can still be imported
+    client = make_client()
+    importer = ImportJSON(client)
+    with quiet():
+        problems = importer.validate_network(network_file, client.template_id, stream=stream)
+    assert problems == []
+    assert importer.warnings == ["The network has no scenarios"]
+
+    network = import_file(client, network_file, stream=stream)
+    assert network.id in client.networks
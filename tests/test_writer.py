@@ -0,0 +1,47 @@
+"""
+    Writing network files section by section
+"""
+import io
+import os
+import json
+import zipfile
+
+import pytest
+
+from hydra_json import ExportJSON
+from hydra_json.writer import JSONStreamWriter
+
+NETWORK_FILE = os.path.join(os.path.dirname(__file__), 'test.json')
+
+def load():
+    with open(NETWORK_FILE) as network_file:
+        return json.load(network_file)
+
+@pytest.mark.parametrize('newlines', [False, True])
+def test_stream_writer(newlines):
+    network_data = load()
+    output = io.StringIO()
+    JSONStreamWriter(output, newlines=newlines).write(network_data)
+    assert json.loads(output.getvalue()) == network_data
+    assert (output.getvalue().count('\n') > 0) == newlines
+
+@pytest.mark.parametrize('zipped', [False, True])
+def test_write_network(tmp_path, zipped):
+    network_data = load()
+    location = ExportJSON(None).write_network('Test network', network_data, str(tmp_path), zipped=zipped)
+
+    if zipped is True:
+        with zipfile.ZipFile(location) as zip_file:
+            assert zip_file.namelist() == ['Test-network.json']
+            written = json.loads(zip_file.read('Test-network.json'))
+    else:
+        assert os.path.basename(location) == 'Test-network.json'
+        with open(location) as network_file:
+            written = json.load(network_file)
+    assert written == network_data
+
+def test_write_network_output():
+    network_data = load()
+    output = io.StringIO()
+    assert ExportJSON(None).write_network('Test network', network_data, None, output=output) is None
+    assert json.loads(output.getvalue()) == network_data